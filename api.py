@@ -0,0 +1,328 @@
+"""
+Local HTTP API for the calculation engine.
+
+Run with `python api.py --port 8000 --workers 4`. Every endpoint takes a JSON object or a list of objects and
+returns one result per object:
+
+- POST /scenario: power and torque at the wheels for a driving scenario
+- POST /drive-profile: energy consumption of a vehicle over a drive profile
+- POST /pack-sizing: battery pack configuration for an energy consumption and range
+- GET /profiles: the available drive profiles
+
+Concurrent requests to the same endpoint are coalesced into one vectorized evaluation. Every worker process loads
+the drive profiles once and keeps them in memory.
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from calculations import calculate_scenario_power_and_torque
+from design_chain import DESIGN_INPUT_DEFAULTS, size_battery_pack
+from energy_model import DRIVE_PROFILES_DIR, load_drive_cycle, calculate_wh_per_km
+from results_store import get_results_store, result_key
+
+SCENARIO_DEFAULTS = {
+    "mass": DESIGN_INPUT_DEFAULTS["mass"],
+    "vehicle_height": DESIGN_INPUT_DEFAULTS["vehicle_height"],
+    "vehicle_width": DESIGN_INPUT_DEFAULTS["vehicle_width"],
+    "wheel_radius": 0.3,
+    "C0": DESIGN_INPUT_DEFAULTS["C0"],
+    "C1": DESIGN_INPUT_DEFAULTS["C1"],
+    "km": 1.1,
+    "speed_kph": 60.0,
+    "grade_percent": 0.0,
+    "acceleration": 0.0,
+    "headwind_kph": 0.0,
+}
+
+DRIVE_PROFILE_DEFAULTS = {
+    "mass": DESIGN_INPUT_DEFAULTS["mass"],
+    "vehicle_height": DESIGN_INPUT_DEFAULTS["vehicle_height"],
+    "vehicle_width": DESIGN_INPUT_DEFAULTS["vehicle_width"],
+    "C0": DESIGN_INPUT_DEFAULTS["C0"],
+    "C1": DESIGN_INPUT_DEFAULTS["C1"],
+    "regen_efficiency": DESIGN_INPUT_DEFAULTS["regen_efficiency"],
+}
+
+PACK_SIZING_DEFAULTS = {
+    "wh_per_km": 200.0,
+    "total_distance_km": DESIGN_INPUT_DEFAULTS["total_distance_km"],
+    "battery_efficiency": DESIGN_INPUT_DEFAULTS["battery_efficiency"],
+    "auxiliary_load_factor": DESIGN_INPUT_DEFAULTS["auxiliary_load_factor"],
+    "motor_voltage": DESIGN_INPUT_DEFAULTS["motor_voltage"],
+    "nominal_cell_voltage": DESIGN_INPUT_DEFAULTS["nominal_cell_voltage"],
+    "cell_capacity_ah": DESIGN_INPUT_DEFAULTS["cell_capacity_ah"],
+}
+
+# Drive profiles of this worker process, loaded once and reloaded when the file changes
+_drive_cycles = {}
+_drive_cycles_lock = threading.Lock()
+
+
+def get_drive_cycle(profile):
+    """The drive cycle arrays of a profile in the drive profile directory."""
+    if os.path.basename(profile) != profile or not profile.endswith(".csv"):
+        raise ValueError(f"Invalid drive profile name '{profile}'.")
+    file_path = os.path.join(DRIVE_PROFILES_DIR, profile)
+    if not os.path.exists(file_path):
+        raise ValueError(f"Drive profile '{profile}' not found.")
+
+    modified = os.path.getmtime(file_path)
+    with _drive_cycles_lock:
+        cached = _drive_cycles.get(profile)
+        if cached is None or cached[0] != modified:
+            cached = (modified, load_drive_cycle(file_path))
+            _drive_cycles[profile] = cached
+    return cached[1]
+
+
+def list_drive_profiles():
+    return sorted(f for f in os.listdir(DRIVE_PROFILES_DIR) if f.endswith(".csv"))
+
+
+def parameter_arrays(items, defaults):
+    """Columns of the numeric parameters of a batch of requests, with defaults for missing values."""
+    return {name: np.array([float(item.get(name, default)) for item in items]) for name, default in defaults.items()}
+
+
+def evaluate_scenarios(items):
+    values = parameter_arrays(items, SCENARIO_DEFAULTS)
+    power_w, torque_nm = calculate_scenario_power_and_torque(
+        values["mass"], values["vehicle_height"] * values["vehicle_width"], values["wheel_radius"], values["C0"],
+        values["C1"], values["km"], values["speed_kph"], values["grade_percent"], values["acceleration"],
+        values["headwind_kph"])
+    return [{"power_w": float(power), "torque_nm": float(torque)} for power, torque in zip(power_w, torque_nm)]
+
+
+def evaluate_drive_profiles(items):
+    results = [None] * len(items)
+    profiles = [item.get("profile") or list_drive_profiles()[0] for item in items]
+
+    # Designs evaluated before, by any worker or app replica, come from the results store
+    store = get_results_store()
+    keys = [None] * len(items)
+    if store is not None:
+        for index, (item, profile) in enumerate(zip(items, profiles)):
+            parameters = {name: float(item.get(name, default)) for name, default in DRIVE_PROFILE_DEFAULTS.items()}
+            keys[index] = result_key("api_drive_profile", parameters,
+                                     files=[os.path.join(DRIVE_PROFILES_DIR, profile)])
+        try:
+            stored = store.get_many(keys)
+        except sqlite3.Error:
+            stored = {}
+        for index, key in enumerate(keys):
+            if key in stored:
+                results[index] = {"profile": profiles[index], **stored[key]}
+
+    # One vectorized evaluation per drive profile for the remaining designs
+    computed = {}
+    missing = [index for index in range(len(items)) if results[index] is None]
+    for profile in {profiles[index] for index in missing}:
+        indices = [index for index in missing if profiles[index] == profile]
+        cycle = get_drive_cycle(profile)
+        values = parameter_arrays([items[index] for index in indices], DRIVE_PROFILE_DEFAULTS)
+        wh_per_km = calculate_wh_per_km(
+            cycle["speed_mps"], cycle["acceleration"], cycle["time_interval_s"], values["mass"],
+            values["vehicle_height"] * values["vehicle_width"], values["C0"], values["C1"],
+            values["regen_efficiency"])
+        for index, value in zip(indices, wh_per_km):
+            result = {
+                "wh_per_km": float(value),
+                "km_per_kwh": float(1000 / value) if value > 0 else None,
+            }
+            results[index] = {"profile": profile, **result}
+            if keys[index] is not None and result["km_per_kwh"] is not None:
+                computed[keys[index]] = result
+
+    if store is not None:
+        try:
+            store.put_many("api_drive_profile", computed)
+        except sqlite3.Error:
+            pass
+    return results
+
+
+def evaluate_pack_sizing(items):
+    values = parameter_arrays(items, PACK_SIZING_DEFAULTS)
+    pack = size_battery_pack(**values)
+    return [{name: float(column[index]) for name, column in pack.items()} for index in range(len(items))]
+
+
+def validate_drive_profile_request(item):
+    get_drive_cycle(item.get("profile") or list_drive_profiles()[0])
+
+
+class Batcher:
+    """
+    Coalesces the requests of concurrent handler threads into one evaluation.
+
+    The first request of a batch waits at most `max_wait_s` for others to arrive, and a batch holds at most
+    `max_batch` items. `evaluate` takes a list of parameter dicts and returns a list of result dicts. When the
+    evaluation of a batch fails, its requests are evaluated one by one, so only the failing requests fail.
+    """
+
+    def __init__(self, evaluate, max_batch=4096, max_wait_s=0.002):
+        self._evaluate = evaluate
+        self._max_batch = max_batch
+        self._max_wait_s = max_wait_s
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, items):
+        future = Future()
+        self._queue.put((items, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self._max_wait_s
+            while size < self._max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+                size += len(batch[-1][0])
+
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = self._evaluate(items)
+            except Exception as error:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(error)
+                else:
+                    for request_items, future in batch:
+                        self._evaluate_request(request_items, future)
+                continue
+            start = 0
+            for request_items, future in batch:
+                future.set_result(results[start:start + len(request_items)])
+                start += len(request_items)
+
+    def _evaluate_request(self, items, future):
+        try:
+            future.set_result(self._evaluate(items))
+        except Exception as error:
+            future.set_exception(error)
+
+
+class CalculationHandler(BaseHTTPRequestHandler):
+    batchers = {}
+    validators = {}
+
+    def do_GET(self):
+        if self.path == "/profiles":
+            self._send(200, list_drive_profiles())
+        elif self.path == "/health":
+            self._send(200, {"status": "ok", "pid": os.getpid()})
+        else:
+            self._send(404, {"error": f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        batcher = self.batchers.get(self.path)
+        if batcher is None:
+            self._send(404, {"error": f"Unknown path '{self.path}'."})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            items = body if isinstance(body, list) else [body]
+            if not all(isinstance(item, dict) for item in items):
+                raise ValueError("Expected a JSON object or a list of objects.")
+            validate = self.validators.get(self.path)
+            for item in items:
+                if validate is not None:
+                    validate(item)
+                for name, value in item.items():
+                    if name != "profile" and not math.isfinite(float(value)):
+                        raise ValueError(f"Parameter '{name}' must be a finite number.")
+        except (ValueError, TypeError) as error:
+            self._send(400, {"error": str(error)})
+            return
+
+        try:
+            results = batcher.submit(items) if items else []
+        except Exception as error:
+            self._send(500, {"error": str(error)})
+            return
+        self._send(200, results if isinstance(body, list) else results[0])
+
+    def _send(self, status, payload):
+        # NaN and Infinity are not valid JSON
+        try:
+            data = json.dumps(payload, allow_nan=False).encode()
+        except ValueError:
+            status = 500
+            data = json.dumps({"error": "The calculation did not return a finite number."}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(listening_socket):
+    """Serve requests from an already listening socket in this process."""
+    CalculationHandler.batchers = {
+        "/scenario": Batcher(evaluate_scenarios),
+        "/drive-profile": Batcher(evaluate_drive_profiles),
+        "/pack-sizing": Batcher(evaluate_pack_sizing),
+    }
+    CalculationHandler.validators = {"/drive-profile": validate_drive_profile_request}
+
+    # Warm up the drive profiles of this worker
+    for profile in list_drive_profiles():
+        get_drive_cycle(profile)
+
+    server = ThreadingHTTPServer(listening_socket.getsockname()[:2], CalculationHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listening_socket
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP API for the EV system design calculations.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (forked, Unix only)")
+    args = parser.parse_args()
+
+    listening_socket = socket.create_server((args.host, args.port), backlog=1024)
+    print(f"Serving the calculation API on http://{args.host}:{args.port} with {args.workers} worker(s)")
+
+    # Worker processes share the listening socket, the kernel spreads the connections over them
+    children = []
+    for _ in range(max(args.workers, 1) - 1):
+        pid = os.fork()
+        if pid == 0:
+            serve(listening_socket)
+            os._exit(0)
+        children.append(pid)
+
+    try:
+        serve(listening_socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, 15)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
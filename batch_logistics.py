@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# Columns of an area table, with the logistics input they correspond to
+AREA_COLUMNS = {
+    "population": "Area population size",
+    "packages_per_person_per_day": "Packages delivered per person per day",
+    "restaurant_crates_per_person_per_day": "Restaurant crates delivered per person per day",
+    "shift_length": "Shift length per day in hours",
+    "amount_of_shifts": "Amount of shifts per day",
+}
+
+
+def calculate_logistics(population, packages_per_person_per_day, restaurant_crates_per_person_per_day,
+                        packages_per_hour, shift_length, amount_of_shifts, selected_amount_of_packages_per_van=80,
+                        package_size=0.027, package_volume_safety_factor=1.2, crate_depth=0.4, crate_width=0.6,
+                        crate_height=0.3, internal_crate_volume=0.045, van_height=1.5):
+    """
+    The calculations of the Logistics tab for any number of areas at once.
+
+    Every argument may be a scalar or an array with one value per area. Areas that deliver nothing (zero
+    throughput or zero hours) need zero vans instead of raising a division error.
+    """
+    population = np.asarray(population, dtype=float)
+    shift_length = np.asarray(shift_length, dtype=float)
+    amount_of_shifts = np.asarray(amount_of_shifts, dtype=float)
+
+    packages_per_day_in_area = population * packages_per_person_per_day
+    total_working_hours_per_day = shift_length * amount_of_shifts
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        package_throughput = packages_per_hour * total_working_hours_per_day
+        minimum_vans_needed = np.where(package_throughput > 0,
+                                       np.ceil(packages_per_day_in_area / package_throughput), 0)
+        theoretical_amount_of_vans = minimum_vans_needed * amount_of_shifts
+        packages_per_van = np.where(theoretical_amount_of_vans > 0,
+                                    np.ceil(packages_per_day_in_area / theoretical_amount_of_vans), 0)
+
+        # Crate layout of the van
+        total_package_volume = selected_amount_of_packages_per_van * package_size * package_volume_safety_factor
+        amount_of_crates = np.ceil(total_package_volume / internal_crate_volume)
+        amount_of_crates_vertically = np.floor(np.divide(van_height, crate_height))
+        amount_of_crates_lengthwise = np.where(amount_of_crates_vertically > 0,
+                                               np.ceil(amount_of_crates / amount_of_crates_vertically / 2), 0)
+        van_length = amount_of_crates_lengthwise * crate_depth
+        actual_amount_of_crates = amount_of_crates_lengthwise * amount_of_crates_vertically * 2
+
+        # Restaurants
+        restaurant_crates_per_day_in_area = population * restaurant_crates_per_person_per_day
+        amount_of_crates_per_van_per_day = actual_amount_of_crates * amount_of_shifts
+        minimum_vans_needed_restaurant = np.where(amount_of_crates_per_van_per_day > 0, np.ceil(
+            restaurant_crates_per_day_in_area / amount_of_crates_per_van_per_day), 0)
+
+    return {
+        "packages_per_day_in_area": packages_per_day_in_area,
+        "total_working_hours_per_day": total_working_hours_per_day,
+        "minimum_vans_needed": minimum_vans_needed.astype(int),
+        "packages_per_van": packages_per_van.astype(int),
+        "amount_of_crates": np.broadcast_to(amount_of_crates, population.shape).astype(int),
+        "van_width": np.broadcast_to(2 * np.asarray(crate_width, dtype=float), population.shape),
+        "van_length": np.broadcast_to(van_length, population.shape),
+        "actual_amount_of_crates": np.broadcast_to(actual_amount_of_crates, population.shape).astype(int),
+        "restaurant_crates_per_day_in_area": restaurant_crates_per_day_in_area,
+        "minimum_vans_needed_restaurant": minimum_vans_needed_restaurant.astype(int),
+        "total_vans_needed": (minimum_vans_needed + minimum_vans_needed_restaurant).astype(int),
+    }
+
+
+def calculate_area_table(areas, **defaults):
+    """
+    Run the logistics calculations for every row of an area table.
+
+    Columns of `AREA_COLUMNS` that are missing from the table are filled in with the keyword defaults, as are
+    all van and crate inputs. The results are appended to a copy of the table.
+    """
+    inputs = dict(defaults)
+    for column in AREA_COLUMNS:
+        if column in areas:
+            inputs[column] = pd.to_numeric(areas[column], errors='coerce').fillna(0).to_numpy()
+    if "population" not in areas:
+        raise ValueError("The area table needs a 'population' column.")
+
+    results = calculate_logistics(**inputs)
+    table = areas.copy()
+    for name, values in results.items():
+        table[name] = values
+    return table
+
+
+def aggregate_logistics(table):
+    """
+    Totals over all areas in the form the Financials tab expects.
+
+    The working hours per day are averaged over the vans, so vans times hours equals the total driver hours.
+    """
+    total_vans_needed = int(table["total_vans_needed"].sum())
+    driver_hours = np.sum(table["total_vans_needed"] * table["total_working_hours_per_day"])
+    return {
+        "total_vans_needed": total_vans_needed,
+        "packages_per_day_in_area": float(table["packages_per_day_in_area"].sum()),
+        "restaurant_crates_per_day_in_area": float(table["restaurant_crates_per_day_in_area"].sum()),
+        "total_working_hours_per_day": float(driver_hours / total_vans_needed) if total_vans_needed > 0 else 0.0,
+    }
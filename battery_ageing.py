@@ -0,0 +1,83 @@
+import numpy as np
+
+# Capacity fade at which the cycle life of a cell is rated
+RATED_FADE = 0.2
+
+# Passes of the fixed-point iteration between the capacity fade and the depth of discharge
+FADE_PASSES = 4
+
+# Years of 12 months of 30 days, as the monthly cash flow
+DAYS_PER_YEAR = 360
+
+
+def simulate_battery_ageing(number_of_vans, days, capacity_kwh, energy_per_shift_kwh, amount_of_shifts,
+                            required_range_km, wh_per_km, battery_efficiency=0.95, cycle_life=3000,
+                            dod_exponent=1.5, calendar_fade_per_year=0.02, end_of_life_state_of_health=0.7,
+                            daily_variation=0.15, seed=0, dtype=np.float32):
+    """
+    Cycle and calendar ageing of the battery packs of a fleet, with a replacement when the range of a pack drops
+    below the required range or its state of health below the end of life.
+
+    Every van drives all shifts of a day and is recharged after each shift, so every shift is one cycle with the
+    depth of discharge of its energy. The energy per shift varies per van and day around the mean. Per cycle a
+    pack loses RATED_FADE / cycle_life * DoD^dod_exponent of its capacity, and the calendar fade grows with the
+    square root of the age of the pack in years of DAYS_PER_YEAR days. The depth of discharge grows as the pack
+    fades, which is solved by a short fixed-point iteration, so every van and every day are evaluated as arrays and
+    the only loop is over the successive packs of the vans. The vans x days arrays are single precision by default,
+    which halves the time.
+    """
+    # State of health below which a pack no longer covers the required range or has reached its end of life
+    minimum_state_of_health = max(required_range_km * wh_per_km / 1000 / (battery_efficiency * capacity_kwh),
+                                  end_of_life_state_of_health)
+    if minimum_state_of_health >= 1:
+        raise ValueError("A new battery pack does not cover the required range.")
+
+    # Lognormal energy per shift with the mean of the drive profile
+    rng = np.random.default_rng(seed)
+    sigma = np.sqrt(np.log1p(daily_variation ** 2))
+    energy_kwh = (energy_per_shift_kwh * rng.lognormal(-0.5 * sigma ** 2, sigma, size=(number_of_vans, days))).astype(
+        dtype)
+    fade_per_cycle = RATED_FADE / cycle_life
+
+    day = np.arange(days)
+    state_of_health = np.ones((number_of_vans, days), dtype=dtype)
+    replaced = np.zeros((number_of_vans, days), dtype=bool)
+    pack_start = np.zeros(number_of_vans, dtype=int)
+    rows = np.arange(number_of_vans)
+
+    # One pass per generation of packs, over the vans whose previous pack was replaced within the horizon and the
+    # days from the earliest start of their new packs
+    while len(rows):
+        first_day = pack_start[rows].min()
+        age = day[first_day:] - pack_start[rows, np.newaxis]
+        in_service = age >= 0
+        calendar_fade = (calendar_fade_per_year * np.sqrt(np.maximum(age + 1, 0) / DAYS_PER_YEAR)).astype(dtype)
+        pack_energy = battery_efficiency * capacity_kwh
+        health = 1 - calendar_fade
+        for _ in range(FADE_PASSES):
+            depth_of_discharge = np.minimum(energy_kwh[rows, first_day:] / (pack_energy * health), 1)
+            cycle_fade = depth_of_discharge ** dtype(dod_exponent)
+            cycle_fade *= dtype(amount_of_shifts * fade_per_cycle)
+            cycle_fade[~in_service] = 0
+            health = 1 - calendar_fade - np.cumsum(cycle_fade, axis=1)
+
+        window = state_of_health[rows, first_day:]
+        state_of_health[rows, first_day:] = np.where(in_service, health, window)
+        below = in_service & (health < minimum_state_of_health)
+        worn_out = below.any(axis=1)
+        replacement_day = first_day + below.argmax(axis=1)
+        replaced[rows[worn_out], replacement_day[worn_out]] = True
+
+        # The new pack is in service from the next day
+        pack_start[rows] = replacement_day + 1
+        rows = rows[worn_out & (replacement_day + 1 < days)]
+
+    replacements = replaced.sum(axis=1)
+    first_replacement_day = np.where(replacements > 0, replaced.argmax(axis=1), -1)
+    return {
+        "state_of_health": state_of_health,
+        "minimum_state_of_health": float(minimum_state_of_health),
+        "replacements_per_day": replaced.sum(axis=0),
+        "replacements_per_van": replacements,
+        "first_replacement_day": first_replacement_day,
+    }
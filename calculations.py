@@ -86,5 +86,47 @@ def calculate_peak_power(f_tr, terminal_velocity, k1, k2, tf):
 def calculate_mean_power(f_tr, terminal_velocity, k1, k2, tf):
     sqrt_k1_k2 = np.sqrt(k1 * k2)
     pt = f_tr * terminal_velocity
-    ln_cosh = np.log(np.cosh(sqrt_k1_k2 * tf))
+    # log(cosh(x)) = logaddexp(x, -x) - log(2), which does not overflow for large x
+    x = sqrt_k1_k2 * tf
+    ln_cosh = np.logaddexp(x, -x) - math.log(2)
     return (pt / (tf * sqrt_k1_k2)) * ln_cosh
+
+
+def calculate_scenario_power_and_torque(mass, frontal_area, wheel_radius, C0, C1, km, speed_kph, grade_percent,
+                                        acceleration, headwind_kph):
+    # Same chain as the Scenarios tab, for scalars or arrays of scenarios
+    speed_mps = np.asarray(speed_kph, dtype=float) / 3.6
+    relative_speed = speed_mps + np.asarray(headwind_kph, dtype=float) / 3.6
+    angle_rad = np.arctan(np.asarray(grade_percent, dtype=float) / 100)
+    acceleration = np.asarray(acceleration, dtype=float)
+
+    rolling_force = np.copysign(mass * GRAVITY * np.cos(angle_rad) * (C0 + C1 * speed_mps ** 2), speed_mps)
+    gravitational_force = mass * GRAVITY * np.sin(angle_rad)
+    drag_force = np.copysign(0.5 * AIR_DENSITY * C_DRAG * frontal_area * relative_speed ** 2, relative_speed)
+    traction_force = rolling_force + gravitational_force + drag_force + km * mass * acceleration
+
+    power_required = traction_force * speed_mps
+    angular_velocity = speed_mps / wheel_radius
+    with np.errstate(divide='ignore', invalid='ignore'):
+        torque_required = np.where(angular_velocity == 0, 0.0, power_required / angular_velocity)
+    return power_required, torque_required
+
+
+def calculate_acceleration_design_space(tractive_force, mass, frontal_area, C0, C1, tf):
+    """
+    Terminal velocity, time to 98 % of it, peak and mean tractive power of the analytic acceleration model.
+
+    All inputs broadcast against each other, so a 2-D grid of any two of them is evaluated in one pass. Designs
+    whose tractive force does not overcome the static rolling resistance (k1 <= 0) are NaN.
+    """
+    k1 = calculate_k1(tractive_force, mass, GRAVITY, C0)
+    k2 = calculate_k2(AIR_DENSITY, C_DRAG, frontal_area, mass, GRAVITY, C1)
+    k1 = np.where(k1 > 0, k1, np.nan)
+
+    terminal_velocity = calculate_terminal_velocity(k1, k2)
+    return {
+        "terminal_velocity": terminal_velocity,
+        "time_to_terminal_velocity": calculate_time_to_terminal_velocity(k1, k2, terminal_velocity),
+        "peak_power": calculate_peak_power(tractive_force, terminal_velocity, k1, k2, tf),
+        "mean_power": calculate_mean_power(tractive_force, terminal_velocity, k1, k2, tf),
+    }
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Bracket of the annual internal rate of return: -90 % to +1000 % per year
+IRR_BRACKET = (-0.9, 10.0)
+IRR_TOLERANCE = 1e-10
+IRR_MAX_ITERATIONS = 100
+
+
+def calculate_cash_flows(months, total_investment, revenue_per_month, monthly_cost, cost_inflation=0.0,
+                         revenue_inflation=0.0, financed_share=0.0, loan_rate=0.0, loan_years=0.0,
+                         number_of_vans=0.0, cost_per_van=0.0, vehicle_life_years=0.0, extra_costs=None):
+    """
+    Monthly net cash flow of any number of financial scenarios, as a scenarios x (months + 1) matrix with the
+    investment in month 0.
+
+    All parameters are scalars or arrays with one value per scenario. Revenue and costs grow with their annual
+    inflation. The financed share of the investment is paid back as a monthly annuity at the annual loan rate.
+    The vans are bought again at inflated prices at the end of every vehicle life (0: never). `extra_costs` are
+    added to the costs of every month, for example battery replacements, as a months or scenarios x months array.
+    """
+    parameters = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+        total_investment, revenue_per_month, monthly_cost, cost_inflation, revenue_inflation, financed_share,
+        loan_rate, loan_years, number_of_vans, cost_per_van, vehicle_life_years)))
+    (total_investment, revenue_per_month, monthly_cost, cost_inflation, revenue_inflation, financed_share,
+     loan_rate, loan_years, number_of_vans, cost_per_van, vehicle_life_years) = parameters
+    month = np.arange(1, months + 1)
+
+    # Price level of every month relative to month 1
+    elapsed_years = (month - 1) / 12
+    cost_level = np.exp(np.log1p(cost_inflation)[:, np.newaxis] * elapsed_years)
+    revenue_level = np.exp(np.log1p(revenue_inflation)[:, np.newaxis] * elapsed_years)
+
+    flows = np.empty((len(total_investment), months + 1))
+    flows[:, 0] = -total_investment * (1 - financed_share)
+    operating = flows[:, 1:]
+    np.multiply(revenue_per_month[:, np.newaxis], revenue_level, out=operating)
+    operating -= monthly_cost[:, np.newaxis] * cost_level
+
+    # Annuity of the loan: P r / (1 - (1 + r)^-n) per month, or P / n without interest
+    principal = total_investment * financed_share
+    loan_months = np.round(loan_years * 12)
+    monthly_rate = loan_rate / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = np.where(monthly_rate > 0,
+                           principal * monthly_rate / -np.expm1(-loan_months * np.log1p(monthly_rate)),
+                           principal / loan_months)
+    payment = np.where(loan_months > 0, payment, 0)
+    operating -= np.where(month <= loan_months[:, np.newaxis], payment[:, np.newaxis], 0)
+
+    # Fleet replacement at the end of every vehicle life
+    life_months = np.round(vehicle_life_years * 12)
+    replaced = (life_months[:, np.newaxis] > 0) & (month % np.maximum(life_months, 1)[:, np.newaxis] == 0)
+    operating -= np.where(replaced, (number_of_vans * cost_per_van)[:, np.newaxis] * cost_level, 0)
+
+    if extra_costs is not None:
+        operating -= np.broadcast_to(extra_costs, operating.shape)
+    return flows
+
+
+def first_crossing(cumulative):
+    """Month, interpolated within the month, at which every row of cumulative cash flow first reaches zero."""
+    reached = cumulative >= 0
+    month = reached.argmax(axis=1)
+    rows = np.arange(len(cumulative))
+    previous = cumulative[rows, np.maximum(month - 1, 0)]
+    step = cumulative[rows, month] - previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where((month > 0) & (step > 0), -previous / step, 1)
+    return np.where(reached.any(axis=1), np.where(month > 0, month - 1 + fraction, 0), np.nan)
+
+
+def internal_rate_of_return(flows):
+    """
+    Annual internal rate of return of every row of monthly cash flows, NaN where the present value does not change
+    sign within `IRR_BRACKET`.
+
+    Newton steps on the monthly rate for all scenarios at once, kept inside a bracket that shrinks with every
+    evaluation and replaced by bisection where they would leave it.
+    """
+    month = np.arange(flows.shape[1])
+
+    def present_value(rows, rate):
+        discounted = flows[rows] * np.exp(-np.log1p(rate)[:, np.newaxis] * month)
+        return discounted.sum(axis=1), -(discounted @ month) / (1 + rate)
+
+    rows = np.arange(len(flows))
+    low = np.full(len(flows), (1 + IRR_BRACKET[0]) ** (1 / 12) - 1)
+    high = np.full(len(flows), (1 + IRR_BRACKET[1]) ** (1 / 12) - 1)
+    low_value = present_value(rows, low)[0]
+    high_value = present_value(rows, high)[0]
+    valid = np.sign(low_value) * np.sign(high_value) < 0
+    # Orient every bracket so that the present value is positive at `low`
+    swap = low_value < 0
+    low[swap], high[swap] = high[swap], low[swap]
+
+    # Only the scenarios that have not converged yet are evaluated again
+    rate = (low + high) / 2
+    rows = rows[valid]
+    for _ in range(IRR_MAX_ITERATIONS):
+        if not len(rows):
+            break
+        value, derivative = present_value(rows, rate[rows])
+        positive = value > 0
+        low[rows] = np.where(positive, rate[rows], low[rows])
+        high[rows] = np.where(positive, high[rows], rate[rows])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = rate[rows] - value / derivative
+        inside = np.isfinite(newton) & ((newton - low[rows]) * (newton - high[rows]) < 0)
+        next_rate = np.where(inside, newton, (low[rows] + high[rows]) / 2)
+        converged = ((np.abs(next_rate - rate[rows]) < IRR_TOLERANCE) | (value == 0) |
+                     (np.abs(high[rows] - low[rows]) < IRR_TOLERANCE))
+        rate[rows] = next_rate
+        rows = rows[~converged]
+    return np.where(valid, np.expm1(12 * np.log1p(rate)), np.nan)
+
+
+def cash_flow_metrics(flows, discount_rate, irr=True):
+    """
+    Net present value, internal rate of return, payback and discounted payback (months, NaN when not reached
+    within the horizon) of every row of monthly cash flows, at an annual discount rate per scenario. The internal
+    rate of return is the only iterative metric and is skipped (NaN) with `irr` False.
+    """
+    month = np.arange(flows.shape[1])
+    discount_rate = np.atleast_1d(np.asarray(discount_rate, dtype=float))
+    scenarios = np.broadcast_shapes((len(flows),), discount_rate.shape)
+    flows = np.broadcast_to(flows, scenarios + flows.shape[1:])
+    discount_rate = np.broadcast_to(discount_rate, scenarios)
+    discounted = flows * np.exp(-np.log1p(discount_rate)[:, np.newaxis] * month / 12)
+    cumulative = np.cumsum(flows, axis=1)
+    cumulative_discounted = np.cumsum(discounted, axis=1)
+    return {
+        "npv": cumulative_discounted[:, -1],
+        "irr": internal_rate_of_return(flows) if irr else np.full(len(flows), np.nan),
+        "payback_months": first_crossing(cumulative),
+        "discounted_payback_months": first_crossing(cumulative_discounted),
+        "cumulative_cash_flow": cumulative,
+        "cumulative_discounted_cash_flow": cumulative_discounted,
+    }
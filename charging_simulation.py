@@ -0,0 +1,166 @@
+import heapq
+from collections import deque
+import numpy as np
+
+# Event types, ordered so that departures at a shift start are handled before arrivals at the same time. A van
+# that is not back before its next shift starts misses its charge; its return is handled before that departure.
+MISSED_CHARGE = -1
+DEPART = 0
+CHARGE_DONE = 1
+ARRIVE = 2
+
+
+def time_of_use_prices(peak_price, off_peak_price, off_peak_start_hour, off_peak_end_hour):
+    """Hourly energy prices for one day, with an off-peak window that may wrap around midnight."""
+    hours = np.arange(24)
+    if off_peak_start_hour <= off_peak_end_hour:
+        off_peak = (hours >= off_peak_start_hour) & (hours < off_peak_end_hour)
+    else:
+        off_peak = (hours >= off_peak_start_hour) | (hours < off_peak_end_hour)
+    return np.where(off_peak, off_peak_price, peak_price)
+
+
+def shift_schedule(shift_length_h, amount_of_shifts, first_shift_start_h, shift_gap_h, days):
+    """Start and end times (hours since the start of the simulation) of every shift."""
+    day_offsets = np.arange(days)[:, np.newaxis] * 24
+    shift_starts = first_shift_start_h + np.arange(amount_of_shifts) * (shift_length_h + shift_gap_h)
+    starts = (day_offsets + shift_starts).ravel()
+    return starts, starts + shift_length_h
+
+
+def simulate_depot_charging(number_of_vans, number_of_chargers, charger_power_kw, battery_capacity_kwh,
+                            energy_per_shift_kwh, shift_length_h, amount_of_shifts, first_shift_start_h=6.0,
+                            shift_gap_h=0.5, days=30, hourly_prices=None, charging_efficiency=0.92,
+                            arrival_spread_h=0.25, overnight_charging_start_h=None, seed=0):
+    """
+    Event-driven simulation of a depot where vans share a limited number of chargers between shifts.
+
+    Every van drives all shifts of the day and returns to the depot after each shift with an energy deficit.
+    Waiting vans are plugged in first come, first served and unplugged again when their next shift starts,
+    charged or not. A van that is not back before its next shift starts leaves again without charging. Grid load is
+    recorded at minute resolution and priced with the hourly prices.
+    """
+    if amount_of_shifts * (shift_length_h + shift_gap_h) > 24:
+        raise ValueError("The shifts and the gaps between them do not fit in one day.")
+    if hourly_prices is None:
+        hourly_prices = np.full(24, 0.35)
+    rng = np.random.default_rng(seed)
+    shift_starts, shift_ends = shift_schedule(shift_length_h, amount_of_shifts, first_shift_start_h, shift_gap_h,
+                                              days)
+    horizon_h = days * 24
+    charging_rate_kw = charger_power_kw * charging_efficiency
+
+    # --- Event Queue ---
+    events = []
+    sequence = 0
+    arrival_offsets = rng.uniform(0, arrival_spread_h, size=number_of_vans).tolist()
+    shift_starts = shift_starts.tolist()
+    shift_ends = shift_ends.tolist()
+    for shift_index, (start, end) in enumerate(zip(shift_starts, shift_ends)):
+        next_start = shift_starts[shift_index + 1] if shift_index + 1 < len(shift_starts) else horizon_h
+        overnight = shift_index % amount_of_shifts == amount_of_shifts - 1
+        for van in range(number_of_vans):
+            arrival = end + arrival_offsets[van]
+            if overnight and overnight_charging_start_h is not None:
+                # Overnight charging is postponed to the start of the cheaper night window
+                day_start = (shift_index // amount_of_shifts) * 24
+                delayed = day_start + overnight_charging_start_h
+                arrival = max(arrival, delayed if delayed >= end else delayed + 24)
+            events.append((start, DEPART, sequence, van, 0))
+            if arrival < next_start:
+                events.append((arrival, ARRIVE, sequence + 1, van, 0))
+            else:
+                events.append((next_start, MISSED_CHARGE, sequence + 1, van, 0))
+            sequence += 2
+    heapq.heapify(events)
+
+    # Per-van state is kept in plain lists, which are much faster to index one element at a time
+    deficit_kwh = [0.0] * number_of_vans
+    charging_since = [None] * number_of_vans
+    charge_token = [0] * number_of_vans
+    waiting = deque()
+    is_waiting = [False] * number_of_vans
+    free_chargers = number_of_chargers
+    sessions_start = []
+    sessions_end = []
+    waiting_time_h = 0.0
+    waiting_since = [0.0] * number_of_vans
+    undercharged_departures = 0
+    shortfall_kwh = 0.0
+
+    def start_charging(van, now):
+        nonlocal free_chargers, sequence
+        free_chargers -= 1
+        charging_since[van] = now
+        charge_token[van] += 1
+        done = now + deficit_kwh[van] / charging_rate_kw
+        heapq.heappush(events, (done, CHARGE_DONE, sequence, van, charge_token[van]))
+        sequence += 1
+
+    def stop_charging(van, now):
+        nonlocal free_chargers, waiting_time_h
+        started = charging_since[van]
+        deficit_kwh[van] = max(deficit_kwh[van] - (now - started) * charging_rate_kw, 0)
+        charging_since[van] = None
+        sessions_start.append(started)
+        sessions_end.append(now)
+        free_chargers += 1
+        while waiting and free_chargers > 0:
+            next_van = waiting.popleft()
+            if is_waiting[next_van]:
+                is_waiting[next_van] = False
+                waiting_time_h += now - waiting_since[next_van]
+                start_charging(next_van, now)
+
+    while events:
+        now, kind, _, van, token = heapq.heappop(events)
+        if kind == ARRIVE or kind == MISSED_CHARGE:
+            deficit_kwh[van] += energy_per_shift_kwh
+            if deficit_kwh[van] > battery_capacity_kwh:
+                shortfall_kwh += deficit_kwh[van] - battery_capacity_kwh
+                deficit_kwh[van] = battery_capacity_kwh
+            if kind == MISSED_CHARGE:
+                continue
+            if free_chargers > 0:
+                start_charging(van, now)
+            else:
+                is_waiting[van] = True
+                waiting_since[van] = now
+                waiting.append(van)
+        elif kind == CHARGE_DONE:
+            if token == charge_token[van] and charging_since[van] is not None:
+                stop_charging(van, now)
+        else:
+            if charging_since[van] is not None:
+                stop_charging(van, now)
+            elif is_waiting[van]:
+                is_waiting[van] = False
+                waiting_time_h += now - waiting_since[van]
+            if deficit_kwh[van] > 1e-9:
+                undercharged_departures += 1
+
+    # --- Grid Load ---
+    minutes = int(horizon_h * 60)
+    sessions_start = np.asarray(sessions_start)
+    sessions_end = np.minimum(np.asarray(sessions_end), horizon_h)
+    load_delta = np.zeros(minutes + 1)
+    np.add.at(load_delta, np.minimum((sessions_start * 60).astype(int), minutes), charger_power_kw)
+    np.add.at(load_delta, np.minimum((sessions_end * 60).astype(int), minutes), -charger_power_kw)
+    grid_load_kw = np.cumsum(load_delta)[:minutes]
+
+    minute_prices = np.repeat(np.tile(hourly_prices, days), 60)[:minutes]
+    grid_energy_kwh = grid_load_kw.sum() / 60
+    energy_cost = np.sum(grid_load_kw * minute_prices) / 60
+    charging_hours = np.sum(sessions_end - sessions_start)
+
+    return {
+        "grid_load_kw": grid_load_kw,
+        "peak_grid_load_kw": grid_load_kw.max() if minutes else 0.0,
+        "charger_utilisation": charging_hours / (number_of_chargers * horizon_h),
+        "grid_energy_kwh": grid_energy_kwh,
+        "energy_cost": energy_cost,
+        "charging_sessions": len(sessions_start),
+        "average_waiting_time_h": waiting_time_h / max(len(sessions_start), 1),
+        "undercharged_departures": undercharged_departures,
+        "energy_shortfall_kwh": shortfall_kwh,
+    }
@@ -23,6 +23,10 @@ def about():
         - **Logistics**: Calculate the amount of vehicles needed for the chosen area and the size of the loading area.
         - **Financials**: Calculate the economic feasibility of the delivery system, including investment, ongoing 
         costs, and break-even analysis.
+        - **Sensitivity**: Find out which inputs of the whole design chain drive the pack size and the break-even 
+        point.
+        - **Design Limits**: Find the maximum vehicle mass for a range, the minimum pack for a range and payload, and 
+        the road load that still reaches the top speed.
         
         ### Disclaimer
         This tool is created for the course "Electric Vehicle System Design" at the University of Twente. Feel free to
@@ -1,6 +1,11 @@
 import streamlit as st
 import math
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
 import config
+from pack_simulation import simulate_pack, pack_layout_grid
+from shared_results import design_inputs, page_inputs, store_page_inputs, drive_energy
 
 
 def battery():
@@ -10,25 +15,28 @@ def battery():
              "is determined based on the motor voltage and cell specifications.")
     st.markdown("---")
 
-    if "wh_per_km" not in st.session_state:
-        st.session_state["wh_per_km"] = 1
+    # Consumption of the Drive Profile tab for the current vehicle, 1 Wh/km before it has been opened
+    energy = drive_energy()
+    wh_per_km = energy["wh_per_km"] if energy is not None else 1
+    # The inputs of the last visit, so the tab shows the pack the other tabs use
+    inputs = design_inputs()
 
     # Step 1: Display energy consumption per kilometer
     st.subheader("1: Energy Consumption")
-    energy_consumption_per_km = st.session_state["wh_per_km"] / 1000  # Convert Wh/km to kWh/km
-    st.write(f"**Energy Consumption per Kilometer:** {st.session_state["wh_per_km"]:.0f} Wh/km")
+    energy_consumption_per_km = wh_per_km / 1000  # Convert Wh/km to kWh/km
+    st.write(f"**Energy Consumption per Kilometer:** {wh_per_km:.0f} Wh/km")
 
     # Step 2: Input total distance
     st.subheader("2: Total Distance")
-    total_distance_km = st.number_input("Enter the total distance (km):", min_value=10, max_value=1000, value=300,
-                                        step=10)
+    total_distance_km = st.number_input("Enter the total distance (km):", min_value=10, max_value=1000,
+                                        value=int(inputs["total_distance_km"]), step=10)
     total_energy_required_kwh = total_distance_km * energy_consumption_per_km
     st.write(f"**Total Energy Required:** {total_energy_required_kwh:.2f} kWh")
 
     # Step 3: Input battery efficiency
     st.subheader("3: Battery Efficiency")
-    battery_efficiency = st.number_input("Enter battery efficiency (%):", min_value=50, max_value=100, value=95,
-                                         step=1) / 100
+    battery_efficiency = st.number_input("Enter battery efficiency (%):", min_value=50, max_value=100,
+                                         value=int(round(inputs["battery_efficiency"] * 100)), step=1) / 100
     usable_capacity_kwh = total_energy_required_kwh / battery_efficiency
     st.write(f"**Usable Capacity:** {usable_capacity_kwh:.2f} kWh")
 
@@ -42,8 +50,8 @@ def battery():
 
     # Step 5: Auxiliary load estimate
     st.subheader("5: Auxiliary Load Estimate")
-    auxiliary_load_factor = st.number_input("Auxiliary Load Factor (% increase):", min_value=0, max_value=50, value=10,
-                                            step=1) / 100
+    auxiliary_load_factor = st.number_input("Auxiliary Load Factor (% increase):", min_value=0, max_value=50,
+                                            value=int(round(inputs["auxiliary_load_factor"] * 100)), step=1) / 100
     total_capacity_kwh = usable_capacity_kwh * (1 + auxiliary_load_factor)
 
     # Step 6: Summary
@@ -65,11 +73,13 @@ def battery():
 
     # Inputs for motor voltage and cell specifications
     st.subheader("1: Motor Voltage and Cell Specifications")
-    motor_voltage = st.number_input("Desired Nominal Voltage (V):", min_value=100, max_value=1000, value=360, step=10)
-    nominal_cell_voltage = st.number_input("Nominal Voltage per Cell (V):", value=3.2, step=0.1)
+    motor_voltage = st.number_input("Desired Nominal Voltage (V):", min_value=100, max_value=1000,
+                                    value=int(inputs["motor_voltage"]), step=10)
+    nominal_cell_voltage = st.number_input("Nominal Voltage per Cell (V):", value=float(inputs["nominal_cell_voltage"]),
+                                           step=0.1)
     charged_cell_voltage = st.number_input("Fully Charged Voltage per Cell (V):", value=3.6, step=0.1)
     discharged_cell_voltage = st.number_input("Fully Discharged Voltage per Cell (V):", value=2.5, step=0.1)
-    cell_capacity_ah = st.number_input("Cell Capacity (Ah):", value=100, step=10)
+    cell_capacity_ah = st.number_input("Cell Capacity (Ah):", value=int(inputs["cell_capacity_ah"]), step=10)
 
     # Calculate number of cells in series
     st.subheader("2: Number of Cells in Series")
@@ -114,8 +124,8 @@ def battery():
 
     # Weight and volume calculations
     st.subheader("6: Weight and Volume")
-    specific_energy_wh_per_kg = st.number_input("Specific Energy (Wh/kg):", min_value=50, max_value=300, value=120,
-                                                step=10)
+    specific_energy_wh_per_kg = st.number_input("Specific Energy (Wh/kg):", min_value=50, max_value=300,
+                                                value=page_inputs()["specific_energy_wh_per_kg"], step=10)
     energy_density_wh_per_l = st.number_input("Energy Density (Wh/L):", min_value=100, max_value=500, value=235,
                                               step=10)
 
@@ -138,10 +148,128 @@ def battery():
     """
     st.markdown(summary_table)
 
-    st.session_state["final_capacity_kwh"] = final_capacity_kwh
+    # The other tabs size the pack from these inputs, see `shared_results.battery_pack`
+    store_page_inputs(specific_energy_wh_per_kg=specific_energy_wh_per_kg)
+    st.session_state.setdefault("design_inputs", {}).update({
+        "total_distance_km": total_distance_km,
+        "battery_efficiency": battery_efficiency,
+        "auxiliary_load_factor": auxiliary_load_factor,
+        "motor_voltage": motor_voltage,
+        "nominal_cell_voltage": nominal_cell_voltage,
+        "cell_capacity_ah": cell_capacity_ah,
+    })
 
-    if st.session_state["average_energy_efficiency"] is None:
-        st.session_state["average_energy_efficiency"] = 0
-
-    theoretical_range = final_capacity_kwh * st.session_state["average_energy_efficiency"]
+    average_energy_efficiency = energy["average_energy_efficiency"] if energy is not None else 0
+    theoretical_range = final_capacity_kwh * average_energy_efficiency
     st.success(f"**Theoretical Range:** {theoretical_range:.0f} km")
+
+    st.markdown("---")
+    st.title("Pack Simulation")
+    st.write("The pack is simulated over the drive profile to check the state of charge and the voltage sag of the "
+             "cells. The cycle is repeated until the total distance is covered. Candidate layouts around the chosen "
+             "configuration are evaluated at the same time.")
+    st.markdown("---")
+
+    if energy is None:
+        st.info("Select a drive profile in the Drive Profile tab to simulate the pack.")
+        return
+
+    cell_resistance_mohm = st.number_input("Internal Resistance per Cell (m\u03a9):", min_value=0.01, value=0.5,
+                                           step=0.05)
+    series_spread = st.number_input("Series Cells Spread (\u00b1):", min_value=0, max_value=100, value=10, step=1)
+    parallel_spread = st.number_input("Parallel Strings Spread (\u00b1):", min_value=0, max_value=20, value=2,
+                                      step=1)
+
+    # Repeat the drive cycle until the required distance is covered
+    cycle_distance_km = energy["cycle_distance_km"]
+    cycles = math.ceil(total_distance_km / cycle_distance_km) if cycle_distance_km > 0 else 1
+    tractive_power_w = np.tile(energy["tractive_power_w"], cycles)
+    time_interval_s = np.tile(energy["time_interval_s"], cycles)
+
+    # Auxiliary loads are modelled as a constant draw on top of the traction power
+    auxiliary_power_w = auxiliary_load_factor * max(np.sum(tractive_power_w * time_interval_s) /
+                                                    np.sum(time_interval_s), 0)
+    pack_power_w = np.where(tractive_power_w > 0, tractive_power_w / battery_efficiency,
+                            tractive_power_w * battery_efficiency) + auxiliary_power_w
+
+    series_options = np.arange(max(1, rounded_cells_in_series - series_spread),
+                               rounded_cells_in_series + series_spread + 1)
+    parallel_options = np.arange(max(1, rounded_parallel_strings - parallel_spread),
+                                 rounded_parallel_strings + parallel_spread + 1)
+    cells_in_series_grid, parallel_strings_grid = pack_layout_grid(series_options, parallel_options)
+
+    simulation = simulate_pack(pack_power_w, time_interval_s, cells_in_series_grid, parallel_strings_grid,
+                               cell_capacity_ah, nominal_cell_voltage, charged_cell_voltage, discharged_cell_voltage,
+                               cell_resistance_mohm / 1000, initial_soc=max_soc)
+
+    st.write(f"**Simulated Cycles:** {cycles} -> {np.sum(time_interval_s) / 3600:.2f} hours")
+
+    # --- Candidate Layouts ---
+    layouts_df = pd.DataFrame({
+        "Cells in Series": simulation["cells_in_series"],
+        "Parallel Strings": simulation["parallel_strings"],
+        "Total Cells": simulation["cells_in_series"] * simulation["parallel_strings"],
+        "Final SoC (%)": simulation["final_soc"] * 100,
+        "Min Cell Voltage (V)": simulation["minimum_cell_voltage"],
+        "Max Cell Voltage (V)": simulation["maximum_cell_voltage"],
+        "Peak Current (A)": simulation["peak_current_a"],
+        "Resistive Losses (kWh)": simulation["resistive_loss_kwh"],
+    })
+    feasible = ((simulation["minimum_soc"] >= min_soc) & ~simulation["below_discharged_voltage"] &
+                ~simulation["above_charged_voltage"] & ~simulation["power_limited"])
+    feasible_layouts_df = layouts_df[feasible].sort_values("Total Cells")
+
+    st.subheader("Feasible Layouts")
+    if feasible_layouts_df.empty:
+        st.warning("None of the candidate layouts stays within the SoC window and the cell voltage limits.")
+    else:
+        best_layout = feasible_layouts_df.iloc[0]
+        st.success(f"**Smallest Feasible Layout:** {best_layout['Cells in Series']:.0f}s"
+                   f"{best_layout['Parallel Strings']:.0f}p -> {best_layout['Total Cells']:.0f} cells")
+        st.dataframe(feasible_layouts_df.head(20), hide_index=True)
+
+    # --- Chosen Layout ---
+    # Only the chosen layout keeps its per-timestep traces
+    chosen_layout = simulate_pack(pack_power_w, time_interval_s, rounded_cells_in_series, rounded_parallel_strings,
+                                  cell_capacity_ah, nominal_cell_voltage, charged_cell_voltage,
+                                  discharged_cell_voltage, cell_resistance_mohm / 1000, initial_soc=max_soc,
+                                  traces=True)
+    time_s = np.cumsum(time_interval_s)
+
+    soc_fig = go.Figure()
+    soc_fig.add_trace(go.Scatter(
+        x=time_s, y=chosen_layout["soc"][0] * 100,
+        mode='lines', name='State of Charge (%)',
+        line=dict(color='green')
+    ))
+    soc_fig.update_layout(
+        title=f"State of Charge ({rounded_cells_in_series}s{rounded_parallel_strings}p)",
+        xaxis_title="Time (s)",
+        yaxis_title="State of Charge (%)",
+        template="plotly_white",
+    )
+
+    voltage_fig = go.Figure()
+    voltage_fig.add_trace(go.Scatter(
+        x=time_s, y=chosen_layout["terminal_voltage"][0],
+        mode='lines', name='Terminal Voltage (V)',
+        line=dict(color='blue')
+    ))
+    voltage_fig.add_trace(go.Scatter(
+        x=[0, time_s[-1]], y=[discharged_pack_voltage, discharged_pack_voltage],
+        mode='lines', name='Fully Discharged Voltage (V)',
+        line=dict(color='red', dash='dash')
+    ))
+    voltage_fig.update_layout(
+        title=f"Pack Voltage ({rounded_cells_in_series}s{rounded_parallel_strings}p)",
+        xaxis_title="Time (s)",
+        yaxis_title="Voltage (V)",
+        template="plotly_white",
+    )
+
+    st.subheader("Chosen Layout")
+    st.plotly_chart(soc_fig, use_container_width=True)
+    st.plotly_chart(voltage_fig, use_container_width=True)
+    st.write(f"**Final SoC:** {chosen_layout['final_soc'][0] * 100:.1f} %")
+    st.write(f"**Minimum Cell Voltage:** {chosen_layout['minimum_cell_voltage'][0]:.2f} V")
+    st.write(f"**Resistive Losses:** {chosen_layout['resistive_loss_kwh'][0]:.2f} kWh")
@@ -0,0 +1,160 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import config
+from design_chain import DESIGN_INPUT_DEFAULTS
+from design_limits import max_mass_for_range, min_pack_for_range, max_road_load_for_top_speed
+from shared_results import battery_pack, highest_power_and_torque
+
+
+def design_limits():
+    st.title("Design Limits")
+
+    st.write("The other tabs calculate the performance of a given design. The solvers below answer the inverse "
+             "questions: how heavy may the vehicle become, how small may the pack be and how much road load is "
+             "allowed before a requirement is no longer met. Every chart solves hundreds of targets at once.")
+
+    st.markdown("---")
+
+    if st.session_state.get("speed_mps") is None:
+        st.info("Select a drive profile in the Drive Profile tab to calculate the design limits.")
+        return
+
+    design_inputs = {**DESIGN_INPUT_DEFAULTS, **st.session_state.get("design_inputs", {})}
+    profile = (st.session_state["speed_mps"], st.session_state["acceleration"], st.session_state["time_interval_s"])
+    if st.session_state.get("motor_map") is not None:
+        st.info("The solvers below do not apply the selected motor efficiency map: they assume 100 % motor "
+                "efficiency, so their mass limits are higher and their packs smaller than with the map.")
+
+    max_mass_section(design_inputs, profile)
+    min_pack_section(design_inputs, profile)
+    top_speed_section()
+
+
+def max_mass_section(design_inputs, profile):
+    # --- Maximum Mass for a Range ---
+    st.header("Maximum Vehicle Mass for a Range")
+    capacity_kwh = battery_pack()["final_capacity_kwh"]
+    st.write(f"The pack of the Battery tab (**{capacity_kwh:.2f} kWh**) has to cover the target range over the "
+             f"selected drive profile.")
+    if not 0 < capacity_kwh < np.inf:
+        st.info("No battery pack can be sized for the consumption of this drive profile.")
+        return
+
+    target_range_km = st.number_input("Target Range (km):", min_value=10, max_value=1000,
+                                      value=int(design_inputs["total_distance_km"]), step=10)
+    ranges_km = np.unique(np.append(np.linspace(10, 1000, 400), target_range_km))
+    max_mass, iterations = max_mass_for_range(
+        ranges_km, capacity_kwh, design_inputs["battery_efficiency"], design_inputs["auxiliary_load_factor"],
+        *profile, config.frontal_area, config.C0, config.C1, design_inputs["regen_efficiency"])
+
+    target_mass = max_mass[np.searchsorted(ranges_km, target_range_km)]
+    if np.isnan(target_mass):
+        st.error(f"A range of {target_range_km} km cannot be reached with this pack at any vehicle mass.")
+    else:
+        st.success(f"**Maximum Vehicle Mass:** {target_mass:.0f} kg "
+                   f"({target_mass - config.mass:+.0f} kg compared to the current {config.mass} kg)")
+    st.caption(f"Solved {len(ranges_km)} ranges in {iterations} vectorized iterations.")
+
+    mass_fig = go.Figure()
+    mass_fig.add_trace(go.Scatter(x=ranges_km, y=max_mass, mode='lines', name='Maximum Mass',
+                                  line=dict(color='blue')))
+    mass_fig.add_hline(y=config.mass, line_dash="dash", annotation_text="Current mass")
+    mass_fig.update_layout(
+        title="Maximum Vehicle Mass per Target Range",
+        xaxis_title="Target Range (km)",
+        yaxis_title="Maximum Mass (kg)",
+        template="plotly_white",
+    )
+    st.plotly_chart(mass_fig, use_container_width=True)
+
+
+def min_pack_section(design_inputs, profile):
+    # --- Minimum Pack for a Range and Payload ---
+    st.header("Minimum Pack for a Range and Payload")
+    st.write("The pack weight adds to the vehicle mass, so the pack and the consumption are solved together.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        target_range_km = st.number_input("Required Range (km):", min_value=10, max_value=1000,
+                                          value=int(design_inputs["total_distance_km"]), step=10)
+        # The vehicle mass of the sidebar includes the pack of the Battery tab
+        pack_weight_kg = battery_pack()["weight_kg"]
+        vehicle_mass_without_pack = st.number_input(
+            "Vehicle Mass without Pack and Payload (kg):", min_value=100, max_value=5000,
+            value=min(max(int(config.mass - pack_weight_kg), 100), 5000), step=10,
+            help=f"Defaults to the vehicle mass minus the {pack_weight_kg:.0f} kg pack of the Battery tab.")
+    with col2:
+        payload_kg = st.number_input("Payload (kg):", min_value=0, max_value=5000, value=500, step=50)
+        specific_energy_wh_per_kg = st.number_input("Pack Specific Energy (Wh/kg):", min_value=50, max_value=300,
+                                                    value=120, step=10, key="limits_specific_energy")
+
+    payloads_kg = np.unique(np.append(np.linspace(0, 2000, 201), payload_kg))
+    pack = min_pack_for_range(
+        target_range_km, payloads_kg, vehicle_mass_without_pack, specific_energy_wh_per_kg, *profile,
+        config.frontal_area, config.C0, config.C1, design_inputs["regen_efficiency"],
+        design_inputs["battery_efficiency"], design_inputs["auxiliary_load_factor"], design_inputs["motor_voltage"],
+        design_inputs["nominal_cell_voltage"], design_inputs["cell_capacity_ah"])
+
+    index = np.searchsorted(payloads_kg, payload_kg)
+    if np.isnan(pack["final_capacity_kwh"][index]):
+        st.error("No pack covers this range: every extra string adds more consumption than range.")
+    else:
+        st.success(f"**Minimum Pack:** {pack['final_capacity_kwh'][index]:.2f} kWh "
+                   f"({pack['cells_in_series'][index]:.0f}s{pack['parallel_strings'][index]:.0f}p, "
+                   f"{pack['total_cells'][index]:.0f} cells) at a total vehicle mass of "
+                   f"{pack['vehicle_mass'][index]:.0f} kg")
+
+    pack_fig = go.Figure()
+    pack_fig.add_trace(go.Scatter(x=payloads_kg, y=pack["final_capacity_kwh"], mode='lines', name='Minimum Pack',
+                                  line=dict(color='green', shape='hv')))
+    pack_fig.update_layout(
+        title=f"Minimum Pack Capacity per Payload for {target_range_km} km",
+        xaxis_title="Payload (kg)",
+        yaxis_title="Pack Capacity (kWh)",
+        template="plotly_white",
+    )
+    st.plotly_chart(pack_fig, use_container_width=True)
+
+
+def top_speed_section():
+    # --- Road Load Limits for the Top Speed ---
+    st.header("Road Load Limits for the Top Speed")
+    highest_power_kw = highest_power_and_torque()[0] / 1000
+    available_power_kw = st.number_input("Available Power at the Wheels (kW):", min_value=1.0, max_value=1000.0,
+                                         value=max(float(round(highest_power_kw)), 1.0), step=5.0,
+                                         help="Defaults to the highest power of the Scenarios tab.")
+
+    top_speeds_kph = np.unique(np.append(np.linspace(40, 200, 161), config.top_speed))
+    limits = max_road_load_for_top_speed(top_speeds_kph, available_power_kw * 1000, config.mass,
+                                         config.frontal_area, config.C0, config.C1)
+    index = np.searchsorted(top_speeds_kph, config.top_speed)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Maximum C1", f"{limits['max_C1'][index]:.7f}",
+                  delta=f"{limits['max_C1'][index] - config.C1:+.7f}")
+    with col2:
+        st.metric("Maximum Frontal Area (m²)", f"{limits['max_frontal_area'][index]:.2f}",
+                  delta=f"{limits['max_frontal_area'][index] - config.frontal_area:+.2f}")
+    if limits["max_C1"][index] < 0 or limits["max_frontal_area"][index] < 0:
+        st.error(f"The top speed of {config.top_speed} km/h cannot be reached with {available_power_kw:.0f} kW.")
+
+    area_fig = go.Figure()
+    area_fig.add_trace(go.Scatter(x=top_speeds_kph, y=np.maximum(limits["max_frontal_area"], 0), mode='lines',
+                                  name='Maximum Frontal Area', line=dict(color='orange')))
+    area_fig.add_hline(y=config.frontal_area, line_dash="dash", annotation_text="Current frontal area")
+    area_fig.update_layout(
+        title="Maximum Frontal Area per Top Speed",
+        xaxis_title="Top Speed (km/h)",
+        yaxis_title="Frontal Area (m²)",
+        template="plotly_white",
+    )
+    st.plotly_chart(area_fig, use_container_width=True)
+
+    st.dataframe(pd.DataFrame({
+        "Top Speed (km/h)": top_speeds_kph[::20],
+        "Max C1": limits["max_C1"][::20],
+        "Max Frontal Area (m²)": limits["max_frontal_area"][::20],
+    }), hide_index=True, use_container_width=True)
@@ -1,26 +1,19 @@
+import hashlib
 import os
-import pandas as pd
 import streamlit as st
 import plotly.graph_objs as go
 import config
 import numpy as np
-
-DRIVE_PROFILES_DIR = "drive_profiles"
-
-
-def load_drive_profile(file_path):
-    """Load a drive profile CSV file."""
-    df = pd.read_csv(
-        file_path, sep=';', usecols=[1, 3, 4],
-        names=['Time', 'Speed', 'Acceleration'], skiprows=1, decimal=','
-    )
-
-    df['Speed'] = pd.to_numeric(df['Speed'], errors='coerce')
-    df['Acceleration'] = pd.to_numeric(df['Acceleration'], errors='coerce')
-    df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
-    # df['Gradient'] = pd.to_numeric(df['Gradient'], errors='coerce')
-    # df['Height'] = pd.to_numeric(df['Height'], errors='coerce')
-    return df
+import pandas as pd
+from energy_model import (DRIVE_PROFILES_DIR, load_drive_profile, calculate_kinematics, calculate_traction,
+                          calculate_phase_breakdown, reweight_phases, payload_fraction_profile,
+                          calculate_vehicle_energy)
+from energy_basis import EnergyBasis
+from profile_comparison import compare_drive_profiles
+from motor_map import MOTOR_MAPS_DIR, load_motor_map
+from export import EXPORT_FORMATS, export_bytes
+from profile_index import SORT_FIELDS, refresh_profile_index, filter_profiles, invalid_profiles
+from shared_results import page_inputs, store_page_inputs, design_inputs, gear_ratio, van_payloads_kg, battery_pack
 
 
 def drive_profile():
@@ -36,25 +29,88 @@ def drive_profile():
     st.markdown("---")
 
     # --- Drive Profile Selection ---
-    # List available drive profiles
-    profiles = [f for f in os.listdir(DRIVE_PROFILES_DIR) if f.endswith('.csv')]
-
-    # Set default to 'wltc_drive_profile_low.csv' if available
-    default_profile = 'wltc_drive_profile_low.csv' if 'wltc_drive_profile_low.csv' in profiles else None
+    # Indexed drive profiles with their metadata, only new and changed files are parsed
+    index = refresh_profile_index(DRIVE_PROFILES_DIR)
+    unreadable = invalid_profiles(DRIVE_PROFILES_DIR)
+    if unreadable:
+        st.warning("Skipped unreadable drive profiles: " +
+                   "; ".join(f"{name} ({error})" for name, error in sorted(unreadable.items())))
+    profiles = profile_library(index)
+    if not profiles:
+        st.warning("No drive profile matches the filters.")
+        return
+
+    # Set default to the last selected profile, or 'wltc_drive_profile_low.csv' if available
+    default_profile = page_inputs()["drive_profile_name"]
+    if default_profile not in profiles:
+        default_profile = 'wltc_drive_profile_low.csv' if 'wltc_drive_profile_low.csv' in profiles else None
 
     # Dropdown to select a drive profile
-    selected_profile = st.selectbox("Select Drive Profile", profiles,
-                                    index=profiles.index(default_profile) if default_profile else 0)
+    selected_profile = st.selectbox(
+        "Select Drive Profile", profiles, index=profiles.index(default_profile) if default_profile else 0,
+        format_func=lambda profile: f"{profile} ({index[profile]['distance_km']:.1f} km, "
+                                    f"{index[profile]['duration_s'] / 60:.0f} min, "
+                                    f"max {index[profile]['max_speed_kph']:.0f} km/h)")
 
     # Load the selected drive profile
     file_path = os.path.join(DRIVE_PROFILES_DIR, selected_profile)
     df = load_drive_profile(file_path)
+    store_page_inputs(drive_profile_name=selected_profile)
+    # The profile the energy consumption of the other tabs is calculated over
+    st.session_state["drive_profile"] = {
+        "version": (selected_profile, os.path.getmtime(file_path)),
+        "time": df['Time'].to_numpy(),
+        "speed_kph": df['Speed'].to_numpy(),
+        "acceleration": df['Acceleration'].to_numpy(),
+        "phase": df['Phase'].to_numpy(),
+    }
+
+    # The derived per-timestep results are kept in one preallocated block instead of as DataFrame columns
+    compact = st.checkbox("Compact memory mode (float32)", value=False,
+                          help="Store the per-timestep results in single precision, halving their memory.")
+    energy_profile = calculate_kinematics(df['Time'].to_numpy(), df['Speed'].to_numpy(),
+                                          np.float32 if compact else np.float64)
 
     # Plot and analyze the drive profile
     speed_and_acceleration_profile(df)
-    distance_profile(df)
+    distance_profile(df, energy_profile)
     # tractive_power_profile(df)
-    required_energy_profile(df)
+    required_energy_profile(df, energy_profile, selected_profile)
+    phase_breakdown(df, energy_profile)
+    shift_energy(df)
+    design_exploration(energy_profile, df['Acceleration'].to_numpy(), selected_profile)
+    profile_comparison(profiles, selected_profile, np.float32 if compact else np.float64)
+
+
+def profile_library(index):
+    """Filter and sort controls of the drive profile library; returns the matching profile names."""
+    with st.expander(f"Drive Profile Library ({len(index)} profiles)"):
+        name_contains = st.text_input("Name contains", value="")
+        max_distance_km = float(np.ceil(max((entry["distance_km"] for entry in index.values()), default=0))) + 1
+        distance_range_km = st.slider("Distance (km)", min_value=0.0, max_value=max_distance_km,
+                                      value=(0.0, max_distance_km), step=0.5)
+        max_speed_kph = float(np.ceil(max((entry["max_speed_kph"] for entry in index.values()), default=0))) + 1
+        max_speed_range_kph = st.slider("Max Speed (km/h)", min_value=0.0, max_value=max_speed_kph,
+                                        value=(0.0, max_speed_kph), step=1.0)
+        requires_gradient = st.checkbox("Only profiles with gradient data", value=False)
+        requires_height = st.checkbox("Only profiles with height data", value=False)
+        sort_by = st.selectbox("Sort by", list(SORT_FIELDS), format_func=SORT_FIELDS.get)
+        descending = st.checkbox("Descending", value=False)
+
+        profiles = filter_profiles(index, name_contains, distance_range_km, max_speed_range_kph, requires_gradient,
+                                   requires_height, sort_by, descending)
+        st.dataframe(pd.DataFrame({
+            "Drive Profile": profiles,
+            "Samples": [index[profile]["samples"] for profile in profiles],
+            "Duration (min)": [index[profile]["duration_s"] / 60 for profile in profiles],
+            "Distance (km)": [index[profile]["distance_km"] for profile in profiles],
+            "Max Speed (km/h)": [index[profile]["max_speed_kph"] for profile in profiles],
+            "Avg Speed (km/h)": [index[profile]["average_speed_kph"] for profile in profiles],
+            "Phases": [", ".join(index[profile]["phases"]) for profile in profiles],
+            "Gradient": [index[profile]["has_gradient"] for profile in profiles],
+            "Height": [index[profile]["has_height"] for profile in profiles],
+        }).style.format(precision=1), hide_index=True, use_container_width=True)
+    return profiles
 
 
 def speed_and_acceleration_profile(df):
@@ -147,23 +203,16 @@ def speed_and_acceleration_profile(df):
     # st.plotly_chart(heightFig)
 
 
-def distance_profile(df):
-    # Convert speed from km/h to m/s
-    df['Speed (m/s)'] = df['Speed'] * 1000 / 3600
-
-    # Calculate time intervals
-    df['Time Interval (s)'] = df['Time'].diff().fillna(0)
-
-    # Calculate incremental and total distance
-    df['Distance Increment (m)'] = df['Speed (m/s)'] * df['Time Interval (s)']
-    df['Total Distance (m)'] = df['Distance Increment (m)'].cumsum()
+def distance_profile(df, energy_profile):
+    # Speed in m/s, time intervals and total distance are computed by calculate_kinematics
+    total_distance_m = energy_profile["total_distance_m"]
 
     # Create the Total Distance plot
     distanceFig = go.Figure()
 
     # Add Total Distance trace
     distanceFig.add_trace(go.Scatter(
-        x=df['Time'], y=df['Total Distance (m)'],
+        x=df['Time'], y=total_distance_m,
         mode='lines', name='Total Distance (m)',
         line=dict(color='green')
     ))
@@ -179,7 +228,7 @@ def distance_profile(df):
     )
 
     # Total distance
-    total_distance = df['Total Distance (m)'].iloc[-1]
+    total_distance = total_distance_m[-1]
 
     # Streamlit output
     st.header("Total Distance Traveled Graph")
@@ -267,49 +316,62 @@ def tractive_power_profile(df):
     st.plotly_chart(powerFig, use_container_width=True)
 
 
-def required_energy_profile(df):
+def required_energy_profile(df, energy_profile, profile_name):
     st.header("Energy-Time Profile")
 
     # Add input for regenerative braking efficiency
-    regen_efficiency = st.number_input("Regenerative Braking Efficiency (%):", min_value=0, max_value=100, value=65,
-                                       step=1) / 100.0
-
-    # Calculate dynamic tractive force F_TR(t)
-    df['Aerodynamic Drag (N)'] = 0.5 * config.AIR_DENSITY * config.C_DRAG * config.frontal_area * df['Speed (m/s)'] ** 2
-    df['Rolling Resistance (N)'] = config.mass * config.GRAVITY * (config.C0 + config.C1 * df['Speed (m/s)'] ** 2)
-    df['Inertial Force (N)'] = config.mass * df['Acceleration']  # m * dv/dt
+    inputs = page_inputs()
+    regen_efficiency = st.number_input("Regenerative Braking Efficiency (%):", min_value=0, max_value=100,
+                                       value=int(round(design_inputs()["regen_efficiency"] * 100)), step=1) / 100.0
+
+    # Optional motor efficiency map, evaluated at the motor operating points of the gear ratio of the Drive Train tab
+    motor_maps = sorted(f for f in os.listdir(MOTOR_MAPS_DIR) if f.endswith('.csv')) \
+        if os.path.isdir(MOTOR_MAPS_DIR) else []
+    motor_map_options = ["None (100 % efficiency)"] + motor_maps
+    selected_motor_map = st.selectbox("Motor Efficiency Map", motor_map_options,
+                                      index=motor_map_options.index(inputs["motor_map_name"])
+                                      if inputs["motor_map_name"] in motor_maps else 0)
+    motor_map = None
+    if selected_motor_map in motor_maps:
+        motor_map = load_motor_map(os.path.join(MOTOR_MAPS_DIR, selected_motor_map))
+        st.write(f"**Gear Ratio:** {gear_ratio():.1f} (Drive Train tab), "
+                 f"**Wheel Radius:** {config.wheel_radius:.2f} m")
+
+    # Optional payload of a delivery van, delivered in equal parts at the stops of the drive profile
+    van_payloads = van_payloads_kg()
+    payload_options = ["None (constant vehicle mass)"] + list(van_payloads)
+    payload = st.selectbox("Payload", payload_options,
+                           index=payload_options.index(inputs["payload_name"])
+                           if inputs["payload_name"] in van_payloads else 0)
+    store_page_inputs(motor_map_name=selected_motor_map if motor_map is not None else None,
+                      payload_name=payload if payload in van_payloads else None)
+    mass = config.mass
+    if payload in van_payloads and van_payloads[payload] is None:
+        st.info("Open the Logistics tab first to set the van loads.")
+    elif payload in van_payloads:
+        mass = config.mass + van_payloads[payload] * payload_fraction_profile(energy_profile["speed_mps"])
+        st.write(f"**Payload:** {van_payloads[payload]:.0f} kg at the start, the van gets lighter at every stop")
+
+    # Tractive force F_TR(t), power P_TR(t) = F_TR * v(t) with motor losses and regenerative braking, and the
+    # energy integrated over time, written in place into the energy profile
     # road_angle_radians = np.radians(df['Gradient'])
-    # df['Gravitational Force (N)'] = config.mass * config.GRAVITY * np.sin(road_angle_radians)
-    # df['Tractive Force (N)'] = df['Aerodynamic Drag (N)'] + df['Rolling Resistance (N)'] + df['Inertial Force (N)'] + \
-    #                            df['Gravitational Force (N)']
-    df['Tractive Force (N)'] = df['Aerodynamic Drag (N)'] + df['Rolling Resistance (N)'] + df['Inertial Force (N)']
-
-    # Calculate instantaneous power P_TR(t) = F_TR * v(t)
-    df['Tractive Power (W)'] = df['Tractive Force (N)'] * df['Speed (m/s)']
-
-    # Adjust for regenerative braking efficiency
-    df['Tractive Power (W)'] = df['Tractive Power (W)'].apply(lambda x: x * regen_efficiency if x < 0 else x)
-
-    # Integrate power over time to calculate energy
-    df['Time Interval (s)'] = df['Time'].diff().fillna(0)  # Time intervals
-    df['Energy Increment (J)'] = df['Tractive Power (W)'] * df['Time Interval (s)']  # Incremental energy
-    df['Total Energy (J)'] = df['Energy Increment (J)'].cumsum()  # Cumulative energy
-
-    # Convert total energy to kWh for readability
-    df['Total Energy (kWh)'] = df['Total Energy (J)'] / (3.6e6)
-
-    # Calculate distance traveled (m and km)
-    df['Distance Increment (m)'] = df['Speed (m/s)'] * df['Time Interval (s)']
-    df['Total Distance (m)'] = df['Distance Increment (m)'].cumsum()
-    df['Total Distance (km)'] = df['Total Distance (m)'] / 1000  # Convert to km
+    # Gravitational force: config.mass * config.GRAVITY * np.sin(road_angle_radians)
+    calculate_traction(energy_profile, df['Acceleration'].to_numpy(), mass, config.frontal_area, config.C0,
+                       config.C1, regen_efficiency, motor_map=motor_map, wheel_radius=config.wheel_radius,
+                       gear_ratio=gear_ratio())
+    # The selected map also applies to the other energy figures of the app
+    st.session_state["motor_map"] = motor_map
 
     # --- Statistics ---
-    total_energy_kwh = df['Total Energy (kWh)'].iloc[-1]
-    total_distance_km = df['Total Distance (km)'].iloc[-1]
+    total_energy_kwh = float(energy_profile["total_energy_kwh"][-1])
+    total_distance_km = float(energy_profile["total_distance_m"][-1]) / 1000
     kwh_per_km = total_energy_kwh / total_distance_km if total_distance_km > 0 else float('inf')  # Energy per km
 
-    # Save wh per km to session state
-    st.session_state["wh_per_km"] = kwh_per_km * 1000
+    # Save the profile arrays to session state, the other tabs calculate the energy from them and the inputs above
+    st.session_state["time_interval_s"] = energy_profile["time_interval_s"]
+    st.session_state["speed_mps"] = energy_profile["speed_mps"]
+    st.session_state["acceleration"] = df['Acceleration'].to_numpy()
+    st.session_state.setdefault("design_inputs", {})["regen_efficiency"] = regen_efficiency
 
     # --- Plotly Graph ---
     energy_fig = go.Figure()
@@ -317,7 +379,7 @@ def required_energy_profile(df):
     # Add Total Energy trace
     energy_fig.add_trace(go.Scatter(
         x=df['Time'],
-        y=df['Total Energy (kWh)'],
+        y=energy_profile["total_energy_kwh"],
         mode='lines',
         name='Total Energy (kWh)',
         line=dict(color='green')
@@ -339,9 +401,220 @@ def required_energy_profile(df):
     st.write(f"**Total Energy Used:** {total_energy_kwh:.2f} kWh")
     st.write(f"**Total Distance Traveled:** {total_distance_km:.2f} km")
     st.write(f"**Average Energy Efficiency:** {1 / kwh_per_km:.2f} km/kWh" if kwh_per_km > 0 else "N/A")
-    average_energy_efficiency = 1 / kwh_per_km if kwh_per_km > 0 else 0
-    st.session_state["average_energy_efficiency"] = average_energy_efficiency
     # st.write(f"**Energy Consumption per Kilometer:** {kwh_per_km * 1000:.0f} Wh/km")
 
     st.success(f"**Energy Consumption per Kilometer:** {kwh_per_km * 1000:.0f} Wh/km")
     # st.write(f"**Energy Consumption per 100 Kilometer:** {kwh_per_km * 100:.2f} kWh/100 km")
+
+    # --- Export ---
+    st.subheader("Export Per-Timestep Results")
+    export_format = st.selectbox("Export Format", list(EXPORT_FORMATS), key="drive_profile_export_format")
+    # The compact rows already hold the speed, the time intervals and every derived result: only the file columns
+    # they do not hold are added, not the columns the other sections derive on the DataFrame
+    columns = {column: df[column].to_numpy() for column in ("Phase", "Time", "Acceleration")}
+    columns.update(energy_profile)
+    # The file is encoded again only when the format or a result changes, not on every rerun
+    digest = hashlib.sha256()
+    for values in columns.values():
+        values = np.asarray(values)
+        digest.update(np.ascontiguousarray(values.astype(str) if values.dtype == object else values).tobytes())
+    export_key = (profile_name, export_format, digest.hexdigest())
+    cached = st.session_state.get("drive_profile_export")
+    if cached is None or cached[0] != export_key:
+        cached = (export_key, export_bytes([({"Profile": profile_name}, columns)], export_format))
+        st.session_state["drive_profile_export"] = cached
+    st.download_button(
+        "Download Results",
+        data=cached[1],
+        file_name=os.path.splitext(profile_name)[0] + "_results" + EXPORT_FORMATS[export_format],
+        mime="application/octet-stream",
+    )
+
+
+def shift_energy(df):
+    st.header("Energy per Delivery Shift")
+    st.write("A shift repeats the drive profile and delivers the payload in equal parts at all its stops. The energy "
+             "is evaluated for package and restaurant vans at every load factor at once.")
+
+    van_payloads = {name: payload for name, payload in van_payloads_kg().items() if payload is not None}
+    if not van_payloads:
+        st.info("Open the Logistics tab first to set the van loads.")
+        return
+    cycles_per_shift = st.number_input("Drive profile repetitions per shift", min_value=1, max_value=100, value=5,
+                                       step=1)
+
+    time = df['Time'].to_numpy(dtype=float)
+    shift_time = (time[np.newaxis, :] + np.arange(cycles_per_shift)[:, np.newaxis] * (time[-1] + 1)).ravel()
+    speed_mps = np.tile(df['Speed'].to_numpy(dtype=float) / 3.6, cycles_per_shift)
+    acceleration = np.tile(df['Acceleration'].to_numpy(dtype=float), cycles_per_shift)
+    time_interval_s = np.concatenate(([0.0], np.diff(shift_time)))
+
+    # Every van type at every load factor, as one set of variants
+    load_factors = np.linspace(0, 1, 11)
+    payload_kg = np.concatenate([payload * load_factors for payload in van_payloads.values()])
+    # With the regenerative braking efficiency and motor efficiency map of the energy profile above
+    energy = calculate_vehicle_energy(speed_mps, acceleration, time_interval_s, config.mass, config.frontal_area,
+                                      config.C0, config.C1, design_inputs()["regen_efficiency"], payload_kg=payload_kg,
+                                      payload_fraction=payload_fraction_profile(speed_mps),
+                                      motor_map=st.session_state.get("motor_map"), wheel_radius=config.wheel_radius,
+                                      gear_ratio=gear_ratio())
+    shift_distance_km = float(speed_mps @ time_interval_s) / 1000
+
+    shift_fig = go.Figure()
+    for index, name in enumerate(van_payloads):
+        variants = slice(index * len(load_factors), (index + 1) * len(load_factors))
+        shift_fig.add_trace(go.Scatter(x=load_factors * 100, y=energy["total_energy_kwh"][variants],
+                                       mode="lines+markers", name=name))
+    pack = battery_pack()
+    if pack is not None:
+        shift_fig.add_hline(y=pack["final_capacity_kwh"], line_dash="dash", line_color="red",
+                            annotation_text="Battery Capacity")
+    shift_fig.update_layout(
+        title=f"Energy per Shift ({shift_distance_km:.1f} km)",
+        xaxis_title="Load at the Start of the Shift (%)",
+        yaxis_title="Energy (kWh)",
+        template="plotly_white"
+    )
+    st.plotly_chart(shift_fig, use_container_width=True)
+
+
+def phase_breakdown(df, energy_profile):
+    st.header("Per-Phase Breakdown")
+    st.write("Distance, speed and energy consumption per phase of the drive profile, for example the urban and "
+             "extra-urban parts of a WLTC cycle.")
+
+    breakdown = calculate_phase_breakdown(df['Phase'].to_numpy(), energy_profile)
+    st.dataframe(pd.DataFrame({
+        "Phase": breakdown["phase"],
+        "Duration (s)": breakdown["duration_s"],
+        "Distance (km)": breakdown["distance_km"],
+        "Max Speed (km/h)": breakdown["max_speed_kph"],
+        "Average Speed (km/h)": breakdown["average_speed_kph"],
+        "Energy (kWh)": breakdown["energy_kwh"],
+        "Wh/km": breakdown["wh_per_km"],
+    }).style.format(precision=2), hide_index=True, use_container_width=True)
+
+    # --- Re-weighting ---
+    # The consumption per phase stays the same, so another mix only re-weights the per-phase results
+    st.subheader("Fleet Phase Mix")
+    total_distance_km = breakdown["distance_km"].sum()
+    # The mix used for the battery sizing, kept when the tab is opened again
+    phase_mix = page_inputs()["phase_mix"] or {}
+    columns = st.columns(len(breakdown["phase"]))
+    distance_shares = {}
+    for column, name, distance_km in zip(columns, breakdown["phase"], breakdown["distance_km"]):
+        profile_share = round(100 * distance_km / total_distance_km, 1) if total_distance_km > 0 else 0.0
+        distance_shares[name] = column.number_input(
+            f"{name} (% of distance)", min_value=0.0, max_value=100.0, value=phase_mix.get(name, profile_share),
+            step=5.0, key=f"phase_share_{name}")
+
+    store_page_inputs(phase_mix=None)
+    if sum(distance_shares.values()) <= 0:
+        st.info("Set a share of distance for at least one phase.")
+        return
+    wh_per_km = reweight_phases(breakdown, distance_shares)
+    total_energy_kwh = float(energy_profile["total_energy_kwh"][-1])
+    profile_wh_per_km = total_energy_kwh / total_distance_km * 1000 if total_distance_km > 0 else float('inf')
+    st.success(f"**Energy Consumption per Kilometer for this mix:** {wh_per_km:.0f} Wh/km "
+               f"(drive profile: {profile_wh_per_km:.0f} Wh/km)")
+    if st.checkbox("Use the consumption of this mix for battery sizing", value=bool(phase_mix)):
+        store_page_inputs(phase_mix=distance_shares)
+
+
+def design_exploration(energy_profile, acceleration, profile_name):
+    st.markdown("---")
+    st.header("Design Exploration")
+    st.write("Vary the vehicle parameters to see their effect on the energy consumption of this drive profile. "
+             "The profile is reduced to a few integrals once, so every change is evaluated instantly. Motor losses "
+             "are not included here.")
+    if st.session_state.get("motor_map") is not None:
+        st.info("The selected motor efficiency map is not applied in this exploration, so its consumption is lower "
+                "than the energy profile above.")
+
+    # The integrals are kept per drive profile version across reruns, as the parsed profiles
+    version = (profile_name, os.path.getmtime(os.path.join(DRIVE_PROFILES_DIR, profile_name)))
+    cached = st.session_state.get("energy_basis")
+    if cached is None or cached[0] != version:
+        basis = EnergyBasis(energy_profile["speed_mps"], acceleration, energy_profile["time_interval_s"])
+        st.session_state["energy_basis"] = (version, basis)
+    exploration_sliders(st.session_state["energy_basis"][1])
+
+
+@st.fragment
+def exploration_sliders(basis):
+    """Sliders that only rerun this fragment, so the evaluation is not held up by the rest of the app."""
+    regen_efficiency = design_inputs()["regen_efficiency"]
+    current = basis.wh_per_km(config.mass, config.frontal_area, config.C0, config.C1, regen_efficiency)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        mass = st.slider("Vehicle Mass (kg)", min_value=500, max_value=5000, value=int(config.mass), step=10,
+                         key="exploration_mass")
+        frontal_area = st.slider("Frontal Area (m²)", min_value=config.frontal_area * 0.5,
+                                 max_value=config.frontal_area * 1.5, value=float(config.frontal_area),
+                                 key="exploration_frontal_area")
+        explored_regen = st.slider("Regenerative Braking Efficiency (%)", min_value=0, max_value=100,
+                                   value=int(round(regen_efficiency * 100)), key="exploration_regen") / 100
+    with col2:
+        C0 = st.slider("Static Rolling Resistance Coefficient (C0)", min_value=0.005, max_value=0.05,
+                       value=float(config.C0), step=0.0005, format="%.4f", key="exploration_C0")
+        C1 = st.slider("Speed-dependent Coefficient (C1)", min_value=0.0, max_value=0.00001, value=float(config.C1),
+                       step=0.0000001, format="%.7f", key="exploration_C1")
+
+    explored = basis.wh_per_km(mass, frontal_area, C0, C1, explored_regen)
+    st.metric("Energy Consumption (Wh/km)", f"{explored:.0f}", delta=f"{explored - current:+.1f} Wh/km",
+              delta_color="inverse")
+    st.caption(f"Full passes over the drive profile so far: {basis.full_passes}")
+
+
+def profile_comparison(profiles, selected_profile, dtype):
+    st.markdown("---")
+    st.header("Drive Profile Comparison")
+
+    if not st.checkbox("Compare drive profiles", value=False):
+        return
+
+    # A large library is compared on request only, by default the first profiles of the filtered list
+    compared = st.multiselect("Drive Profiles to Compare", profiles, default=profiles[:10])
+    if not compared:
+        st.warning("Select at least one drive profile to compare.")
+        return
+
+    # The current vehicle, with the regenerative braking efficiency and motor efficiency map of the energy profile
+    # above
+    regen_efficiency = design_inputs()["regen_efficiency"]
+    results = compare_drive_profiles([os.path.join(DRIVE_PROFILES_DIR, profile) for profile in compared],
+                                     config.mass, config.frontal_area, config.C0, config.C1, regen_efficiency, dtype,
+                                     motor_map=st.session_state.get("motor_map"), wheel_radius=config.wheel_radius,
+                                     gear_ratio=gear_ratio())
+
+    summary = pd.DataFrame({
+        "Drive Profile": compared,
+        "Total Time (min)": [result["total_time_s"] / 60 for result in results],
+        "Distance (km)": [result["total_distance_km"] for result in results],
+        "Max Speed (km/h)": [result["max_speed_kph"] for result in results],
+        "Avg Speed (km/h)": [result["average_speed_kph"] for result in results],
+        "Energy (kWh)": [result["total_energy_kwh"] for result in results],
+        "Wh/km": [result["wh_per_km"] for result in results],
+        "km/kWh": [result["km_per_kwh"] for result in results],
+    })
+    # No range per kWh for a profile that recovers more energy than it uses
+    st.dataframe(summary.style.format(precision=2, na_rep="N/A"), hide_index=True, use_container_width=True)
+
+    # Overlaid energy curves, thinned out to at most 2000 points per profile
+    comparison_fig = go.Figure()
+    for profile, result in zip(compared, results):
+        step = max(1, len(result["time"]) // 2000)
+        comparison_fig.add_trace(go.Scatter(
+            x=result["time"][::step], y=result["total_energy_kwh_curve"][::step],
+            mode='lines', name=profile,
+            line=dict(width=3 if profile == selected_profile else 1.5)
+        ))
+    comparison_fig.update_layout(
+        title='Energy-Time Profile per Drive Profile',
+        xaxis_title='Time (s)',
+        yaxis_title='Energy (kWh)',
+        template='plotly_white',
+        hovermode="x unified",
+    )
+    st.plotly_chart(comparison_fig, use_container_width=True)
@@ -1,6 +1,13 @@
+import os
 import streamlit as st
-import math
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
 import config
+from energy_model import DRIVE_PROFILES_DIR, load_drive_cycle
+from operating_points import calculate_operating_point_density
+from profile_index import refresh_profile_index
+from shared_results import page_inputs, store_page_inputs, highest_power_and_torque, gear_ratio as shared_gear_ratio
 
 
 def drive_train():
@@ -17,7 +24,9 @@ def drive_train():
     wheel_radius = config.wheel_radius  # Assume wheel_radius is in meters
 
     # New input for motor max RPM
-    motor_max_rpm = st.number_input("Motor Max RPM:", min_value=1000, max_value=20000, value=7000, step=100)
+    motor_max_rpm = st.number_input("Motor Max RPM:", min_value=1000, max_value=20000,
+                                    value=page_inputs()["motor_max_rpm"], step=100)
+    store_page_inputs(motor_max_rpm=motor_max_rpm)
 
     st.markdown(f"- **Top Speed:** {config.top_speed} km/h -> {top_speed_mps:.2f} m/s")
     st.markdown(f"- **Wheel Radius:** {wheel_radius:.2f} m")
@@ -26,8 +35,8 @@ def drive_train():
         r"R = \frac{\omega_{\text{motor}} \cdot r \cdot 2\pi}{v_{\text{max}} \cdot 60}"
     )
 
-    # Gear ratio calculation
-    gear_ratio = (motor_max_rpm * wheel_radius * 2 * math.pi) / (top_speed_mps * 60)
+    # Gear ratio calculation, shared with the motor efficiency map of the other tabs
+    gear_ratio = shared_gear_ratio()
 
     # Display inputs
     # st.markdown("### Inputs")
@@ -36,9 +45,69 @@ def drive_train():
     st.markdown("### Result")
     st.success(f"**Required Gear Ratio:** {gear_ratio:.1f}")
 
-    st.write(f"**Theoretical Motor Torque:** "
-             f"{st.session_state['highest_torque'] / gear_ratio:.0f} Nm")
-    drivetrain_efficiency = st.number_input("Drivetrain Efficiency (%):", min_value=0, max_value=100, value=90,
+    highest_torque = highest_power_and_torque()[1]
+    st.write(f"**Theoretical Motor Torque:** {highest_torque / gear_ratio:.0f} Nm")
+    drivetrain_efficiency = st.number_input("Drivetrain Efficiency (%):", min_value=1, max_value=100, value=90,
                                             step=1) / 100
     st.success(f"**Required Motor Torque:** "
-               f"{st.session_state['highest_torque'] / gear_ratio / drivetrain_efficiency:.0f} Nm")
+               f"{highest_torque / gear_ratio / drivetrain_efficiency:.0f} Nm")
+
+    operating_point_density(gear_ratio, motor_max_rpm, drivetrain_efficiency,
+                            highest_torque / gear_ratio / drivetrain_efficiency)
+
+
+def operating_point_density(gear_ratio, motor_max_rpm, drivetrain_efficiency, required_motor_torque):
+    st.markdown("---")
+    st.markdown("### Motor Operating Points")
+    st.write("Where the motor spends its time and energy on the drive profiles: every timestep is converted to a "
+             "motor speed and torque through the wheel radius, the gear ratio and the drivetrain efficiency. Negative "
+             "torques are regenerative braking.")
+
+    profiles = sorted(refresh_profile_index(DRIVE_PROFILES_DIR))
+    selected_profiles = st.multiselect("Drive Profiles", profiles, default=profiles[:1])
+    if not selected_profiles:
+        st.info("Select at least one drive profile.")
+        return
+    weight = st.radio("Weight", ["Time", "Energy"], horizontal=True)
+    spread = st.slider("Compare Gear Ratios (\u00b1 %)", min_value=0, max_value=50, value=20, step=5)
+
+    # The current gear ratio and the compared ones are binned together, on one grid
+    gear_ratios = np.unique(gear_ratio * (1 + np.array([-1, -0.5, 0, 0.5, 1]) * spread / 100))
+    drive_cycles = [load_drive_cycle(os.path.join(DRIVE_PROFILES_DIR, profile)) for profile in selected_profiles]
+    density, speed_edges_rpm, torque_edges_nm = calculate_operating_point_density(
+        drive_cycles, config.mass, config.frontal_area, config.C0, config.C1, config.wheel_radius, gear_ratios, 40,
+        40, weight=weight.lower(), drivetrain_efficiency=drivetrain_efficiency)
+    unit = "s" if weight == "Time" else "kWh"
+
+    speed_centres = (speed_edges_rpm[:-1] + speed_edges_rpm[1:]) / 2
+    torque_centres = (torque_edges_nm[:-1] + torque_edges_nm[1:]) / 2
+    current = int(np.argmin(np.abs(gear_ratios - gear_ratio)))
+    share = density[current] / max(density[current].sum(), 1e-12) * 100
+
+    heatmap_fig = go.Figure(go.Heatmap(
+        x=speed_centres, y=torque_centres, z=np.where(share > 0, share, np.nan), colorscale="Viridis",
+        colorbar=dict(title=f"{weight} (%)"),
+        hovertemplate="%{x:.0f} rpm, %{y:.0f} Nm: %{z:.2f} %<extra></extra>"))
+    heatmap_fig.add_vline(x=motor_max_rpm, line_dash="dash", line_color="red", annotation_text="Max RPM")
+    if required_motor_torque > 0:
+        for torque in (required_motor_torque, -required_motor_torque):
+            heatmap_fig.add_hline(y=torque, line_dash="dash", line_color="orange")
+    heatmap_fig.update_layout(
+        title=f"{weight} per Motor Operating Point (Gear Ratio {gear_ratio:.1f})",
+        xaxis_title="Motor Speed (rpm)",
+        yaxis_title="Motor Torque (Nm)",
+        template="plotly_white"
+    )
+    st.plotly_chart(heatmap_fig, use_container_width=True)
+
+    # Weighted means over the grid cells of every gear ratio
+    totals = density.sum(axis=(1, 2))
+    safe_totals = np.where(totals > 0, totals, 1)
+    above_max_rpm = density[:, :, speed_centres > motor_max_rpm].sum(axis=(1, 2))
+    st.dataframe(pd.DataFrame({
+        "Gear Ratio": gear_ratios,
+        f"Total ({unit})": totals,
+        "Mean Motor Speed (rpm)": density.sum(axis=1) @ speed_centres / safe_totals,
+        "Mean |Torque| (Nm)": density.sum(axis=2) @ np.abs(torque_centres) / safe_totals,
+        "Above Max RPM (%)": above_max_rpm / safe_totals * 100,
+    }).style.format(precision=1), hide_index=True, use_container_width=True)
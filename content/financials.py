@@ -1,7 +1,12 @@
 import streamlit as st
 import math
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from battery_ageing import DAYS_PER_YEAR, simulate_battery_ageing
+from cash_flow import calculate_cash_flows, cash_flow_metrics
+from charging_simulation import simulate_depot_charging, time_of_use_prices
+from shared_results import design_inputs, wh_per_km, battery_pack
 
 
 def financials():
@@ -19,6 +24,12 @@ def financials():
 
     st.markdown("---")
 
+    # The financials build on the results of the other tabs, the battery pack defaults to the Battery tab inputs
+    if wh_per_km() is None or any(st.session_state.get(key) is None
+                                  for key in ("total_working_hours_per_day", "packages_per_day_in_area")):
+        st.info("Open the Drive Profile and Logistics tabs first, the financials build on their results.")
+        return
+
     # --- Initial Costs ---
     st.markdown("### **Initial Costs**")
     number_of_cars = st.session_state["total_vans_needed"]
@@ -36,10 +47,87 @@ def financials():
 
     # --- Ongoing Costs ---
     st.markdown("### **Ongoing Costs per Month (per car)**")
-    battery_capacity_kwh = st.session_state["final_capacity_kwh"]
+    battery_capacity_kwh = battery_pack()["final_capacity_kwh"]
     st.write(f"**Battery Capacity per Car:** {battery_capacity_kwh} kWh")
     kwh_price = st.number_input("Price per kWh (\u20ac):", min_value=0.0, value=0.35, step=0.01)
     charging_cost = battery_capacity_kwh * kwh_price
+
+    with st.expander("Depot Charging Simulation"):
+        st.write("Simulates the vans charging at the depot between shifts with a limited number of chargers and "
+                 "time-of-use energy prices. The simulated energy cost can replace the flat charging cost above.")
+        number_of_chargers = st.number_input("Number of Depot Chargers:", min_value=1,
+                                             value=max(1, math.ceil(number_of_cars / 2)), step=1)
+        charger_power_kw = st.number_input("Charger Power (kW):", min_value=1.0, value=22.0, step=1.0)
+        distance_per_shift_km = st.number_input("Driving Distance per Shift (km):", min_value=0.0, value=40.0,
+                                                step=5.0)
+        first_shift_start_h = st.number_input("First Shift Start (hour of day):", min_value=0.0, max_value=23.0,
+                                              value=6.0, step=0.5)
+        shift_gap_h = st.number_input("Gap Between Shifts (h):", min_value=0.0, max_value=12.0, value=0.5, step=0.25)
+        off_peak_price = st.number_input("Off-Peak Price per kWh (\u20ac):", min_value=0.0, value=0.25, step=0.01)
+        off_peak_start_hour = st.number_input("Off-Peak Start (hour of day):", min_value=0, max_value=23, value=23,
+                                              step=1)
+        off_peak_end_hour = st.number_input("Off-Peak End (hour of day):", min_value=0, max_value=23, value=7, step=1)
+        delay_overnight_charging = st.checkbox("Postpone overnight charging to the off-peak window")
+        use_simulated_charging_cost = st.checkbox("Use simulated charging cost")
+
+        energy_per_shift_kwh = distance_per_shift_km * wh_per_km() / 1000
+        st.write(f"**Energy per Shift:** {energy_per_shift_kwh:.2f} kWh")
+
+        # The simulation only runs on request; its last result is kept with the inputs it was run with
+        charging_inputs = (number_of_cars, number_of_chargers, charger_power_kw, battery_capacity_kwh,
+                           energy_per_shift_kwh, st.session_state["shift_length"], st.session_state["amount_of_shifts"],
+                           first_shift_start_h, shift_gap_h, kwh_price, off_peak_price, off_peak_start_hour,
+                           off_peak_end_hour, delay_overnight_charging)
+        if st.button("Run Charging Simulation"):
+            try:
+                st.session_state["depot_charging"] = {"inputs": charging_inputs, "result": simulate_depot_charging(
+                    number_of_cars, number_of_chargers, charger_power_kw, battery_capacity_kwh, energy_per_shift_kwh,
+                    st.session_state["shift_length"], st.session_state["amount_of_shifts"],
+                    first_shift_start_h=first_shift_start_h, shift_gap_h=shift_gap_h,
+                    hourly_prices=time_of_use_prices(kwh_price, off_peak_price, off_peak_start_hour,
+                                                     off_peak_end_hour),
+                    overnight_charging_start_h=off_peak_start_hour if delay_overnight_charging else None,
+                )}
+            except ValueError as error:
+                st.session_state.pop("depot_charging", None)
+                st.error(str(error))
+
+        simulation = st.session_state.get("depot_charging")
+        charging = simulation["result"] if simulation is not None else None
+        if charging is not None:
+            if simulation["inputs"] != charging_inputs:
+                st.info("The inputs have changed since the last simulation. Run it again to update the results.")
+            st.write(f"**Peak Grid Load:** {charging['peak_grid_load_kw']:,.0f} kW")
+            st.write(f"**Charger Utilisation:** {charging['charger_utilisation'] * 100:.1f} %")
+            st.write(f"**Average Waiting Time:** {charging['average_waiting_time_h'] * 60:.0f} minutes")
+            st.write(f"**Undercharged Departures per Month:** {charging['undercharged_departures']}")
+            if charging["energy_shortfall_kwh"] > 0:
+                st.warning(f"The vans run out of energy: {charging['energy_shortfall_kwh']:,.0f} kWh short per "
+                           f"month.")
+            st.success(f"**Simulated Monthly Energy Cost:** \u20ac{charging['energy_cost']:,.0f}")
+
+            load_fig = go.Figure()
+            load_fig.add_trace(go.Scatter(
+                x=np.arange(len(charging["grid_load_kw"])) / 60 / 24,
+                y=charging["grid_load_kw"],
+                mode="lines",
+                name="Grid Load",
+                line=dict(color="orange")
+            ))
+            load_fig.update_layout(
+                title="Depot Grid Load",
+                xaxis_title="Days",
+                yaxis_title="Load (kW)",
+                template="plotly_white"
+            )
+            st.plotly_chart(load_fig, use_container_width=True)
+
+        if use_simulated_charging_cost:
+            if charging is None:
+                st.info("Run the charging simulation to use its energy cost.")
+            else:
+                charging_cost = charging["energy_cost"] / max(number_of_cars, 1)
+
     st.write(f"**Charging Cost per Car:** \u20ac{charging_cost:,.2f}")
     maintenance_cost = st.number_input("Maintenance Cost (\u20ac):", min_value=0, value=70, step=1)
     other_costs = st.number_input(
@@ -102,27 +190,115 @@ def financials():
     revenue_per_month = (crates_per_month * cost_per_crate) + (packages_per_month * cost_per_package)
     st.success(f"**Revenue per Month:** \u20ac{revenue_per_month:,.2f}")
 
-    break_even_months = total_investment / (revenue_per_month - total_monthly_cost)
-    st.success(f"**Break Even Point:** {break_even_months:.2f} months ({break_even_months / 12:.2f} years)")
+    # --- Battery Degradation ---
+    st.markdown("---")
+    monthly_replacement_cost = battery_degradation(number_of_cars, battery_capacity_kwh, energy_per_shift_kwh,
+                                                   distance_per_shift_km)
+    st.markdown("---")
+
+    st.session_state.setdefault("design_inputs", {}).update({
+        "distribution_centre_cost": distribution_centre_cost,
+        "cost_per_car": cost_per_car,
+        "software_cost": software_cost,
+        "kwh_price": kwh_price,
+        "maintenance_cost": maintenance_cost,
+        "other_costs": other_costs,
+        "insurance_cost": insurance_cost,
+        "road_tax_cost": road_tax_cost,
+        "hourly_employee_cost": hourly_employee_cost,
+        "distribution_centre_employees": distribution_centre_employees,
+        "distribution_centre_working_hours_per_day": distribution_centre_working_hours_per_day,
+        "distribution_centre_kwh_usage": distribution_centre_kwh_usage,
+        "extra_maintenance_cost": extra_maintenance_cost,
+        "income_per_crate": cost_per_crate,
+        "income_per_package": cost_per_package,
+    })
+
+    # --- Cash Flow ---
+    cash_flow_analysis(total_investment, number_of_cars, cost_per_car, revenue_per_month, total_monthly_cost,
+                       monthly_replacement_cost)
+
+
+def cash_flow_analysis(total_investment, number_of_cars, cost_per_car, revenue_per_month, total_monthly_cost,
+                       monthly_replacement_cost):
+    """Monthly cash flow with inflation, financing and van replacements; break-even, NPV and IRR."""
+    st.markdown("### **Cash Flow**")
+    horizon_years = st.number_input("Horizon (years):", min_value=1, max_value=50, value=10, step=1)
+    discount_rate = st.number_input("Discount Rate (% per year):", min_value=0.0, max_value=50.0, value=8.0,
+                                    step=0.5) / 100
+    cost_inflation = st.number_input("Cost Inflation (% per year):", min_value=-10.0, max_value=50.0, value=2.0,
+                                     step=0.5) / 100
+    revenue_inflation = st.number_input("Revenue Growth (% per year):", min_value=-10.0, max_value=50.0, value=2.0,
+                                        step=0.5, help="Price increases and growth of the deliveries.") / 100
+    financed_share = st.number_input("Financed Share of the Investment (%):", min_value=0, max_value=100, value=0,
+                                     step=5) / 100
+    loan_rate = st.number_input("Loan Interest Rate (% per year):", min_value=0.0, max_value=30.0, value=5.0,
+                                step=0.25) / 100
+    loan_years = st.number_input("Loan Term (years):", min_value=1, max_value=50, value=10, step=1)
+    vehicle_life_years = st.number_input("Van Replacement Interval (years):", min_value=0, max_value=50, value=8,
+                                         step=1, help="The vans are bought again at inflated prices. 0: never.")
+
+    st.session_state.setdefault("design_inputs", {}).update({
+        "horizon_years": horizon_years,
+        "discount_rate": discount_rate,
+        "cost_inflation": cost_inflation,
+        "revenue_inflation": revenue_inflation,
+        "financed_share": financed_share,
+        "loan_rate": loan_rate,
+        "loan_years": loan_years,
+        "vehicle_life_years": vehicle_life_years,
+    })
+
+    months = horizon_years * 12
+    extra_costs = None
+    if monthly_replacement_cost is not None:
+        # Battery replacements within the simulated years; none are assumed after them
+        extra_costs = np.zeros(months)
+        simulated = min(months, len(monthly_replacement_cost))
+        extra_costs[:simulated] = monthly_replacement_cost[:simulated]
+
+    scenario = dict(total_investment=total_investment, revenue_per_month=revenue_per_month,
+                    monthly_cost=total_monthly_cost, cost_inflation=cost_inflation,
+                    revenue_inflation=revenue_inflation, financed_share=financed_share, loan_rate=loan_rate,
+                    loan_years=loan_years, number_of_vans=number_of_cars, cost_per_van=cost_per_car,
+                    vehicle_life_years=vehicle_life_years, extra_costs=extra_costs)
+    metrics = cash_flow_metrics(calculate_cash_flows(months, **scenario), discount_rate)
+
+    break_even_months = metrics["payback_months"][0]
+    if np.isnan(break_even_months):
+        st.warning(f"**Break Even Point:** not reached within {horizon_years} years")
+    else:
+        st.success(f"**Break Even Point:** {break_even_months:.2f} months ({break_even_months / 12:.2f} years)")
+    discounted_payback_months = metrics["discounted_payback_months"][0]
+    if np.isnan(discounted_payback_months):
+        st.write(f"**Discounted Payback:** not reached within {horizon_years} years")
+    else:
+        st.write(f"**Discounted Payback:** {discounted_payback_months:.2f} months "
+                 f"({discounted_payback_months / 12:.2f} years)")
+    st.write(f"**Net Present Value:** \u20ac{metrics['npv'][0]:,.0f}")
+    irr = metrics["irr"][0]
+    st.write(f"**Internal Rate of Return:** {'-' if np.isnan(irr) else f'{irr * 100:.1f} % per year'}")
 
     st.markdown("---")
 
     # --- Graph: Budget Over Time ---
     st.markdown("### **Budget Over Time**")
-    time_years = 2 * math.ceil(break_even_months / 12)  # Two times the break-even point
-    months = list(range(1, time_years * 12 + 1))
-
-    budget_over_time = [-(total_investment + total_monthly_cost * i) + revenue_per_month * i for i in months]
-    budget_df = pd.DataFrame({"Month": months, "Budget (\u20ac)": budget_over_time})
-
+    years = np.arange(months + 1) / 12
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=budget_df["Month"] / 12,
-        y=budget_df["Budget (\u20ac)"],
+        x=years,
+        y=metrics["cumulative_cash_flow"][0],
         mode="lines",
         name="Budget Over Time",
         line=dict(color="green")
     ))
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=metrics["cumulative_discounted_cash_flow"][0],
+        mode="lines",
+        name="Discounted",
+        line=dict(color="blue", dash="dash")
+    ))
 
     fig.update_layout(
         title="Budget Over Time",
@@ -132,3 +308,143 @@ def financials():
     )
 
     st.plotly_chart(fig, use_container_width=True)
+
+    scenario_analysis(months, scenario, discount_rate)
+
+
+def scenario_analysis(months, scenario, discount_rate):
+    """Spread of the NPV and break-even over random scenarios around the cash flow inputs."""
+    with st.expander("Scenario Analysis"):
+        st.write("Evaluates many scenarios at once, with every input varied uniformly within the ranges below, to "
+                 "show how uncertain the NPV and break-even point are.")
+        number_of_scenarios = st.number_input("Number of Scenarios:", min_value=10, max_value=20000, value=2000,
+                                              step=100)
+        revenue_range = st.number_input("Revenue Range (\u00b1%):", min_value=0, max_value=100, value=20, step=5) / 100
+        cost_range = st.number_input("Cost Range (\u00b1%):", min_value=0, max_value=100, value=10, step=5) / 100
+        investment_range = st.number_input("Investment Range (\u00b1%):", min_value=0, max_value=100, value=10,
+                                           step=5) / 100
+        inflation_range = st.number_input("Inflation Range (\u00b1 percentage points):", min_value=0.0,
+                                          max_value=10.0, value=1.0, step=0.5) / 100
+
+        # The scenarios only run on request; the last result is kept with the inputs it was run with
+        analysis_inputs = (months, discount_rate, number_of_scenarios, revenue_range, cost_range, investment_range,
+                           inflation_range, tuple((name, value) for name, value in scenario.items()
+                                                  if name != "extra_costs"),
+                           None if scenario["extra_costs"] is None else scenario["extra_costs"].tobytes())
+        if st.button("Run Scenario Analysis"):
+            rng = np.random.default_rng(0)
+
+            def vary(value, spread, relative=True):
+                offset = rng.uniform(-spread, spread, number_of_scenarios)
+                return value * (1 + offset) if relative else value + offset
+
+            scenarios = {
+                **scenario,
+                "total_investment": vary(scenario["total_investment"], investment_range),
+                "revenue_per_month": vary(scenario["revenue_per_month"], revenue_range),
+                "monthly_cost": vary(scenario["monthly_cost"], cost_range),
+                "cost_inflation": vary(scenario["cost_inflation"], inflation_range, relative=False),
+                "revenue_inflation": vary(scenario["revenue_inflation"], inflation_range, relative=False),
+            }
+            metrics = cash_flow_metrics(calculate_cash_flows(months, **scenarios), discount_rate, irr=False)
+            st.session_state["scenario_analysis"] = {"inputs": analysis_inputs, "npv": metrics["npv"],
+                                                     "payback_months": metrics["payback_months"]}
+
+        analysis = st.session_state.get("scenario_analysis")
+        if analysis is None:
+            return
+        if analysis["inputs"] != analysis_inputs:
+            st.info("The inputs have changed since the last analysis. Run it again to update the results.")
+
+        npv = analysis["npv"]
+        payback_years = analysis["payback_months"] / 12
+        reached = ~np.isnan(payback_years)
+        st.success(f"**Probability of a Positive NPV:** {(npv > 0).mean() * 100:.1f} %")
+        st.write(f"**Break Even within the Horizon:** {reached.mean() * 100:.1f} % of the scenarios")
+        percentiles = [10, 50, 90]
+        summary = pd.DataFrame({
+            "Percentile": [f"P{p}" for p in percentiles],
+            "NPV (\u20ac)": np.percentile(npv, percentiles),
+            "Break Even (years)": (np.percentile(payback_years[reached], percentiles) if reached.any() else
+                                   np.full(len(percentiles), np.nan)),
+        })
+        st.dataframe(summary.style.format({"NPV (\u20ac)": "{:,.0f}", "Break Even (years)": "{:.2f}"},
+                                          na_rep="-"), hide_index=True)
+
+        npv_fig = go.Figure(go.Histogram(x=npv, nbinsx=50, marker_color="green"))
+        npv_fig.add_vline(x=0, line_dash="dash", line_color="red")
+        npv_fig.update_layout(
+            title="Net Present Value over the Scenarios",
+            xaxis_title="NPV (\u20ac)",
+            yaxis_title="Scenarios",
+            template="plotly_white"
+        )
+        st.plotly_chart(npv_fig, use_container_width=True)
+
+
+def battery_degradation(number_of_cars, battery_capacity_kwh, energy_per_shift_kwh, distance_per_shift_km):
+    """Fleet battery ageing over several years; returns the battery replacement cost per month, if included."""
+    st.markdown("### **Battery Degradation**")
+    st.write("Simulates the cycle and calendar ageing of the battery pack of every van over every day, with the "
+             "energy per shift of the Depot Charging Simulation. A pack is replaced when its range drops below the "
+             "required range or its state of health below the end of life.")
+
+    horizon_years = st.number_input("Simulated Years:", min_value=1, max_value=30, value=10, step=1)
+    required_range_km = st.number_input("Required Range (km):", min_value=0.0, value=float(distance_per_shift_km),
+                                        step=5.0, help="The range a van needs to complete one shift.")
+    cycle_life = st.number_input("Cycle Life (full cycles to 80 % capacity):", min_value=100, value=3000, step=100)
+    calendar_fade_per_year = st.number_input("Calendar Fade after One Year (%):", min_value=0.0, max_value=20.0,
+                                             value=2.0, step=0.5) / 100
+    end_of_life_state_of_health = st.number_input("End of Life State of Health (%):", min_value=0, max_value=99,
+                                                  value=70, step=5) / 100
+    daily_variation = st.number_input("Day-to-Day Variation of the Energy per Shift (%):", min_value=0, max_value=100,
+                                      value=15, step=5) / 100
+    pack_price_per_kwh = st.number_input("Replacement Pack Price per kWh (\u20ac):", min_value=0, value=150, step=10)
+    include_replacements = st.checkbox("Include battery replacements in the cash flow", value=True)
+
+    days = horizon_years * DAYS_PER_YEAR
+    try:
+        ageing = simulate_battery_ageing(
+            number_of_cars, days, battery_capacity_kwh, energy_per_shift_kwh, st.session_state["amount_of_shifts"],
+            required_range_km, wh_per_km(),
+            battery_efficiency=design_inputs()["battery_efficiency"],
+            cycle_life=cycle_life, calendar_fade_per_year=calendar_fade_per_year,
+            end_of_life_state_of_health=end_of_life_state_of_health, daily_variation=daily_variation)
+    except ValueError as error:
+        st.warning(str(error))
+        return None
+
+    replacements = int(ageing["replacements_per_van"].sum())
+    replacement_cost = battery_capacity_kwh * pack_price_per_kwh
+    first_replacement_day = ageing["first_replacement_day"]
+    st.write(f"**Minimum State of Health:** {ageing['minimum_state_of_health'] * 100:.1f} %")
+    st.write(f"**State of Health after {horizon_years} Years:** "
+             f"{ageing['state_of_health'][:, -1].mean() * 100:.1f} % (fleet average)")
+    if replacements:
+        first_replacement_years = first_replacement_day[first_replacement_day >= 0].mean() / DAYS_PER_YEAR
+        st.write(f"**First Replacement:** after {first_replacement_years:.1f} years on average")
+    st.success(f"**Battery Replacements:** {replacements} packs in {horizon_years} years, "
+               f"\u20ac{replacements * replacement_cost:,.0f}")
+
+    # Fleet state of health over time, as the average and the weakest 5 % of the vans
+    state_of_health = ageing["state_of_health"]
+    years = np.arange(days) / DAYS_PER_YEAR
+    health_fig = go.Figure()
+    health_fig.add_trace(go.Scatter(x=years, y=state_of_health.mean(axis=0) * 100, mode="lines",
+                                    name="Fleet Average", line=dict(color="green")))
+    health_fig.add_trace(go.Scatter(x=years, y=np.percentile(state_of_health, 5, axis=0) * 100, mode="lines",
+                                    name="5th Percentile", line=dict(color="orange")))
+    health_fig.add_hline(y=ageing["minimum_state_of_health"] * 100, line_dash="dash", line_color="red",
+                         annotation_text="Replacement")
+    health_fig.update_layout(
+        title="Battery State of Health",
+        xaxis_title="Years",
+        yaxis_title="State of Health (%)",
+        template="plotly_white"
+    )
+    st.plotly_chart(health_fig, use_container_width=True)
+
+    if not include_replacements:
+        return None
+    # Months of 30 days, as the monthly costs above
+    return np.add.reduceat(ageing["replacements_per_day"], np.arange(0, days, 30)) * replacement_cost
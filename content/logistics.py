@@ -1,6 +1,18 @@
 import streamlit as st
 import math
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
 import config
+from batch_logistics import AREA_COLUMNS, calculate_area_table, aggregate_logistics
+from delivery_simulation import required_fleet_size
+from demand_model import REFERENCE_YEAR, peak_demand_fleet
+from design_chain import DESIGN_INPUT_DEFAULTS
+from fleet_mix import FLEET_FIELDS, load_vehicle_types, vehicle_type_costs, optimize_fleet_mix
+from interface import PROFILES_DIR, submit_job, job_status
+
+# Van counts the other tabs can use, the uniform demand count first
+FLEET_SIZE_SOURCES = ["Uniform demand", "Delivery simulation", "Peak demand"]
 
 
 def logistics():
@@ -35,6 +47,8 @@ def logistics():
     amount_of_shifts = st.number_input("Amount of shifts per day", min_value=0, value=3)
     total_working_hours_per_day = shift_length * amount_of_shifts
     st.session_state["total_working_hours_per_day"] = total_working_hours_per_day
+    st.session_state["shift_length"] = shift_length
+    st.session_state["amount_of_shifts"] = amount_of_shifts
 
     minimum_vans_needed = math.ceil(packages_per_day_in_area / (packaged_per_hour * total_working_hours_per_day))
     st.success(f"**Minimum needed vans for normal packages in area:** {minimum_vans_needed} vans")
@@ -52,6 +66,7 @@ def logistics():
     selected_amount_of_packages_per_van = st.number_input("Selected amount of packages per van", min_value=0, value=80)
 
     package_size = st.number_input("Average package size (m³)", min_value=0.0, value=0.027)
+    package_weight = st.number_input("Average package weight (kg)", min_value=0.0, value=2.5, step=0.5)
 
     package_volume = selected_amount_of_packages_per_van * package_size
     package_volume_safety_factor = st.number_input("Package volume safety factor", min_value=0.0, value=1.2)
@@ -95,6 +110,7 @@ def logistics():
     restaurant_crates_per_day_in_area = population * restaurant_crates_per_person_per_day
 
     st.success(f"**Total restaurant crates per day in area:** {restaurant_crates_per_day_in_area:.0f} crates")
+    crate_weight = st.number_input("Weight per full restaurant crate (kg)", min_value=0.0, value=12.0, step=0.5)
     actual_amount_of_crates = amount_of_crates_lengthwise * amount_of_crates_vertically * 2
     amount_of_crates_per_van_per_day = actual_amount_of_crates * amount_of_shifts
     st.write(f"**Amount of crates that a van can deliver per day:** {amount_of_crates_per_van_per_day}")
@@ -108,6 +124,263 @@ def logistics():
     total_vans_needed = minimum_vans_needed + minimum_vans_needed_restaurant
     st.error(f"**Total needed vans in area:** {total_vans_needed} vans")
 
+    st.markdown("---")
+    st.markdown(f"### **Delivery Simulation**")
+    st.write("The van count above assumes a perfectly uniform throughput. The simulation below delivers the packages "
+             "and restaurant crates shift by shift with varying stop times, van loads limited by the crate layout and "
+             "trips back to the depot to reload. The fleet is sized to reach the selected service level.")
+
+    stop_time_variation = st.number_input("Stop time variation (coefficient of variation)", min_value=0.05,
+                                          value=0.5, step=0.05)
+    reload_time = st.number_input("Depot round trip and reload time (h)", min_value=0.0, value=0.5, step=0.05)
+    crate_stop_time = st.number_input("Average time per restaurant crate delivery (h)", min_value=0.01, value=0.1,
+                                      step=0.01)
+    service_level = st.number_input("Service level (% delivered within their shift)", min_value=50.0,
+                                    max_value=100.0, value=98.0, step=0.5) / 100
+    simulated_days = st.number_input("Simulated days", min_value=1, max_value=365, value=30, step=1)
+
+    packages_per_load = math.floor(actual_amount_of_crates * internal_crate_volume /
+                                   (package_size * package_volume_safety_factor)) if package_size > 0 else 0
+    st.write(f"**Packages per van load:** {packages_per_load} packages")
+
+    simulation_inputs = (packages_per_day_in_area, restaurant_crates_per_day_in_area, packages_per_load,
+                         actual_amount_of_crates, shift_length, amount_of_shifts, packaged_per_hour, crate_stop_time,
+                         service_level, stop_time_variation, reload_time, simulated_days)
+
+    def run_delivery_simulation(progress):
+        package_fleet = required_fleet_size(
+            packages_per_day_in_area, packages_per_load, shift_length, amount_of_shifts, 1 / packaged_per_hour,
+            service_level, stop_time_variation, reload_time, simulated_days,
+            progress=lambda done, message: progress(done / 2, f"Packages: {message}"))
+        restaurant_fleet = required_fleet_size(
+            restaurant_crates_per_day_in_area, actual_amount_of_crates, shift_length, amount_of_shifts,
+            crate_stop_time, service_level, stop_time_variation, reload_time, simulated_days,
+            progress=lambda done, message: progress(0.5 + done / 2, f"Restaurant crates: {message}"))
+        return {"inputs": simulation_inputs, "package_fleet": package_fleet, "restaurant_fleet": restaurant_fleet}
+
+    if st.button("Run Delivery Simulation"):
+        if packages_per_load <= 0 or actual_amount_of_crates <= 0:
+            st.error("A van must be able to load at least one package and one restaurant crate.")
+        else:
+            submit_job("Delivery simulation", run_delivery_simulation)
+
+    simulation = job_status("Delivery simulation")
+    simulated_vans_needed = None
+    if simulation is not None:
+        package_fleet = simulation["package_fleet"]
+        restaurant_fleet = simulation["restaurant_fleet"]
+        if simulation["inputs"] != simulation_inputs:
+            st.info("The inputs have changed since the last simulation. Run it again to update the results.")
+
+        simulation_vans = package_fleet["number_of_vans"] + restaurant_fleet["number_of_vans"]
+        st.write(f"**Vans for packages:** {package_fleet['number_of_vans']} vans -> "
+                 f"{package_fleet['utilisation'] * 100:.1f} % utilisation, "
+                 f"{package_fleet['loads_per_van_per_shift']:.2f} loads per shift")
+        st.write(f"**Vans for restaurant crates:** {restaurant_fleet['number_of_vans']} vans -> "
+                 f"{restaurant_fleet['utilisation'] * 100:.1f} % utilisation, "
+                 f"{restaurant_fleet['loads_per_van_per_shift']:.2f} loads per shift")
+        if package_fleet["service_level_met"] and restaurant_fleet["service_level_met"]:
+            simulated_vans_needed = simulation_vans
+            st.success(f"**Simulated needed vans in area:** {simulated_vans_needed} vans")
+        else:
+            st.error(f"The service level is not reached with up to {simulation_vans} vans; the shifts are "
+                     f"too short or the van loads too small. The simulated fleet size cannot be used.")
+
+    peak_settings = peak_demand(packages_per_day_in_area, restaurant_crates_per_day_in_area, packaged_per_hour,
+                                actual_amount_of_crates, shift_length, amount_of_shifts, total_vans_needed)
+
+    # --- Fleet Size ---
+    st.markdown("---")
+    st.markdown(f"### **Fleet Size**")
+    fleet_size_source = st.radio("Fleet size used in the other tabs", FLEET_SIZE_SOURCES, horizontal=True,
+                                 key="fleet_size_source")
+    if fleet_size_source == "Delivery simulation":
+        if simulated_vans_needed is None:
+            st.warning("Run the delivery simulation with a reachable service level first. The uniform demand fleet "
+                       "size is used until then.")
+        else:
+            total_vans_needed = simulated_vans_needed
+    if fleet_size_source == "Peak demand":
+        total_vans_needed = peak_settings["total_vans_needed"]
+    else:
+        # Only the peak demand fleet sizes the areas of the batch below for their peak demand
+        peak_settings = None
+    st.success(f"**Fleet size:** {total_vans_needed} vans")
+
     st.session_state["total_vans_needed"] = total_vans_needed
+    # Payload of a full van at the start of a shift, for the payload-aware energy of the Drive Profile tab
+    st.session_state["package_van_payload_kg"] = selected_amount_of_packages_per_van * package_weight
+    st.session_state["restaurant_van_payload_kg"] = actual_amount_of_crates * crate_weight
     st.session_state["packages_per_day_in_area"] = packages_per_day_in_area
     st.session_state["restaurant_crates_per_day_in_area"] = restaurant_crates_per_day_in_area
+    st.session_state.setdefault("design_inputs", {}).update({
+        "population": population,
+        "packages_per_person_per_day": packages_per_person_per_day,
+        "restaurant_crates_per_person_per_day": restaurant_crates_per_person_per_day,
+        "packages_per_hour": packaged_per_hour,
+        "shift_length": shift_length,
+        "amount_of_shifts": amount_of_shifts,
+        "selected_amount_of_packages_per_van": selected_amount_of_packages_per_van,
+    })
+
+    fleet_mix(packages_per_day_in_area, restaurant_crates_per_day_in_area, packaged_per_hour, actual_amount_of_crates,
+              total_working_hours_per_day, amount_of_shifts, total_vans_needed)
+
+    st.markdown("---")
+    st.markdown(f"### **Multi-Area Batch**")
+    st.write("Calculates the packages, vans and crate layout for a table of areas at once. Upload a CSV file with the "
+             "columns below or edit the table directly. Missing columns use the inputs above.")
+    st.markdown("\n".join(f"- `{column}`: {description}" for column, description in AREA_COLUMNS.items()))
+
+    uploaded_areas = st.file_uploader("Area table (CSV)", type="csv")
+    if uploaded_areas is not None:
+        areas = pd.read_csv(uploaded_areas)
+    else:
+        areas = st.data_editor(pd.DataFrame({
+            "area": ["Area 1"],
+            "population": [population],
+            "packages_per_person_per_day": [packages_per_person_per_day],
+            "restaurant_crates_per_person_per_day": [restaurant_crates_per_person_per_day],
+            "shift_length": [shift_length],
+            "amount_of_shifts": [amount_of_shifts],
+        }), num_rows="dynamic", hide_index=True)
+
+    if "population" not in areas:
+        st.error("The area table needs a 'population' column.")
+        return
+
+    area_table = calculate_area_table(
+        areas, packages_per_person_per_day=packages_per_person_per_day,
+        restaurant_crates_per_person_per_day=restaurant_crates_per_person_per_day,
+        packages_per_hour=packaged_per_hour, shift_length=shift_length, amount_of_shifts=amount_of_shifts,
+        selected_amount_of_packages_per_van=selected_amount_of_packages_per_van, package_size=package_size,
+        package_volume_safety_factor=package_volume_safety_factor, crate_depth=crate_depth, crate_width=crate_width,
+        crate_height=crate_height, internal_crate_volume=internal_crate_volume, van_height=van_height,
+    )
+    if peak_settings is not None:
+        # Every area sized for the same percentile of its hourly demand, shifts missing from the table use the inputs
+        area_shifts = {column: pd.to_numeric(area_table[column], errors='coerce').fillna(0).to_numpy()
+                       if column in area_table else default
+                       for column, default in (("shift_length", shift_length), ("amount_of_shifts", amount_of_shifts))}
+        peak = peak_demand_fleet(
+            area_table["packages_per_day_in_area"], area_table["restaurant_crates_per_day_in_area"],
+            packaged_per_hour, area_table["actual_amount_of_crates"], area_shifts["shift_length"],
+            area_shifts["amount_of_shifts"], peak_settings["first_shift_start_h"], peak_settings["percentile"],
+            peak_settings["year"])
+        area_table["minimum_vans_needed"] = peak["package_vans"]
+        area_table["minimum_vans_needed_restaurant"] = peak["restaurant_vans"]
+        area_table["total_vans_needed"] = peak["package_vans"] + peak["restaurant_vans"]
+    st.dataframe(area_table, hide_index=True)
+
+    area_totals = aggregate_logistics(area_table)
+    st.write(f"**Total packages per day:** {area_totals['packages_per_day_in_area']:,.0f} packages")
+    st.write(f"**Total restaurant crates per day:** {area_totals['restaurant_crates_per_day_in_area']:,.0f} crates")
+    st.success(f"**Total needed vans in all areas:** {area_totals['total_vans_needed']:,} vans")
+
+    if st.checkbox("Use area totals in the financials"):
+        for key, value in area_totals.items():
+            st.session_state[key] = value
+
+
+def peak_demand(packages_per_day_in_area, restaurant_crates_per_day_in_area, packages_per_hour, crates_per_load,
+                shift_length, amount_of_shifts, total_vans_needed):
+    """Fleet size for a percentile of the hourly demand; returns it with the settings of the demand model."""
+    st.markdown("---")
+    st.markdown(f"### **Peak Demand**")
+    st.write("Deliveries are not spread evenly: the demand model below distributes the daily packages and restaurant "
+             "crates over the hours of the shifts, the weekdays and the seasons of a year, and sizes the fleet for a "
+             "percentile of the hourly demand.")
+
+    first_shift_start_h = st.number_input("First shift start (hour of day)", min_value=0, max_value=23, value=6)
+    percentile = st.number_input("Covered hours (percentile of the hourly demand)", min_value=50.0,
+                                 max_value=100.0, value=95.0, step=1.0)
+    year = st.number_input("Calendar year of the demand", min_value=1971, max_value=2100, value=REFERENCE_YEAR,
+                           help="The weekdays of this year set the demand of every day.")
+
+    peak = peak_demand_fleet(packages_per_day_in_area, restaurant_crates_per_day_in_area, packages_per_hour,
+                             crates_per_load, shift_length, amount_of_shifts, first_shift_start_h, percentile, year)
+    package_vans = int(peak["package_vans"][0])
+    restaurant_vans = int(peak["restaurant_vans"][0])
+    st.write(f"**Vans for packages:** {package_vans} vans")
+    st.write(f"**Vans for restaurant crates:** {restaurant_vans} vans")
+    st.success(f"**Peak demand needed vans in area:** {package_vans + restaurant_vans} vans "
+               f"(uniform demand: {total_vans_needed} vans)")
+
+    # Vans needed in every hour of the year
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vans_per_hour = (peak["package_demand"][0] / max(packages_per_hour, 1e-9) +
+                         peak["crate_demand"][0] * shift_length / max(crates_per_load, 1e-9))
+    vans_fig = go.Figure(go.Heatmap(
+        z=vans_per_hour.reshape(-1, 24).T, x=np.arange(1, len(vans_per_hour) // 24 + 1), y=np.arange(24),
+        colorscale="Viridis", colorbar=dict(title="Vans"),
+        hovertemplate="Day %{x}, %{y}:00: %{z:.1f} vans<extra></extra>"))
+    vans_fig.update_layout(
+        title=f"Vans Needed per Hour in {year}",
+        xaxis_title="Day of the Year",
+        yaxis_title="Hour of the Day",
+        template="plotly_white"
+    )
+    st.plotly_chart(vans_fig, use_container_width=True)
+
+    return {"total_vans_needed": package_vans + restaurant_vans, "first_shift_start_h": first_shift_start_h,
+            "percentile": percentile, "year": year}
+
+
+def fleet_mix(packages_per_day_in_area, restaurant_crates_per_day_in_area, packages_per_hour, crates_per_load,
+              total_working_hours_per_day, amount_of_shifts, total_vans_needed):
+    st.markdown("---")
+    st.markdown(f"### **Fleet Mix**")
+    st.write("Chooses the mix of the saved vehicle profiles that delivers all packages and restaurant crates at the "
+             "lowest cost of ownership, with the cost model of the Financials tab. Vehicle profiles can hold these "
+             "optional fields, otherwise the inputs above are used:")
+    st.markdown("\n".join(f"- `{field}`: {description}" for field, description in FLEET_FIELDS.items()))
+
+    if st.session_state.get("speed_mps") is None:
+        st.info("Select a drive profile in the Drive Profile tab to optimize the fleet mix.")
+        return
+    vehicle_types = load_vehicle_types(PROFILES_DIR)
+    if not vehicle_types:
+        st.info("Save at least one vehicle profile in the sidebar to optimize the fleet mix.")
+        return
+
+    horizon_months = st.number_input("Cost of ownership horizon (months)", min_value=1, max_value=240, value=60,
+                                     step=12)
+
+    design_inputs = {**DESIGN_INPUT_DEFAULTS, **st.session_state.get("design_inputs", {})}
+    defaults = {
+        "mass": config.mass,
+        "vehicle_height": config.vehicle_height,
+        "vehicle_width": config.vehicle_width,
+        "cost_per_van": design_inputs["cost_per_car"],
+        "packages_per_hour": packages_per_hour,
+        "crates_per_load": crates_per_load,
+    }
+    type_costs = vehicle_type_costs(
+        vehicle_types, defaults, st.session_state["speed_mps"], st.session_state["acceleration"],
+        st.session_state["time_interval_s"], design_inputs["regen_efficiency"], config.C0, config.C1,
+        design_inputs["total_distance_km"], design_inputs["battery_efficiency"],
+        design_inputs["auxiliary_load_factor"], design_inputs["motor_voltage"], design_inputs["nominal_cell_voltage"],
+        design_inputs["cell_capacity_ah"], design_inputs["kwh_price"], design_inputs["maintenance_cost"],
+        design_inputs["other_costs"], design_inputs["insurance_cost"], design_inputs["road_tax_cost"],
+        design_inputs["hourly_employee_cost"], total_working_hours_per_day, horizon_months)
+
+    try:
+        mix = optimize_fleet_mix(type_costs, packages_per_day_in_area, restaurant_crates_per_day_in_area,
+                                 amount_of_shifts)
+    except ValueError as error:
+        st.error(str(error))
+        return
+
+    st.dataframe(pd.DataFrame({
+        "Vehicle": type_costs["name"],
+        "Wh/km": type_costs["wh_per_km"],
+        "Pack (kWh)": type_costs["final_capacity_kwh"],
+        "Packages per Day": type_costs["packages_per_day"],
+        "Crates per Shift": type_costs["crates_per_load"],
+        "Cost of Ownership (\u20ac)": type_costs["cost_of_ownership"],
+        "Package Vans": mix["package_vans"],
+        "Restaurant Vans": mix["restaurant_vans"],
+    }).style.format(precision=0), hide_index=True, use_container_width=True)
+
+    st.success(f"**Optimized fleet:** {mix['total_vans']} vans, \u20ac{mix['total_cost_of_ownership']:,.0f} cost of "
+               f"ownership over {horizon_months} months (current design: {total_vans_needed} vans)")
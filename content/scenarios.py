@@ -11,12 +11,11 @@ from calculations import (
     calculate_angular_velocity,
     calculate_torque_required,
 )
+from content.velocity_profile import design_space_heatmap
+from shared_results import page_inputs, store_page_inputs, predefined_scenarios, highest_power_and_torque
 
 
 def scenarios():
-    st.session_state["highest_power"] = 0
-    st.session_state["highest_torque"] = 0
-
     st.title("Scenarios")
 
     st.write("The calculations below are based on the current vehicle configuration, selected requirements, "
@@ -25,66 +24,30 @@ def scenarios():
 
     st.markdown("---")
 
-    # Inputs
+    # Inputs, kept for the highest power and torque the other tabs read
+    inputs = page_inputs()
     st.markdown(f"### **Inputs**")
     input1, input2, input3, input4 = st.columns(4)
 
     with input1:
-        current_speed = st.number_input("Speed (km/h)", min_value=0, max_value=400, value=60)
+        current_speed = st.number_input("Speed (km/h)", min_value=0, max_value=400,
+                                        value=inputs["scenario_speed_kph"])
     with input2:
-        current_road_angle = st.number_input("Incline (%)", min_value=0.0, max_value=45.0, value=5.0, step=1.0)
+        current_road_angle = st.number_input("Incline (%)", min_value=0.0, max_value=45.0,
+                                             value=inputs["scenario_grade_percent"], step=1.0)
     with input3:
-        current_acceleration = st.number_input("Acceleration (m/s²)", min_value=0.0, max_value=20.0, value=1.0)
+        current_acceleration = st.number_input("Acceleration (m/s²)", min_value=0.0, max_value=20.0,
+                                               value=inputs["scenario_acceleration"])
     with input4:
-        headwind_speed = st.number_input("Headwind (km/h)", min_value=0, max_value=100, value=0)
+        headwind_speed = st.number_input("Headwind (km/h)", min_value=0, max_value=100,
+                                         value=inputs["scenario_headwind_kph"])
+    store_page_inputs(scenario_speed_kph=current_speed, scenario_grade_percent=current_road_angle,
+                      scenario_acceleration=current_acceleration, scenario_headwind_kph=headwind_speed)
 
     st.write("##")
 
     # Predefined Scenarios
-    scenarios = [
-        {
-            "name": "Current Situation",
-            "speed_kph": current_speed,
-            "grade_percent": current_road_angle,
-            "acceleration": current_acceleration,
-            "headwind_kph": headwind_speed,
-        },
-        {
-            "name": "Static Top Speed Requirement",
-            "speed_kph": config.top_speed,
-            "grade_percent": 0,
-            "acceleration": 0,
-            "headwind_kph": headwind_speed,
-        },
-        {
-            "name": f"Time to {config.top_speed if config.top_speed < 100 else 100} km/h in {round(config.time_to_100, 2)} seconds",
-            "speed_kph": config.top_speed if config.top_speed < 100 else 100,
-            "grade_percent": 0,
-            "acceleration": round(config.time_to_100_acceleration, 2),
-            "headwind_kph": 0,
-        },
-        {
-            "name": "Flat Roads",
-            "speed_kph": config.top_speed if config.top_speed < 100 else 100,
-            "grade_percent": 0,
-            "acceleration": 0,
-            "headwind_kph": headwind_speed,
-        },
-        {
-            "name": "Inclines",
-            "speed_kph": 5,
-            "grade_percent": 20,
-            "acceleration": 0,
-            "headwind_kph": headwind_speed,
-        },
-        {
-            "name": "Acceleration",
-            "speed_kph": 50,
-            "grade_percent": 0,
-            "acceleration": 1.5,
-            "headwind_kph": headwind_speed,
-        },
-    ]
+    scenarios = predefined_scenarios()
 
     for scenario in scenarios:
         with st.container():
@@ -121,16 +84,6 @@ def scenarios():
             else:
                 torque_required = calculate_torque_required(power_required, angular_velocity)
 
-            # if "highest_power" not in st.session_state:
-            #     st.session_state["highest_power"] = 0
-            # if "highest_torque" not in st.session_state:
-            #     st.session_state["highest_torque"] = 0
-
-            if power_required > st.session_state["highest_power"]:
-                st.session_state["highest_power"] = power_required
-            if torque_required > st.session_state["highest_torque"]:
-                st.session_state["highest_torque"] = torque_required
-
             with col2:
                 with st.container():
                     st.success(f"**Required Propulsion Power:** {power_required / 1000:.0f} kW")
@@ -138,6 +91,10 @@ def scenarios():
 
             st.markdown("---")
 
+    highest_power, highest_torque = highest_power_and_torque()
     st.subheader("Highest Calculated Power and Torque")
-    st.error(f"**Power:** {st.session_state['highest_power'] / 1000:.0f} kW")
-    st.error(f"**Torque:** {st.session_state['highest_torque']:.0f} Nm")
+    st.error(f"**Power:** {highest_power / 1000:.0f} kW")
+    st.error(f"**Torque:** {highest_torque:.0f} Nm")
+
+    st.markdown("---")
+    design_space_heatmap()
@@ -0,0 +1,160 @@
+import hashlib
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import config
+from design_chain import DESIGN_INPUT_DEFAULTS, evaluate_design_chain
+from profile_comparison import motor_map_parameters
+from sensitivity import perturbation_ranges, tornado_analysis, sobol_indices
+from interface import submit_job, job_status
+from shared_results import gear_ratio as shared_gear_ratio
+
+OUTPUT_LABELS = {
+    "break_even_months": "Break-Even Point (months, without battery replacements, capped at the horizon)",
+    "npv": "Net Present Value without Battery Replacements (\u20ac)",
+    "final_capacity_kwh": "Final Pack Capacity (kWh)",
+    "wh_per_km": "Energy Consumption (Wh/km)",
+    "peak_power_w": "Peak Tractive Power (W)",
+    "total_monthly_cost": "Total Monthly Costs (\u20ac)",
+}
+
+# Whole-number inputs are not perturbed
+FIXED_INPUTS = ["amount_of_shifts", "horizon_years", "loan_years", "vehicle_life_years"]
+
+# Absolute ranges of the inputs that are often zero, where a relative perturbation would not move them
+ZERO_BASELINE_RANGES = {
+    "financed_share": (0.0, 0.5),
+    "cost_inflation": (0.0, 0.05),
+    "revenue_inflation": (0.0, 0.05),
+    "discount_rate": (0.0, 0.15),
+    "loan_rate": (0.0, 0.10),
+}
+
+
+def sensitivity():
+    st.title("Sensitivity Analysis")
+
+    st.write("The chain from vehicle mass to energy consumption, pack size, charging cost and break-even point spans "
+             "several tabs. The analysis below perturbs the inputs of the sidebar, battery, logistics and financials "
+             "together and ranks which of them drive the outcome.")
+
+    st.markdown("---")
+
+    if st.session_state.get("speed_mps") is None:
+        st.info("Select a drive profile in the Drive Profile tab to run the sensitivity analysis.")
+        return
+
+    # Current design as the baseline
+    baseline = {**DESIGN_INPUT_DEFAULTS, **st.session_state.get("design_inputs", {})}
+    baseline.update({
+        "mass": config.mass,
+        "vehicle_height": config.vehicle_height,
+        "vehicle_width": config.vehicle_width,
+        "C0": config.C0,
+        "C1": config.C1,
+    })
+    baseline = {name: float(value) for name, value in baseline.items()}
+
+    speed_mps = st.session_state["speed_mps"]
+    acceleration = st.session_state["acceleration"]
+    time_interval_s = st.session_state["time_interval_s"]
+    motor_map = st.session_state.get("motor_map")
+    gear_ratio = shared_gear_ratio()
+
+    def evaluate(inputs):
+        return evaluate_design_chain(inputs, speed_mps, acceleration, time_interval_s, motor_map=motor_map,
+                                     wheel_radius=config.wheel_radius, gear_ratio=gear_ratio)
+
+    st.markdown("### **Inputs**")
+    perturbable = [name for name in baseline if name not in FIXED_INPUTS]
+    selected_inputs = st.multiselect("Inputs to perturb", perturbable, default=perturbable)
+    relative_change = st.number_input("Perturbation (\u00b1 %)", min_value=1.0, max_value=90.0, value=10.0,
+                                      step=1.0) / 100
+    output = st.selectbox("Output", list(OUTPUT_LABELS), format_func=OUTPUT_LABELS.get)
+
+    if not selected_inputs:
+        st.warning("Select at least one input to perturb.")
+        return
+
+    # Every range can be overridden in the table, inputs with a zero baseline start from an absolute range
+    ranges = perturbation_ranges(baseline, selected_inputs, relative_change, ZERO_BASELINE_RANGES)
+    st.write("Ranges of the inputs, relative to the baseline except for inputs that are zero:")
+    edited_ranges = st.data_editor(pd.DataFrame({
+        "Input": list(ranges),
+        "Baseline": [baseline[name] for name in ranges],
+        "Low": [low for low, _ in ranges.values()],
+        "High": [high for _, high in ranges.values()],
+    }), disabled=["Input", "Baseline"], hide_index=True, key="sensitivity_ranges")
+    ranges = {row.Input: (float(row.Low), float(row.High)) for row in edited_ranges.itertuples()}
+    if any(not low <= high for low, high in ranges.values()):
+        st.error("The low value of every input must not exceed its high value.")
+        return
+    baseline_result = evaluate(baseline)
+    st.write(f"**Baseline {OUTPUT_LABELS[output]}:** {np.ravel(baseline_result[output])[0]:,.2f}")
+
+    # --- One-At-A-Time Tornado ---
+    st.markdown("---")
+    st.markdown("### **Tornado Chart**")
+    tornado = tornado_analysis(evaluate, baseline, ranges, [output])[output]
+    tornado = [row for row in tornado if row[3] > 0][:15][::-1]
+    baseline_value = np.ravel(baseline_result[output])[0]
+
+    tornado_fig = go.Figure()
+    tornado_fig.add_trace(go.Bar(
+        y=[row[0] for row in tornado], x=[row[1] - baseline_value for row in tornado],
+        base=baseline_value, orientation='h', name="Low",
+        marker=dict(color='blue')
+    ))
+    tornado_fig.add_trace(go.Bar(
+        y=[row[0] for row in tornado], x=[row[2] - baseline_value for row in tornado],
+        base=baseline_value, orientation='h', name="High",
+        marker=dict(color='red')
+    ))
+    tornado_fig.update_layout(
+        title=f"One-At-A-Time Sensitivity of {OUTPUT_LABELS[output]}",
+        xaxis_title=OUTPUT_LABELS[output],
+        barmode='overlay',
+        template='plotly_white',
+        height=max(400, 30 * len(tornado)),
+    )
+    st.plotly_chart(tornado_fig, use_container_width=True)
+
+    # --- Sobol Indices ---
+    st.markdown("---")
+    st.markdown("### **Variance-Based Sobol Indices**")
+    st.write("All selected inputs are varied at the same time, uniformly within their range. The first-order index is "
+             "the share of the output variance caused by an input alone, the total index includes its interactions "
+             "with the other inputs.")
+    samples = st.number_input("Base samples", min_value=100, max_value=20000, value=1000, step=100)
+    st.write(f"**Designs to evaluate:** {samples * (len(selected_inputs) + 2):,}")
+
+    # Everything the indices depend on, to tell whether the last analysis is still current
+    profile_digest = hashlib.sha256(np.ascontiguousarray(speed_mps).tobytes() +
+                                    np.ascontiguousarray(acceleration).tobytes()).hexdigest()
+    analysis_inputs = (tuple(sorted(baseline.items())), tuple(sorted(ranges.items())), samples,
+                       profile_digest,
+                       tuple(sorted(motor_map_parameters(motor_map, config.wheel_radius, gear_ratio).items())))
+
+    def run_sobol_analysis(progress):
+        return {
+            "analysis_inputs": analysis_inputs,
+            "inputs": selected_inputs,
+            "indices": sobol_indices(evaluate, baseline, ranges, list(OUTPUT_LABELS), samples=samples,
+                                     progress=progress),
+        }
+
+    if st.button("Run Sobol Analysis"):
+        submit_job("Sobol analysis", run_sobol_analysis)
+
+    sobol_result = job_status("Sobol analysis")
+    if sobol_result is not None:
+        if sobol_result["analysis_inputs"] != analysis_inputs:
+            st.info("The inputs have changed since the last simulation. Run it again to update the results.")
+        indices = sobol_result["indices"][output]
+        sobol_df = pd.DataFrame({
+            "Input": sobol_result["inputs"],
+            "First-Order Index": indices["first_order"],
+            "Total Index": indices["total"],
+        }).sort_values("Total Index", ascending=False)
+        st.dataframe(sobol_df, hide_index=True)
@@ -8,9 +8,32 @@ from calculations import (
     calculate_terminal_power,
     calculate_peak_power,
     calculate_mean_power,
-    calculate_terminal_velocity
+    calculate_terminal_velocity,
+    calculate_acceleration_design_space,
 )
 
+# Grid axes of the design-space heatmaps: (label, parameter, default range from the current design)
+HEATMAP_AXES = {
+    "Tractive Force × Frontal Area": [
+        ("Tractive Force (N)", "tractive_force", lambda force: (0.25 * force, 2.0 * force)),
+        ("Frontal Area (m²)", "frontal_area", lambda force: (0.5 * config.frontal_area, 1.5 * config.frontal_area)),
+    ],
+    "Mass × C0": [
+        ("Vehicle Mass (kg)", "mass", lambda force: (0.5 * config.mass, 2.0 * config.mass)),
+        ("Static Rolling Resistance Coefficient (C0)", "C0", lambda force: (0.005, 0.05)),
+    ],
+}
+
+HEATMAP_OUTPUTS = {
+    "Terminal Velocity (km/h)": ("terminal_velocity", 3.6),
+    "Time to 98 % of Terminal Velocity (s)": ("time_to_terminal_velocity", 1),
+    "Peak Tractive Power (kW)": ("peak_power", 1 / 1000),
+    "Mean Tractive Power (kW)": ("mean_power", 1 / 1000),
+}
+
+# Cells per axis sent to the browser; the grid itself is evaluated at full resolution
+MAX_DISPLAY_CELLS = 400
+
 
 def velocity_profile(k1, k2):
     time_array = np.linspace(0, 80, 100)
@@ -155,3 +178,60 @@ def tractive_power_profile(f_tr, terminal_velocity, k1, k2, tf):
     st.success(f"Terminal Power (P_T): **{terminal_power / 1000:.2f} kW**")
     st.success(f"Peak Tractive Power (P_TRpk): **{peak_power / 1000:.2f} kW**")
     st.success(f"Mean Tractive Power (P̄_TR): **{mean_power / 1000:.2f} kW**")
+
+
+def design_space_heatmap():
+    st.header("Design-Space Heatmap")
+    st.write("Terminal velocity, time to 98 % of the terminal velocity, peak and mean tractive power of the analytic "
+             "acceleration model over a grid of two design parameters. All other parameters are those of the "
+             "sidebar.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        axes = st.selectbox("Grid", list(HEATMAP_AXES))
+        output = st.selectbox("Heatmap Output", list(HEATMAP_OUTPUTS))
+    with col2:
+        tractive_force = st.number_input("Tractive Force (N):", min_value=100, max_value=100000,
+                                         value=int(min(config.mass * 100 / 3.6 / max(config.time_to_100, 0.1), 100000)),
+                                         step=100)
+        tf = st.number_input("Acceleration Time t_f (s):", min_value=0.1, max_value=120.0,
+                             value=float(config.time_to_100), step=0.5)
+    resolution = st.slider("Grid Resolution (points per axis)", min_value=50, max_value=1000, value=500, step=50)
+
+    # Both axes as one column and one row vector, broadcast to the full grid in one evaluation
+    (x_label, x_name, x_range), (y_label, y_name, y_range) = HEATMAP_AXES[axes]
+    x_values = np.linspace(*x_range(tractive_force), resolution)
+    y_values = np.linspace(*y_range(tractive_force), resolution)
+    parameters = {
+        "tractive_force": tractive_force,
+        "mass": config.mass,
+        "frontal_area": config.frontal_area,
+        "C0": config.C0,
+        "C1": config.C1,
+    }
+    parameters[x_name] = x_values[np.newaxis, :]
+    parameters[y_name] = y_values[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = calculate_acceleration_design_space(tf=tf, **parameters)
+
+    name, scale = HEATMAP_OUTPUTS[output]
+    grid = results[name] * scale
+
+    step = max(1, -(-resolution // MAX_DISPLAY_CELLS))
+    heatmap_fig = go.Figure(go.Heatmap(
+        x=x_values[::step], y=y_values[::step], z=grid[::step, ::step].astype(np.float32),
+        colorscale='Viridis', colorbar=dict(title=output),
+    ))
+    heatmap_fig.update_layout(
+        title=output,
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        template='plotly_white',
+    )
+    st.plotly_chart(heatmap_fig, use_container_width=True)
+
+    feasible = np.isfinite(grid)
+    st.write(f"**Grid:** {resolution} × {resolution} designs, {feasible.mean() * 100:.0f} % of which overcome the "
+             f"static rolling resistance.")
+    if feasible.any():
+        st.write(f"**Range of {output}:** {np.nanmin(grid):.2f} – {np.nanmax(grid):.2f}")
@@ -0,0 +1,129 @@
+import math
+import numpy as np
+
+
+def simulate_delivery_fleet(demand_per_day, number_of_vans, load_capacity, shift_length_h, amount_of_shifts,
+                            mean_stop_time_h, stop_time_cv=0.5, reload_time_h=0.5, days=30, seed=0):
+    """
+    Discrete-event simulation of a van fleet delivering from a single depot over a number of days.
+
+    The demand per shift is Poisson distributed. Every van loads at the depot, delivers its load and returns to
+    reload as long as there is demand and time left in the shift. The dispatcher spreads the demand evenly over
+    the fleet, hands out loads to the van that is back first and never loads more than a van is expected to
+    deliver in the time left. Stop times are gamma distributed, so the time to deliver a load of n items is gamma
+    distributed as well. Items that cannot be delivered before the end of the shift are missed.
+
+    Depot events are processed in rounds: every round handles the next load of every van in every shift at once,
+    so all days and vans are simulated together with array operations.
+    """
+    rng = np.random.default_rng(seed)
+    shift_demands = rng.poisson(demand_per_day / amount_of_shifts, size=days * amount_of_shifts)
+    shifts = len(shift_demands)
+    if number_of_vans <= 0:
+        return {
+            "number_of_vans": 0,
+            "on_time_rate": 1.0 if shift_demands.sum() == 0 else 0.0,
+            "fully_served_shifts": np.mean(shift_demands == 0),
+            "utilisation": 0.0,
+            "loads_per_van_per_shift": 0.0,
+        }
+
+    shape_per_item = 1 / stop_time_cv ** 2
+    scale = mean_stop_time_h * stop_time_cv ** 2
+    fair_share = np.ceil(shift_demands / number_of_vans)[:, np.newaxis]
+
+    free_at = np.zeros((shifts, number_of_vans))
+    remaining = shift_demands.astype(float)
+    delivered = np.zeros(shifts)
+    busy_h = 0.0
+    loads = 0
+    while True:
+        # --- Depot: hand out the next load to every van that is back in time ---
+        deliverable = np.floor((shift_length_h - free_at - reload_time_h) / mean_stop_time_h)
+        wanted = np.clip(np.minimum(np.minimum(deliverable, fair_share), load_capacity), 0, None)
+        order = np.argsort(free_at, axis=1, kind='stable')
+        wanted_in_order = np.take_along_axis(wanted, order, axis=1)
+        handed_out_before = np.cumsum(wanted_in_order, axis=1) - wanted_in_order
+        load_in_order = np.clip(remaining[:, np.newaxis] - handed_out_before, 0, wanted_in_order)
+        load = np.empty_like(load_in_order)
+        np.put_along_axis(load, order, load_in_order, axis=1)
+
+        dispatched = load > 0
+        if not dispatched.any():
+            break
+        remaining -= load.sum(axis=1)
+        loads += np.count_nonzero(dispatched)
+
+        # --- Route: deliver the load, or as much of it as the shift allows ---
+        delivery_time = np.zeros_like(load)
+        delivery_time[dispatched] = rng.gamma(shape_per_item * load[dispatched], scale)
+        finished = free_at + reload_time_h + delivery_time
+        on_time = dispatched & (finished <= shift_length_h)
+        late = dispatched & ~on_time
+
+        time_left = np.maximum(shift_length_h - free_at - reload_time_h, 0)
+        delivered += np.sum(np.where(on_time, load, 0), axis=1)
+        delivered += np.sum(np.where(late, load * np.minimum(time_left / np.where(late, delivery_time, 1), 1), 0),
+                            axis=1)
+        busy_h += np.sum(finished[on_time] - free_at[on_time]) + np.sum(shift_length_h - free_at[late])
+
+        free_at = np.where(on_time, finished, np.where(dispatched | (deliverable < 1), np.inf, free_at))
+
+    total_demand = shift_demands.sum()
+    return {
+        "number_of_vans": number_of_vans,
+        "on_time_rate": delivered.sum() / total_demand if total_demand > 0 else 1.0,
+        "fully_served_shifts": np.mean(delivered >= shift_demands - 1e-9),
+        "utilisation": busy_h / (number_of_vans * shift_length_h * shifts),
+        "loads_per_van_per_shift": loads / (number_of_vans * shifts),
+    }
+
+
+def required_fleet_size(demand_per_day, load_capacity, shift_length_h, amount_of_shifts, mean_stop_time_h,
+                        service_level=0.98, stop_time_cv=0.5, reload_time_h=0.5, days=30, seed=0, progress=None):
+    """
+    Smallest fleet whose simulated on-time rate reaches the service level.
+
+    The search starts from the fleet that would be needed with perfectly uniform throughput, grows the upper
+    bound until the service level is met and then bisects. Every candidate is simulated with the same seed.
+    When even the largest fleet of the search misses the service level, that fleet is returned with
+    `service_level_met` False. The optional `progress` callback receives an estimate of the fraction of the
+    search that is done.
+    """
+    if demand_per_day <= 0:
+        return {**simulate_delivery_fleet(0, 0, load_capacity, shift_length_h, amount_of_shifts, mean_stop_time_h,
+                                          stop_time_cv, reload_time_h, days, seed), "service_level_met": True}
+    if load_capacity <= 0:
+        raise ValueError("A van must be able to load at least one item.")
+
+    simulations = 0
+
+    def simulate(number_of_vans):
+        nonlocal simulations
+        if progress is not None:
+            progress(min(1 - 0.5 ** (simulations / 2), 0.99), f"Simulating {number_of_vans} vans")
+        simulations += 1
+        return simulate_delivery_fleet(demand_per_day, number_of_vans, load_capacity, shift_length_h,
+                                       amount_of_shifts, mean_stop_time_h, stop_time_cv, reload_time_h, days, seed)
+
+    lower = max(1, math.floor(demand_per_day / amount_of_shifts * mean_stop_time_h / shift_length_h))
+    upper = lower
+    largest_fleet = 100 * lower + 100
+    result = simulate(upper)
+    while result["on_time_rate"] < service_level and upper < largest_fleet:
+        lower = upper + 1
+        upper = math.ceil(upper * 1.25) + 1
+        result = simulate(upper)
+    if result["on_time_rate"] < service_level:
+        return {**result, "service_level_met": False}
+
+    best = result
+    while lower < upper:
+        middle = (lower + upper) // 2
+        candidate = simulate(middle)
+        if candidate["on_time_rate"] >= service_level:
+            upper = middle
+            best = candidate
+        else:
+            lower = middle + 1
+    return {**best, "service_level_met": True}
@@ -0,0 +1,114 @@
+import numpy as np
+
+# Relative demand per hour of the day, weekday (Monday first) and month. Illustrative shapes for home deliveries
+# and restaurant supply, to be replaced by measured profiles of the area.
+PACKAGE_HOURLY_PROFILE = np.array([0, 0, 0, 0, 0, 0, 1, 2, 4, 6, 8, 9, 9, 8, 7, 7, 8, 9, 10, 9, 7, 4, 1, 0],
+                                  dtype=float)
+RESTAURANT_HOURLY_PROFILE = np.array([0, 0, 0, 0, 1, 4, 9, 10, 10, 9, 7, 5, 3, 2, 2, 3, 4, 3, 2, 1, 0, 0, 0, 0],
+                                     dtype=float)
+PACKAGE_WEEKDAY_FACTORS = np.array([1.2, 1.1, 1.0, 1.0, 1.05, 0.9, 0.3])
+RESTAURANT_WEEKDAY_FACTORS = np.array([0.8, 0.9, 1.0, 1.05, 1.25, 1.25, 0.6])
+PACKAGE_MONTHLY_FACTORS = np.array([0.95, 0.85, 0.9, 0.9, 0.95, 0.9, 0.85, 0.85, 0.95, 1.0, 1.25, 1.45])
+RESTAURANT_MONTHLY_FACTORS = np.array([0.85, 0.85, 0.95, 1.0, 1.05, 1.1, 1.15, 1.15, 1.05, 1.0, 0.9, 0.95])
+
+# Calendar year whose weekdays the demand is laid out on, fixed so that a fleet size does not change with the date
+REFERENCE_YEAR = 2025
+
+
+def calendar_days(year):
+    """Weekday (Monday = 0) and month (January = 0) of every day of a year."""
+    days = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+    # 1970-01-01, day zero of datetime64, was a Thursday
+    weekday = (days.astype(int) + 3) % 7
+    month = days.astype("datetime64[M]").astype(int) % 12
+    return weekday, month
+
+
+def operating_hours(first_shift_start_h, total_working_hours_per_day):
+    """Hours of the day within the shifts, for one or more areas (areas x 24)."""
+    start = np.asarray(first_shift_start_h, dtype=float)[..., np.newaxis]
+    hours = np.asarray(total_working_hours_per_day, dtype=float)[..., np.newaxis]
+    return (np.arange(24) - np.floor(start)) % 24 < np.minimum(hours, 24)
+
+
+def hourly_demand(daily_demand, hourly_profile, weekday_factors, monthly_factors, open_hours=None,
+                  year=REFERENCE_YEAR):
+    """
+    Demand in every hour of a year for one or more areas, as an areas x hours array.
+
+    The weekday and monthly factors set the demand of every day and are scaled so that the average day of the
+    year has the daily demand. The hourly profile spreads a day over its hours; with `open_hours` (24 or areas x
+    24 booleans) the demand is spread over the opening hours only, as deliveries cannot happen outside them.
+    """
+    daily_demand = np.atleast_1d(np.asarray(daily_demand, dtype=float))
+    weekday, month = calendar_days(year)
+    day_factors = np.asarray(weekday_factors, dtype=float)[weekday] * np.asarray(monthly_factors, dtype=float)[month]
+    day_factors /= day_factors.mean()
+
+    hour_shares = np.broadcast_to(np.asarray(hourly_profile, dtype=float), (len(daily_demand), 24))
+    if open_hours is not None:
+        hour_shares = np.where(open_hours, hour_shares, 0)
+        # Opening hours without any demand in the profile are spread evenly
+        hour_shares = np.where(hour_shares.sum(axis=-1, keepdims=True) > 0, hour_shares, open_hours)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hour_shares = np.nan_to_num(hour_shares / hour_shares.sum(axis=-1, keepdims=True))
+
+    demand = daily_demand[:, np.newaxis, np.newaxis] * day_factors[:, np.newaxis] * hour_shares[:, np.newaxis, :]
+    return demand.reshape(len(daily_demand), -1)
+
+
+def peak_fleet_size(hourly_demand, throughput_per_van_hour, percentile=95.0):
+    """
+    Vans per area that meet the demand in `percentile` % of the hours with demand.
+
+    Every hour needs its demand divided by the throughput of one van per hour, rounded up. Van counts are whole
+    numbers, so the percentile follows from a count of the hours per van count instead of sorting all hours. At
+    the 100th percentile the fleet covers the busiest hour of the year.
+    """
+    hourly_demand = np.atleast_2d(hourly_demand)
+    throughput = np.broadcast_to(np.asarray(throughput_per_van_hour, dtype=float), len(hourly_demand))
+
+    # Vans per hour, computed in place in one buffer as the array spans all hours of all areas
+    vans_per_hour = np.zeros(hourly_demand.shape)
+    serving = throughput > 0
+    np.divide(hourly_demand, throughput[:, np.newaxis], out=vans_per_hour, where=serving[:, np.newaxis])
+    vans_per_hour -= 1e-9
+    np.ceil(vans_per_hour, out=vans_per_hour)
+
+    # Hours per van count and area, of the hours with demand
+    counts_per_area = int(vans_per_hour.max(initial=0)) + 1
+    vans_per_hour += (np.arange(len(hourly_demand)) * counts_per_area)[:, np.newaxis]
+    cell = vans_per_hour[(hourly_demand > 0) & serving[:, np.newaxis]].astype(np.int64)
+    hours = np.bincount(cell, minlength=len(hourly_demand) * counts_per_area)
+    cumulative_hours = np.cumsum(hours.reshape(len(hourly_demand), counts_per_area), axis=1)
+
+    # Rank of the percentile among the sorted hours, rounded up as numpy's 'higher' percentile method
+    demand_hours = cumulative_hours[:, -1]
+    rank = np.ceil(percentile / 100 * np.maximum(demand_hours - 1, 0))
+    return np.where(demand_hours > 0, (cumulative_hours <= rank[:, np.newaxis]).sum(axis=1), 0)
+
+
+def peak_demand_fleet(packages_per_day, crates_per_day, packages_per_hour, crates_per_load, shift_length,
+                      amount_of_shifts, first_shift_start_h=6.0, percentile=95.0, year=REFERENCE_YEAR):
+    """
+    Package and restaurant vans of one or more areas sized for a percentile of the hourly demand of a year, with
+    the default demand profiles spread over the shifts. A restaurant van delivers one load of crates per shift.
+    """
+    packages_per_day, crates_per_day, packages_per_hour, crates_per_load, shift_length, amount_of_shifts = (
+        np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+            packages_per_day, crates_per_day, packages_per_hour, crates_per_load, shift_length, amount_of_shifts))))
+    open_hours = operating_hours(np.broadcast_to(first_shift_start_h, shift_length.shape),
+                                 shift_length * amount_of_shifts)
+
+    package_demand = hourly_demand(packages_per_day, PACKAGE_HOURLY_PROFILE, PACKAGE_WEEKDAY_FACTORS,
+                                   PACKAGE_MONTHLY_FACTORS, open_hours, year)
+    crate_demand = hourly_demand(crates_per_day, RESTAURANT_HOURLY_PROFILE, RESTAURANT_WEEKDAY_FACTORS,
+                                 RESTAURANT_MONTHLY_FACTORS, open_hours, year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crates_per_van_hour = np.where(shift_length > 0, crates_per_load / shift_length, 0)
+    return {
+        "package_demand": package_demand,
+        "crate_demand": crate_demand,
+        "package_vans": peak_fleet_size(package_demand, packages_per_hour, percentile),
+        "restaurant_vans": peak_fleet_size(crate_demand, crates_per_van_hour, percentile),
+    }
@@ -0,0 +1,176 @@
+import numpy as np
+from batch_logistics import calculate_logistics
+from cash_flow import calculate_cash_flows, cash_flow_metrics
+from energy_model import calculate_vehicle_energy
+
+# Inputs of the whole design chain with the default values of the tabs
+DESIGN_INPUT_DEFAULTS = {
+    # Sidebar and Drive Profile
+    "mass": 2570.0,
+    "vehicle_height": 3.0,
+    "vehicle_width": 2.5,
+    "C0": 0.008,
+    "C1": 0.0000016,
+    "regen_efficiency": 0.65,
+    # Battery
+    "total_distance_km": 300.0,
+    "battery_efficiency": 0.95,
+    "auxiliary_load_factor": 0.10,
+    "motor_voltage": 360.0,
+    "nominal_cell_voltage": 3.2,
+    "cell_capacity_ah": 100.0,
+    # Logistics
+    "population": 159640.0,
+    "packages_per_person_per_day": 0.062837753,
+    "restaurant_crates_per_person_per_day": 0.007774,
+    "packages_per_hour": 15.0,
+    "shift_length": 4.0,
+    "amount_of_shifts": 3.0,
+    "selected_amount_of_packages_per_van": 80.0,
+    # Financials
+    "distribution_centre_cost": 15000000.0,
+    "cost_per_car": 20000.0,
+    "software_cost": 100000.0,
+    "kwh_price": 0.35,
+    "maintenance_cost": 70.0,
+    "other_costs": 14.0,
+    "insurance_cost": 25.0,
+    "road_tax_cost": 10.0,
+    "hourly_employee_cost": 30.0,
+    "distribution_centre_employees": 80.0,
+    "distribution_centre_working_hours_per_day": 8.0,
+    "distribution_centre_kwh_usage": 100000.0,
+    "extra_maintenance_cost": 100000.0,
+    "income_per_crate": 10.0,
+    "income_per_package": 5.0,
+    # Cash flow of the Financials tab, without battery replacements
+    "horizon_years": 10.0,
+    "discount_rate": 0.08,
+    "cost_inflation": 0.02,
+    "revenue_inflation": 0.02,
+    "financed_share": 0.0,
+    "loan_rate": 0.05,
+    "loan_years": 10.0,
+    "vehicle_life_years": 8.0,
+}
+
+
+def size_battery_pack(wh_per_km, total_distance_km, battery_efficiency, auxiliary_load_factor, motor_voltage,
+                      nominal_cell_voltage, cell_capacity_ah):
+    """The pack sizing of the Battery tab for scalars or arrays."""
+    total_energy_required_kwh = total_distance_km * wh_per_km / 1000
+    usable_capacity_kwh = total_energy_required_kwh / battery_efficiency
+    total_capacity_kwh = usable_capacity_kwh * (1 + auxiliary_load_factor)
+
+    rounded_cells_in_series = np.ceil(motor_voltage / nominal_cell_voltage)
+    nominal_pack_voltage = rounded_cells_in_series * nominal_cell_voltage
+    energy_per_string_kwh = nominal_pack_voltage * cell_capacity_ah / 1000
+    rounded_parallel_strings = np.ceil(total_capacity_kwh / energy_per_string_kwh)
+
+    return {
+        "total_capacity_kwh": total_capacity_kwh,
+        "cells_in_series": rounded_cells_in_series,
+        "parallel_strings": rounded_parallel_strings,
+        "total_cells": rounded_cells_in_series * rounded_parallel_strings,
+        "nominal_pack_voltage": nominal_pack_voltage,
+        "final_capacity_kwh": energy_per_string_kwh * rounded_parallel_strings,
+    }
+
+
+def calculate_financials(number_of_cars, battery_capacity_kwh, packages_per_day, crates_per_day,
+                         driver_hours_per_day, distribution_centre_cost, cost_per_car, software_cost, kwh_price,
+                         maintenance_cost, other_costs, insurance_cost, road_tax_cost, hourly_employee_cost,
+                         distribution_centre_employees, distribution_centre_working_hours_per_day,
+                         distribution_centre_kwh_usage, extra_maintenance_cost, income_per_crate,
+                         income_per_package, horizon_years=10.0, discount_rate=0.08, cost_inflation=0.02,
+                         revenue_inflation=0.02, financed_share=0.0, loan_rate=0.05, loan_years=10.0,
+                         vehicle_life_years=8.0):
+    """
+    The investment, monthly costs, revenue, break-even point and NPV of the Financials tab for scalars or arrays.
+
+    The break-even point and NPV follow from the same monthly cash flow as the tab, with inflation, financing and
+    van replacements but without battery replacements. A break-even point beyond the horizon is capped at it.
+    """
+    total_investment = distribution_centre_cost + number_of_cars * cost_per_car + software_cost
+
+    charging_cost = battery_capacity_kwh * kwh_price
+    monthly_cost_per_car = charging_cost + maintenance_cost + other_costs + insurance_cost + road_tax_cost
+    total_monthly_car_cost = monthly_cost_per_car * number_of_cars
+
+    monthly_cost_drivers = number_of_cars * driver_hours_per_day * 30 * hourly_employee_cost
+    monthly_cost_distribution_centre_employees = (distribution_centre_employees *
+                                                  distribution_centre_working_hours_per_day * 30 *
+                                                  hourly_employee_cost)
+    distribution_centre_energy_cost = distribution_centre_kwh_usage * kwh_price
+    total_monthly_distribution_cost = (distribution_centre_energy_cost + extra_maintenance_cost +
+                                       monthly_cost_drivers + monthly_cost_distribution_centre_employees)
+    total_monthly_cost = total_monthly_car_cost + total_monthly_distribution_cost
+
+    revenue_per_month = crates_per_day * 30 * income_per_crate + packages_per_day * 30 * income_per_package
+
+    monthly_profit = revenue_per_month - total_monthly_cost
+    months = int(round(np.max(horizon_years) * 12))
+    flows = calculate_cash_flows(months, total_investment, revenue_per_month, total_monthly_cost, cost_inflation,
+                                 revenue_inflation, financed_share, loan_rate, loan_years, number_of_cars,
+                                 cost_per_car, vehicle_life_years)
+    metrics = cash_flow_metrics(flows, discount_rate, irr=False)
+    shape = np.broadcast(total_investment, revenue_per_month, total_monthly_cost, cost_inflation, revenue_inflation,
+                         financed_share, loan_rate, loan_years, number_of_cars, cost_per_car, vehicle_life_years,
+                         discount_rate).shape
+
+    return {
+        "total_investment": total_investment,
+        "total_monthly_cost": total_monthly_cost,
+        "revenue_per_month": revenue_per_month,
+        "monthly_profit": monthly_profit,
+        "break_even_months": np.nan_to_num(metrics["payback_months"], nan=months).reshape(shape),
+        "npv": metrics["npv"].reshape(shape),
+    }
+
+
+def evaluate_design_chain(inputs, speed_mps, acceleration, time_interval_s, motor_map=None, wheel_radius=None,
+                          gear_ratio=None):
+    """
+    Evaluate the chain mass -> Wh/km -> pack size -> vans -> costs -> break-even and NPV without the user
+    interface.
+
+    `inputs` maps the names of `DESIGN_INPUT_DEFAULTS` to scalars or arrays; missing inputs use the defaults.
+    All arrays are evaluated together, so one call can cover thousands of designs. The optional motor efficiency
+    map is applied to the energy as in `calculate_vehicle_energy`.
+    """
+    values = {**DESIGN_INPUT_DEFAULTS, **inputs}
+
+    energy = calculate_vehicle_energy(
+        speed_mps, acceleration, time_interval_s, values["mass"], values["vehicle_height"] * values["vehicle_width"],
+        values["C0"], values["C1"], values["regen_efficiency"], motor_map=motor_map, wheel_radius=wheel_radius,
+        gear_ratio=gear_ratio)
+    wh_per_km = energy["wh_per_km"]
+    pack = size_battery_pack(wh_per_km, values["total_distance_km"], values["battery_efficiency"],
+                             values["auxiliary_load_factor"], values["motor_voltage"],
+                             values["nominal_cell_voltage"], values["cell_capacity_ah"])
+    logistics = calculate_logistics(
+        values["population"], values["packages_per_person_per_day"], values["restaurant_crates_per_person_per_day"],
+        values["packages_per_hour"], values["shift_length"], values["amount_of_shifts"],
+        values["selected_amount_of_packages_per_van"])
+    financials = calculate_financials(
+        logistics["total_vans_needed"], pack["final_capacity_kwh"], logistics["packages_per_day_in_area"],
+        logistics["restaurant_crates_per_day_in_area"], logistics["total_working_hours_per_day"],
+        values["distribution_centre_cost"], values["cost_per_car"], values["software_cost"], values["kwh_price"],
+        values["maintenance_cost"], values["other_costs"], values["insurance_cost"], values["road_tax_cost"],
+        values["hourly_employee_cost"], values["distribution_centre_employees"],
+        values["distribution_centre_working_hours_per_day"], values["distribution_centre_kwh_usage"],
+        values["extra_maintenance_cost"], values["income_per_crate"], values["income_per_package"],
+        values["horizon_years"], values["discount_rate"], values["cost_inflation"], values["revenue_inflation"],
+        values["financed_share"], values["loan_rate"], values["loan_years"], values["vehicle_life_years"])
+
+    return {
+        "wh_per_km": wh_per_km,
+        "peak_power_w": energy["peak_power_w"],
+        "final_capacity_kwh": pack["final_capacity_kwh"],
+        "total_cells": pack["total_cells"],
+        "total_vans_needed": logistics["total_vans_needed"],
+        "total_investment": financials["total_investment"],
+        "total_monthly_cost": financials["total_monthly_cost"],
+        "break_even_months": financials["break_even_months"],
+        "npv": financials["npv"],
+    }
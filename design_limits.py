@@ -0,0 +1,130 @@
+import numpy as np
+from config import AIR_DENSITY, GRAVITY, C_DRAG
+from design_chain import size_battery_pack
+from energy_model import CHUNK_ELEMENTS
+
+
+def calculate_wh_per_km_and_mass_slope(speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1,
+                                       regen_efficiency, km=1.0):
+    """
+    Energy consumption over a drive profile and its derivative to the vehicle mass, for arrays of variants.
+
+    The tractive power of every timestep is linear in the mass, so the energy consumption is piecewise linear and
+    convex in the mass: the slope only changes where a timestep switches between motoring and braking.
+    """
+    speed_mps = np.asarray(speed_mps, dtype=float)
+    acceleration = np.asarray(acceleration, dtype=float)
+    time_interval_s = np.asarray(time_interval_s, dtype=float)
+    mass, frontal_area, C0, C1, regen_efficiency, km = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (mass, frontal_area, C0, C1, regen_efficiency,
+                                                                      km)))
+
+    speed_squared = speed_mps ** 2
+    v_dt = speed_mps * time_interval_s
+    total_distance_km = np.sum(v_dt) / 1000
+
+    wh_per_km = np.empty(len(mass))
+    slope = np.empty(len(mass))
+    chunk = max(1, CHUNK_ELEMENTS // max(len(speed_mps), 1))
+    for start in range(0, len(mass), chunk):
+        rows = slice(start, start + chunk)
+        # Tractive power per unit mass and the mass-independent aerodynamic power
+        power_per_kg = (GRAVITY * (C0[rows, np.newaxis] + C1[rows, np.newaxis] * speed_squared) +
+                        km[rows, np.newaxis] * acceleration) * speed_mps
+        aerodynamic_power = 0.5 * AIR_DENSITY * C_DRAG * frontal_area[rows, np.newaxis] * speed_squared * speed_mps
+        tractive_power = mass[rows, np.newaxis] * power_per_kg + aerodynamic_power
+        weight = np.where(tractive_power < 0, regen_efficiency[rows, np.newaxis], 1.0)
+        wh_per_km[rows] = (weight * tractive_power) @ time_interval_s / 3.6e3 / total_distance_km
+        slope[rows] = (weight * power_per_kg) @ time_interval_s / 3.6e3 / total_distance_km
+    return wh_per_km, slope
+
+
+def usable_energy_wh(capacity_kwh, battery_efficiency, auxiliary_load_factor):
+    """The energy of a pack available for driving, the inverse of the sizing in the Battery tab."""
+    return capacity_kwh * 1000 * battery_efficiency / (1 + auxiliary_load_factor)
+
+
+def max_mass_for_range(target_range_km, capacity_kwh, battery_efficiency, auxiliary_load_factor, speed_mps,
+                       acceleration, time_interval_s, frontal_area, C0, C1, regen_efficiency, km=1.0,
+                       initial_mass=2000.0, iterations=20, tolerance_kg=1e-3):
+    """
+    The highest vehicle mass that still covers each target range with the given pack.
+
+    All targets are solved together with Newton steps on the piecewise linear, convex Wh/km-mass relation, which
+    ends on the exact root as soon as the motoring/braking split of the profile stops changing. Targets that cannot
+    be met at any mass are NaN. Returns the masses and the number of iterations used.
+    """
+    target_range_km, capacity_kwh = np.broadcast_arrays(np.atleast_1d(np.asarray(target_range_km, dtype=float)),
+                                                        np.atleast_1d(np.asarray(capacity_kwh, dtype=float)))
+    target_wh_per_km = usable_energy_wh(capacity_kwh, battery_efficiency, auxiliary_load_factor) / target_range_km
+
+    mass = np.full(len(target_range_km), float(initial_mass))
+    iteration = 0
+    for iteration in range(1, iterations + 1):
+        wh_per_km, slope = calculate_wh_per_km_and_mass_slope(
+            speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1, regen_efficiency, km)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (wh_per_km - target_wh_per_km) / slope
+        new_mass = np.maximum(mass - step, 0.0)
+        converged = np.all(np.abs(new_mass - mass) <= tolerance_kg)
+        mass = new_mass
+        if converged:
+            break
+
+    # A mass of zero that still uses too much energy means the target is out of reach
+    wh_per_km, _ = calculate_wh_per_km_and_mass_slope(
+        speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1, regen_efficiency, km)
+    mass = np.where((mass > 0) & (wh_per_km <= target_wh_per_km * (1 + 1e-9)), mass, np.nan)
+    return mass, iteration
+
+
+def min_pack_for_range(target_range_km, payload_kg, vehicle_mass_without_pack, specific_energy_wh_per_kg,
+                       speed_mps, acceleration, time_interval_s, frontal_area, C0, C1, regen_efficiency,
+                       battery_efficiency, auxiliary_load_factor, motor_voltage, nominal_cell_voltage,
+                       cell_capacity_ah, iterations=50):
+    """
+    The smallest pack of the Battery tab that covers each target range with its payload, including the pack weight.
+
+    The pack weight raises the consumption, which in turn raises the pack size: the parallel strings of all targets
+    are iterated together until none of them changes. Targets for which the pack keeps growing are NaN.
+    Returns the pack sizing dict of `size_battery_pack` plus the total vehicle mass.
+    """
+    target_range_km, payload_kg = np.broadcast_arrays(np.atleast_1d(np.asarray(target_range_km, dtype=float)),
+                                                      np.atleast_1d(np.asarray(payload_kg, dtype=float)))
+    pack_mass = np.zeros(len(target_range_km))
+    parallel_strings = np.full(len(target_range_km), -1.0)
+    converged = np.zeros(len(target_range_km), dtype=bool)
+
+    for _ in range(iterations):
+        mass = vehicle_mass_without_pack + payload_kg + pack_mass
+        wh_per_km, _ = calculate_wh_per_km_and_mass_slope(
+            speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1, regen_efficiency)
+        pack = size_battery_pack(wh_per_km, target_range_km, battery_efficiency, auxiliary_load_factor,
+                                 motor_voltage, nominal_cell_voltage, cell_capacity_ah)
+        converged = pack["parallel_strings"] == parallel_strings
+        if np.all(converged):
+            break
+        parallel_strings = pack["parallel_strings"]
+        pack_mass = pack["final_capacity_kwh"] * 1000 / specific_energy_wh_per_kg
+
+    pack = {name: np.where(converged, value, np.nan) for name, value in pack.items()}
+    pack["vehicle_mass"] = np.where(converged, vehicle_mass_without_pack + payload_kg + pack_mass, np.nan)
+    return pack
+
+
+def max_road_load_for_top_speed(top_speed_kph, available_power_w, mass, frontal_area, C0, C1):
+    """
+    The highest C1 and the largest frontal area that still reach each top speed with the available wheel power.
+
+    At top speed the acceleration is zero, so P = (m g C0 + (m g C1 + 0.5 rho Cd A) v^2) v has a closed-form
+    solution for either coefficient with the other one fixed. Negative results mean the top speed cannot be
+    reached even without that resistance.
+    """
+    speed_mps = np.asarray(top_speed_kph, dtype=float) / 3.6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        allowed_quadratic = (np.asarray(available_power_w, dtype=float) / speed_mps - mass * GRAVITY * C0) / \
+            speed_mps ** 2
+    return {
+        "max_C1": (allowed_quadratic - 0.5 * AIR_DENSITY * C_DRAG * frontal_area) / (mass * GRAVITY),
+        "max_frontal_area": (allowed_quadratic - mass * GRAVITY * C1) / (0.5 * AIR_DENSITY * C_DRAG),
+    }
@@ -0,0 +1,71 @@
+import numpy as np
+from config import AIR_DENSITY, GRAVITY, C_DRAG
+
+# Smallest power margin (m/s^2, power per kg and m/s) of a timestep in the trust region of `EnergyBasis`: a timestep
+# this close to zero power changes the energy by a negligible amount when its sign flips
+MINIMUM_POWER_MARGIN = 1e-6
+
+
+class EnergyBasis:
+    """
+    Per-profile integrals from which the energy consumption of any vehicle follows in constant time.
+
+    Divided by km * m, the tractive power is alpha v + beta v^3 + a v with alpha = g C0 / km and
+    beta = (g C1 + 0.5 rho Cd A / m) / km, so the energy only depends on the vehicle through alpha, beta and the
+    regenerative braking efficiency, given the integrals of v, v^3 and a v over the motoring and the braking
+    timesteps. Which timesteps are braking depends on alpha and beta: the integrals are rebuilt with a full pass
+    over the profile only when a change of alpha and beta could flip the sign of the power of some timestep.
+    """
+
+    def __init__(self, speed_mps, acceleration, time_interval_s):
+        self.speed_mps = np.asarray(speed_mps, dtype=float)
+        self.acceleration = np.asarray(acceleration, dtype=float)
+        self.time_interval_s = np.asarray(time_interval_s, dtype=float)
+        self.total_distance_km = float(self.speed_mps @ self.time_interval_s) / 1000
+        self.full_passes = 0
+        self._alpha = None
+        self._beta = None
+
+    def coefficients(self, mass, frontal_area, C0, C1, km=1.0):
+        alpha = GRAVITY * C0 / km
+        beta = (GRAVITY * C1 + 0.5 * AIR_DENSITY * C_DRAG * frontal_area / mass) / km
+        return alpha, beta
+
+    def _rebuild(self, alpha, beta):
+        """Integrals of the motoring and braking timesteps, and the trust region of their sign split."""
+        v = self.speed_mps
+        v_dt = v * self.time_interval_s
+        v_squared = v * v
+        margin = alpha + beta * v_squared + self.acceleration
+        motoring = margin >= 0
+
+        # The split is unchanged while |d_alpha| + |d_beta| v^2 < |margin| at every moving timestep, which holds
+        # when |d_alpha| * max(1 / |margin|) + |d_beta| * max(v^2 / |margin|) < 1
+        moving = v_dt > 0
+        inverse_margin = 1 / np.maximum(np.abs(margin[moving]), MINIMUM_POWER_MARGIN)
+        self._alpha_sensitivity = float(inverse_margin.max(initial=0))
+        self._beta_sensitivity = float((v_squared[moving] * inverse_margin).max(initial=0))
+
+        terms = np.stack([v_dt, v_squared * v_dt, self.acceleration * v_dt])
+        self._motoring = terms @ motoring
+        self._braking = terms @ ~motoring
+        self._alpha = alpha
+        self._beta = beta
+        self.full_passes += 1
+
+    def _trusted(self, alpha, beta):
+        if self._alpha is None:
+            return False
+        return (abs(alpha - self._alpha) * self._alpha_sensitivity +
+                abs(beta - self._beta) * self._beta_sensitivity) < 1
+
+    def wh_per_km(self, mass, frontal_area, C0, C1, regen_efficiency, km=1.0):
+        """Energy consumption of a vehicle over the profile, as `calculate_wh_per_km`."""
+        alpha, beta = self.coefficients(mass, frontal_area, C0, C1, km)
+        if not self._trusted(alpha, beta):
+            self._rebuild(alpha, beta)
+        coefficients = np.array([alpha, beta, 1.0])
+        energy_j = km * mass * (coefficients @ self._motoring + regen_efficiency * (coefficients @ self._braking))
+        if self.total_distance_km <= 0:
+            return float('inf')
+        return energy_j / 3.6e6 / self.total_distance_km * 1000
@@ -0,0 +1,305 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from config import AIR_DENSITY, GRAVITY, C_DRAG
+from motor_map import interpolate_efficiency, motor_operating_points
+
+DRIVE_PROFILES_DIR = "drive_profiles"
+
+# Upper bound on the number of elements in one variants x timesteps block
+CHUNK_ELEMENTS = 2 ** 22
+
+# Elements of one variants x timesteps block of the energy kernel, small enough to stay in the CPU cache between
+# its passes
+KERNEL_BLOCK_ELEMENTS = 2 ** 16
+
+# Per-timestep rows of the compact energy pipeline
+ENERGY_PROFILE_ROWS = [
+    "speed_mps",
+    "time_interval_s",
+    "total_distance_m",
+    "tractive_force_n",
+    "tractive_power_w",
+    "total_energy_kwh",
+]
+
+
+def load_drive_profile(file_path):
+    """Load a drive profile CSV file."""
+    df = pd.read_csv(
+        file_path, sep=';', usecols=[0, 1, 3, 4],
+        names=['Phase', 'Time', 'Speed', 'Acceleration'], skiprows=1, decimal=','
+    )
+
+    df['Speed'] = pd.to_numeric(df['Speed'], errors='coerce')
+    df['Acceleration'] = pd.to_numeric(df['Acceleration'], errors='coerce')
+    df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
+    # df['Gradient'] = pd.to_numeric(df['Gradient'], errors='coerce')
+    # df['Height'] = pd.to_numeric(df['Height'], errors='coerce')
+    return df
+
+
+# Parsed drive profiles, reloaded when the file changes
+_profile_arrays = {}
+_profile_arrays_lock = threading.Lock()
+
+
+def load_profile_arrays(file_path):
+    """Time, speed (km/h) and acceleration arrays of a drive profile, parsed once per file version."""
+    modified = os.path.getmtime(file_path)
+    with _profile_arrays_lock:
+        cached = _profile_arrays.get(file_path)
+    if cached is None or cached[0] != modified:
+        df = load_drive_profile(file_path)
+        cached = (modified, {column: df[column].to_numpy(dtype=float) for column in ('Time', 'Speed', 'Acceleration')})
+        with _profile_arrays_lock:
+            _profile_arrays[file_path] = cached
+    return cached[1]
+
+
+def load_drive_cycle(file_path):
+    """Load a drive profile as the arrays used by the energy calculations, parsing the file once per version."""
+    arrays = load_profile_arrays(file_path)
+    time = arrays['Time']
+    return {
+        "time": time,
+        "speed_mps": arrays['Speed'] * 1000 / 3600,
+        "acceleration": arrays['Acceleration'],
+        "time_interval_s": np.concatenate(([0.0], np.diff(time))),
+    }
+
+
+def calculate_kinematics(time, speed_kph, dtype=np.float64):
+    """
+    Speed, time intervals and distance of a drive profile, as the first stage of the compact energy pipeline.
+
+    All per-timestep results of the pipeline live as rows of one preallocated contiguous block of `dtype`: this
+    function fills the kinematic rows and `calculate_traction` the remaining ones in place. float32 halves the
+    memory at a relative precision of about 1e-7. Returns a dict of views into the block.
+    """
+    block = np.empty((len(ENERGY_PROFILE_ROWS), len(time)), dtype=dtype)
+    profile = dict(zip(ENERGY_PROFILE_ROWS, block))
+    time = np.asarray(time)
+
+    np.multiply(speed_kph, 1000 / 3600, out=profile["speed_mps"])
+    time_interval_s = profile["time_interval_s"]
+    time_interval_s[:1] = 0
+    np.subtract(time[1:], time[:-1], out=time_interval_s[1:])
+    distance_m = profile["total_distance_m"]
+    np.multiply(profile["speed_mps"], time_interval_s, out=distance_m)
+    # A missing speed adds no distance and does not end the cumulative sum, as the pandas cumsum of the baseline
+    np.nan_to_num(distance_m, copy=False, nan=0.0)
+    np.cumsum(distance_m, out=distance_m)
+    return profile
+
+
+def calculate_traction(profile, acceleration, mass, frontal_area, C0, C1, regen_efficiency, km=1.0, motor_map=None,
+                       wheel_radius=None, gear_ratio=None):
+    """
+    Tractive force, power (regenerative braking included) and cumulative energy of one vehicle, written in place
+    into the rows of a profile from `calculate_kinematics`.
+
+    The force terms are accumulated in the force row and the energy row doubles as scratch buffer before it holds
+    the energy, so no temporary per-timestep arrays are allocated apart from the braking mask. The mass is a scalar
+    or, for a payload that changes over the profile, an array with one value per timestep. With a motor
+    efficiency map, the wheel speed and force are converted to motor operating points through the wheel radius and
+    gear ratio, and the power becomes the electrical power of the motor.
+    """
+    speed_mps = profile["speed_mps"]
+    force = profile["tractive_force_n"]
+    power = profile["tractive_power_w"]
+    scratch = profile["total_energy_kwh"]
+
+    # F = (0.5 rho Cd A + m g C1) v^2 + m g C0 + km m a
+    np.multiply(speed_mps, speed_mps, out=scratch)
+    np.multiply(scratch, 0.5 * AIR_DENSITY * C_DRAG * frontal_area + mass * GRAVITY * C1, out=force)
+    force += mass * GRAVITY * C0
+    np.multiply(acceleration, km * mass, out=scratch)
+    force += scratch
+
+    np.multiply(force, speed_mps, out=power)
+    if motor_map is not None:
+        # Motoring draws the power divided by the efficiency, regenerative braking returns it times the efficiency
+        efficiency = interpolate_efficiency(motor_map, *motor_operating_points(speed_mps, force, wheel_radius,
+                                                                               gear_ratio))
+        np.divide(power, efficiency, out=power, where=power > 0)
+        np.multiply(power, efficiency, out=power, where=power < 0)
+    np.multiply(power, regen_efficiency, out=power, where=power < 0)
+
+    energy = scratch
+    np.multiply(power, profile["time_interval_s"], out=energy)
+    np.nan_to_num(energy, copy=False, nan=0.0)
+    np.cumsum(energy, out=energy)
+    energy /= 3.6e6
+    return profile
+
+
+def phase_segments(phase):
+    """Start indices and labels of the contiguous runs of equal phase labels of a drive profile."""
+    phase = np.asarray(phase)
+    starts = np.flatnonzero(np.concatenate(([True], phase[1:] != phase[:-1])))
+    return starts, phase[starts]
+
+
+def calculate_phase_breakdown(phase, profile):
+    """
+    Duration, distance, speeds, energy and consumption per phase of a drive profile with calculated traction.
+
+    The per-timestep rows are reduced once over the contiguous segments of equal phase labels, then the segments
+    are summed per phase, so a phase that occurs several times in a cycle is reported once. Every timestep counts
+    towards the phase of its row, so the phases add up to the whole-cycle totals. Phases are in order of appearance.
+    """
+    starts, labels = phase_segments(phase)
+    speed_mps = profile["speed_mps"]
+    time_interval_s = profile["time_interval_s"]
+
+    segment_duration_s = np.add.reduceat(time_interval_s, starts, dtype=float)
+    segment_distance_m = np.add.reduceat(speed_mps * time_interval_s, starts, dtype=float)
+    segment_energy_j = np.add.reduceat(profile["tractive_power_w"] * time_interval_s, starts, dtype=float)
+    segment_max_speed = np.maximum.reduceat(speed_mps, starts)
+
+    phases, first, index = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    duration_s = np.bincount(index, segment_duration_s)[order]
+    distance_km = np.bincount(index, segment_distance_m)[order] / 1000
+    energy_kwh = np.bincount(index, segment_energy_j)[order] / 3.6e6
+    max_speed_mps = np.zeros(len(phases))
+    np.maximum.at(max_speed_mps, index, segment_max_speed)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            "phase": [str(name) for name in phases[order]],
+            "duration_s": duration_s,
+            "distance_km": distance_km,
+            "max_speed_kph": max_speed_mps[order] * 3.6,
+            "average_speed_kph": np.where(duration_s > 0, distance_km / duration_s * 3600, 0.0),
+            "energy_kwh": energy_kwh,
+            "wh_per_km": np.where(distance_km > 0, energy_kwh / distance_km * 1000, np.inf),
+        }
+
+
+def reweight_phases(breakdown, distance_shares):
+    """
+    Energy consumption of a phase breakdown re-weighted to other shares of distance per phase, for example the
+    urban and extra-urban mix of a fleet. Shares are relative weights per phase name; missing phases count as zero.
+    """
+    shares = np.array([float(distance_shares.get(name, 0)) for name in breakdown["phase"]])
+    if shares.sum() <= 0:
+        raise ValueError("The distance shares must add up to more than zero.")
+    # Phases without a share drop out, so a phase without distance (infinite Wh/km) only counts when it is weighted
+    weighted = shares > 0
+    return float(shares[weighted] @ np.asarray(breakdown["wh_per_km"])[weighted] / shares.sum())
+
+
+def payload_fraction_profile(speed_mps):
+    """
+    Remaining share of the payload at every timestep when the payload is delivered in equal parts at the stops
+    of a drive profile: every standstill after moving is a stop, and the vehicle is empty after the last one.
+    """
+    stopped = np.asarray(speed_mps) <= 0
+    stops = np.concatenate(([0], np.cumsum(stopped[1:] & ~stopped[:-1])))
+    if stops[-1] == 0:
+        return np.ones(len(stops))
+    return 1 - stops / stops[-1]
+
+
+def calculate_vehicle_energy(speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1, regen_efficiency,
+                             km=1.0, cumulative_energy=False, dtype=np.float64, payload_kg=0.0, payload_fraction=None,
+                             motor_map=None, wheel_radius=None, gear_ratio=None):
+    """
+    Energy consumption, total energy and peak tractive power of any number of vehicle variants over one drive
+    profile, and optionally their cumulative energy curves, as in the Drive Profile tab.
+
+    The profile arrays have one value per timestep, the vehicle parameters are scalars or arrays with one value
+    per variant. The tractive power of variant n at timestep t is
+    m g C0 v + (0.5 rho Cd A + m g C1) v^3 + km m a v: three coefficients per variant times three profile rows,
+    so every block of the variants x timesteps power matrix is a single matrix product. The variants are
+    evaluated in cache-sized blocks, so the memory of that matrix stays bounded. The cumulative energy curves are
+    a variants x timesteps array of `dtype` and are only returned when requested.
+
+    The payload is carried on top of the mass. With `payload_fraction`, the remaining share of the payload at
+    every timestep (see `payload_fraction_profile`), the mass is m + payload r(t): three more coefficients per
+    variant times the profile rows weighted by r, so a fleet with different loads stays one matrix product.
+
+    With a motor efficiency map, as in `calculate_traction`, the power becomes the electrical power of the motor.
+    The efficiency depends on the operating point of every variant and timestep, so the energy is then integrated
+    from every power block instead of from the profile integrals.
+    """
+    speed_mps = np.asarray(speed_mps, dtype=float)
+    acceleration = np.asarray(acceleration, dtype=float)
+    time_interval_s = np.asarray(time_interval_s, dtype=float)
+    parameters = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                       for value in (mass, frontal_area, C0, C1, regen_efficiency, km, payload_kg)))
+    mass, frontal_area, C0, C1, regen_efficiency, km, payload_kg = parameters
+    if payload_fraction is None:
+        mass = mass + payload_kg
+
+    # Profile rows v, v^3 and a v, and the coefficients of every variant
+    profile = np.stack([speed_mps, speed_mps ** 3, acceleration * speed_mps])
+    coefficients = np.stack([mass * GRAVITY * C0, 0.5 * AIR_DENSITY * C_DRAG * frontal_area + mass * GRAVITY * C1,
+                             km * mass], axis=1)
+    if payload_fraction is not None:
+        # The same rows times the remaining payload share, with the payload coefficients
+        profile = np.concatenate([profile, profile * np.asarray(payload_fraction, dtype=float)])
+        coefficients = np.concatenate([coefficients, np.stack([payload_kg * GRAVITY * C0, payload_kg * GRAVITY * C1,
+                                                               km * payload_kg], axis=1)], axis=1)
+    total_distance_km = np.sum(speed_mps * time_interval_s) / 1000
+
+    # Energy without regenerative braking losses follows from the profile integrals alone
+    total_energy_j = coefficients @ (profile @ time_interval_s)
+    peak_power_w = np.empty(len(mass))
+    energy_curves = np.empty((len(mass), len(speed_mps)), dtype=dtype) if cumulative_energy else None
+
+    chunk = max(1, KERNEL_BLOCK_ELEMENTS // max(len(speed_mps), 1))
+    block = np.empty((min(chunk, len(mass)), len(speed_mps)))
+    for start in range(0, len(mass), chunk):
+        rows = slice(start, start + chunk)
+        tractive_power = block[:len(mass[rows])]
+        np.matmul(coefficients[rows], profile, out=tractive_power)
+        if motor_map is not None:
+            # Tractive force from the power, zero at standstill where the power is zero as well
+            force = np.divide(tractive_power, speed_mps, out=np.zeros_like(tractive_power), where=speed_mps > 0)
+            efficiency = interpolate_efficiency(motor_map, *motor_operating_points(speed_mps, force, wheel_radius,
+                                                                                   gear_ratio))
+            np.divide(tractive_power, efficiency, out=tractive_power, where=tractive_power > 0)
+            np.multiply(tractive_power, efficiency, out=tractive_power, where=tractive_power < 0)
+            peak_power_w[rows] = tractive_power.max(axis=1, initial=0)
+            np.multiply(tractive_power, regen_efficiency[rows, np.newaxis], out=tractive_power,
+                        where=tractive_power < 0)
+            tractive_power *= time_interval_s
+            total_energy_j[rows] = tractive_power.sum(axis=1)
+            if cumulative_energy:
+                np.cumsum(tractive_power, axis=1, out=tractive_power)
+                np.divide(tractive_power, 3.6e6, out=energy_curves[rows], casting='unsafe')
+            continue
+        peak_power_w[rows] = tractive_power.max(axis=1, initial=0)
+        # Only regen_efficiency of the braking energy is recovered
+        np.minimum(tractive_power, 0, out=tractive_power)
+        braking_energy_j = tractive_power @ time_interval_s
+        total_energy_j[rows] -= (1 - regen_efficiency[rows]) * braking_energy_j
+        if cumulative_energy:
+            # Recovered power = all power minus the lost part of the braking power
+            tractive_power *= regen_efficiency[rows, np.newaxis] - 1
+            tractive_power += coefficients[rows] @ profile
+            tractive_power *= time_interval_s
+            np.cumsum(tractive_power, axis=1, out=tractive_power)
+            np.divide(tractive_power, 3.6e6, out=energy_curves[rows], casting='unsafe')
+
+    total_energy_kwh = total_energy_j / 3.6e6
+    result = {
+        "wh_per_km": total_energy_kwh / total_distance_km * 1000 if total_distance_km > 0 else
+        np.full(len(mass), np.inf),
+        "total_energy_kwh": total_energy_kwh,
+        "peak_power_w": peak_power_w,
+    }
+    if cumulative_energy:
+        result["total_energy_kwh_curve"] = energy_curves
+    return result
+
+
+def calculate_wh_per_km(speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1, regen_efficiency,
+                        km=1.0):
+    """Energy consumption over a drive profile for any number of vehicle variants, see `calculate_vehicle_energy`."""
+    return calculate_vehicle_energy(speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1,
+                                    regen_efficiency, km)["wh_per_km"]
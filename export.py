@@ -0,0 +1,86 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+EXPORT_FORMATS = {
+    "Arrow IPC": ".arrow",
+    "Parquet": ".parquet",
+}
+
+# Rows per record batch (Arrow) or row group (Parquet)
+CHUNK_ROWS = 1_000_000
+
+
+def to_arrow_array(values):
+    """
+    Wrap a NumPy array as an Arrow array.
+
+    Contiguous numeric arrays are wrapped without copying: the Arrow array points at the NumPy buffer.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "fiu" and values.flags.c_contiguous and values.ndim == 1:
+        return pa.Array.from_buffers(pa.from_numpy_dtype(values.dtype), len(values), [None, pa.py_buffer(values)])
+    return pa.array(values)
+
+
+def label_array(label, length, dictionary):
+    """A constant string column, stored as an index into the dictionary of all labels of that column."""
+    indices = np.full(length, dictionary.index(str(label)), dtype=np.int32)
+    return pa.DictionaryArray.from_arrays(to_arrow_array(indices), pa.array(dictionary))
+
+
+def result_batches(results, chunk_rows=CHUNK_ROWS):
+    """
+    Record batches of one or more result sets.
+
+    `results` is a list of (labels, columns) pairs: labels is a dict of constant values that identify the result
+    set (for example the vehicle and the drive profile), columns a dict of equally long NumPy arrays. The label
+    columns come first. All result sets must have the same label and column names.
+    """
+    # Arrow IPC files allow one dictionary per column, so every label column shares the labels of all result sets
+    dictionaries = {}
+    for labels, _ in results:
+        for name, value in labels.items():
+            if str(value) not in dictionaries.setdefault(name, []):
+                dictionaries[name].append(str(value))
+
+    for labels, columns in results:
+        length = len(next(iter(columns.values())))
+        for start in range(0, max(length, 1), chunk_rows):
+            stop = min(start + chunk_rows, length)
+            arrays = [label_array(value, stop - start, dictionaries[name]) for name, value in labels.items()]
+            arrays += [to_arrow_array(np.asarray(values)[start:stop]) for values in columns.values()]
+            yield pa.RecordBatch.from_arrays(arrays, names=list(labels) + list(columns))
+
+
+def write_results(results, sink, export_format="Arrow IPC", chunk_rows=CHUNK_ROWS):
+    """
+    Stream result sets to a file path or writable buffer as Arrow IPC or Parquet.
+
+    Batches are written one at a time, so at most one chunk of every column is converted at once.
+    """
+    batches = result_batches(results, chunk_rows)
+    first = next(batches, None)
+    if first is None:
+        return
+
+    if export_format == "Arrow IPC":
+        with ipc.new_file(sink, first.schema) as writer:
+            writer.write_batch(first)
+            for batch in batches:
+                writer.write_batch(batch)
+    elif export_format == "Parquet":
+        with pq.ParquetWriter(sink, first.schema) as writer:
+            writer.write_batch(first)
+            for batch in batches:
+                writer.write_batch(batch)
+    else:
+        raise ValueError(f"Unknown export format '{export_format}'.")
+
+
+def export_bytes(results, export_format="Arrow IPC"):
+    """The exported result sets as bytes, for a download button."""
+    sink = pa.BufferOutputStream()
+    write_results(results, sink, export_format)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,133 @@
+import json
+import math
+import os
+import numpy as np
+from design_chain import size_battery_pack
+from energy_model import calculate_wh_per_km
+
+# Optional fleet fields of a vehicle profile; missing fields use the current design of the Logistics tab
+FLEET_FIELDS = {
+    "cost_per_van": "Purchase cost of one van (\u20ac)",
+    "packages_per_hour": "Packages one van delivers per hour",
+    "crates_per_load": "Restaurant crates one van carries per shift",
+}
+
+
+def load_vehicle_types(profiles_dir):
+    """All saved vehicle profiles except the current configuration, by name."""
+    vehicle_types = {}
+    for file_name in sorted(os.listdir(profiles_dir)):
+        if file_name.endswith(".json") and file_name != "current.json":
+            with open(os.path.join(profiles_dir, file_name), "r") as f:
+                vehicle_types[file_name[:-len(".json")]] = json.load(f)
+    return vehicle_types
+
+
+def vehicle_type_costs(vehicle_types, defaults, speed_mps, acceleration, time_interval_s, regen_efficiency, C0, C1,
+                       total_distance_km, battery_efficiency, auxiliary_load_factor, motor_voltage,
+                       nominal_cell_voltage, cell_capacity_ah, kwh_price, maintenance_cost, other_costs,
+                       insurance_cost, road_tax_cost, hourly_employee_cost, driver_hours_per_day, horizon_months):
+    """
+    Energy use, pack, capacities and cost of ownership of every vehicle type, with the cost model of the Financials
+    tab: the purchase cost plus the monthly charging, maintenance, other, insurance, road tax and driver costs over
+    the horizon. All types are evaluated in one vectorized pass over the drive profile.
+    """
+    names = list(vehicle_types)
+
+    def field(name):
+        return np.array([float(vehicle_types[n].get(name, defaults[name])) for n in names])
+
+    mass = field("mass")
+    frontal_area = field("vehicle_height") * field("vehicle_width")
+    wh_per_km = calculate_wh_per_km(speed_mps, acceleration, time_interval_s, mass, frontal_area, C0, C1,
+                                    regen_efficiency)
+    pack = size_battery_pack(wh_per_km, total_distance_km, battery_efficiency, auxiliary_load_factor, motor_voltage,
+                             nominal_cell_voltage, cell_capacity_ah)
+
+    monthly_cost = (pack["final_capacity_kwh"] * kwh_price + maintenance_cost + other_costs + insurance_cost +
+                    road_tax_cost + driver_hours_per_day * 30 * hourly_employee_cost)
+    cost_per_van = field("cost_per_van")
+    return {
+        "name": names,
+        "wh_per_km": wh_per_km,
+        "final_capacity_kwh": pack["final_capacity_kwh"],
+        "cost_per_van": cost_per_van,
+        "monthly_cost": monthly_cost,
+        "cost_of_ownership": cost_per_van + horizon_months * monthly_cost,
+        "packages_per_day": field("packages_per_hour") * driver_hours_per_day,
+        "crates_per_load": field("crates_per_load"),
+    }
+
+
+def cheapest_cover(costs, capacities, demand):
+    """
+    The number of vans of every type that covers the demand at minimum total cost.
+
+    Capacities are whole units. Types that hold less and cost more than another type are pruned first. Then,
+    with type 0 the type with the lowest cost per unit: any cap_0 vans of other types contain a subset whose
+    capacity is a multiple of cap_0, which type 0 vans cover at no higher cost. So an optimum has fewer than cap_0
+    vans of other types, and all demand beyond (cap_0 - 1) * max(cap) is covered by type 0 directly. The small
+    remainder is solved exactly by dynamic programming over the covered units, one vectorized block of cap units
+    at a time. Returns the counts and the cost.
+    """
+    costs = np.asarray(costs, dtype=float)
+    capacities = np.floor(np.asarray(capacities, dtype=float)).astype(int)
+    counts = np.zeros(len(costs), dtype=int)
+    demand = math.ceil(demand)
+    if demand <= 0:
+        return counts, 0.0
+
+    def dominates(other, index):
+        return (capacities[other] >= capacities[index] and costs[other] <= costs[index] and
+                (capacities[other] > capacities[index] or costs[other] < costs[index] or other < index))
+
+    usable = [index for index in range(len(costs)) if capacities[index] > 0]
+    usable = [index for index in usable if not any(dominates(other, index) for other in usable if other != index)]
+    if not usable:
+        raise ValueError("No vehicle type has capacity for this demand.")
+    best = min(usable, key=lambda index: costs[index] / capacities[index])
+
+    # Bound from the exchange argument: cover the bulk of the demand with the most cost-efficient type
+    bulk = max(0, (demand - (capacities[best] - 1) * max(capacities[index] for index in usable)) // capacities[best])
+    counts[best] = bulk
+    remaining = demand - bulk * capacities[best]
+
+    # cost[d]: cheapest cover of at least d units, choice[d]: the type of its last van
+    cost = np.full(remaining + 1, np.inf)
+    cost[0] = 0.0
+    choice = np.full(remaining + 1, -1)
+    for index in usable:
+        capacity = capacities[index]
+        for start in range(1, remaining + 1, capacity):
+            stop = min(start + capacity, remaining + 1)
+            previous = cost[np.maximum(np.arange(start, stop) - capacity, 0)]
+            candidate = previous + costs[index]
+            better = candidate < cost[start:stop]
+            cost[start:stop][better] = candidate[better]
+            choice[start:stop][better] = index
+
+    units = remaining
+    while units > 0:
+        index = choice[units]
+        counts[index] += 1
+        units = max(units - capacities[index], 0)
+    return counts, float(counts @ costs)
+
+
+def optimize_fleet_mix(type_costs, packages_per_day, crates_per_day, amount_of_shifts):
+    """
+    The cheapest mix of vehicle types for the package and the restaurant crate deliveries.
+
+    As in the Logistics tab, package vans and restaurant vans are separate fleets: package vans are limited by
+    the packages they deliver per day, restaurant vans by the crates they carry per shift.
+    """
+    package_counts, package_cost = cheapest_cover(
+        type_costs["cost_of_ownership"], type_costs["packages_per_day"], packages_per_day)
+    crate_counts, crate_cost = cheapest_cover(
+        type_costs["cost_of_ownership"], type_costs["crates_per_load"] * amount_of_shifts, crates_per_day)
+    return {
+        "package_vans": package_counts,
+        "restaurant_vans": crate_counts,
+        "total_vans": int(package_counts.sum() + crate_counts.sum()),
+        "total_cost_of_ownership": package_cost + crate_cost,
+    }
@@ -1,7 +1,11 @@
 import os
+import copy
 import json
+import uuid
 import streamlit as st
 import config
+from jobs import get_job_manager
+from navigation import startup_times
 
 # Directory and file paths
 PROFILES_DIR = "vehicles"
@@ -10,6 +14,22 @@ CURRENT_CONFIG_FILE = os.path.join(PROFILES_DIR, "current.json")
 # Ensure directories exist
 os.makedirs(PROFILES_DIR, exist_ok=True)
 
+# Values that pages share through the session state, before the page that produces them has been opened. Results
+# that depend on the inputs of several pages are not stored but recomputed when read, see `shared_results`
+SESSION_DEFAULTS = {
+    "total_vans_needed": None,
+    "motor_map": None,
+    "design_inputs": {},
+    "page_inputs": {},
+}
+
+
+def init_session_state():
+    """Set the shared session values that are not set yet, so that every page can be opened first."""
+    for key, value in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = copy.deepcopy(value)
+
 
 def load_current_config():
     """Load the current configuration from a JSON file and set values in config.py."""
@@ -48,6 +68,10 @@ def save_profile(profile_name):
 
     """Save the current configuration as a named profile."""
     profile_path = os.path.join(PROFILES_DIR, f"{profile_name}.json")
+    # Keep fields of an existing profile that are not set in the sidebar, such as the fleet fields
+    if os.path.exists(profile_path):
+        with open(profile_path, "r") as f:
+            config_data = {**json.load(f), **config_data}
     with open(profile_path, "w") as f:
         json.dump(config_data, f)
     save_current_config(config_data)  # Update current config
@@ -139,3 +163,69 @@ def sidebar_calculations():
     config.top_speed_mps = config.top_speed / 3.6
     config.frontal_area = config.vehicle_height * config.vehicle_width
     config.time_to_100_acceleration = (27.78 / config.time_to_100)  # 100 km/h in m/s
+
+
+def session_id():
+    """Identifier of the current browser session, used to keep its background jobs apart."""
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
+
+
+def submit_job(name, function, *args, **kwargs):
+    """Run a long computation in the background for the current session."""
+    return get_job_manager().submit(session_id(), name, function, *args, **kwargs)
+
+
+def latest_job(name):
+    """The most recent background job with this name of the current session, or None."""
+    return get_job_manager().latest(session_id(), name)
+
+
+@st.fragment(run_every=1)
+def job_progress(job_id, name):
+    """Progress bar of a running job that refreshes itself and reruns the app once the job has finished."""
+    job = latest_job(name)
+    if job is None or job.id != job_id:
+        return
+    if job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message or f"{job.name}: {job.status}")
+    if st.button("Cancel", key=f"cancel_{job.id}"):
+        job.cancel()
+
+
+def job_status(name):
+    """Show the state of the latest job with this name and return its result once it has finished."""
+    job = latest_job(name)
+    if job is None:
+        return None
+    if not job.done:
+        job_progress(job.id, name)
+    elif job.status == "failed":
+        st.error(f"**{job.name} failed:** {job.error}")
+    elif job.status == "cancelled":
+        st.warning(f"**{job.name} was cancelled.**")
+    else:
+        return job.result
+    return None
+
+
+def background_jobs_sidebar():
+    jobs = [job for job in get_job_manager().jobs(session_id()) if not job.done]
+    if not jobs:
+        return
+
+    st.sidebar.header("Background Jobs")
+    for job in jobs:
+        st.sidebar.progress(job.progress, text=f"{job.name}: {job.message or job.status}")
+        if st.sidebar.button("Cancel", key=f"sidebar_cancel_{job.id}"):
+            job.cancel()
+
+
+def startup_report_sidebar():
+    """Import and first render times of the pages in this server process."""
+    with st.sidebar.expander("Startup Report"):
+        for name, seconds in startup_times.items():
+            st.write(f"**{name}:** {seconds * 1000:.0f} ms")
+        st.caption("Run `python navigation.py` for the cold import time of every page.")
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Finished jobs are kept this long so that later reruns can still pick up their results
+FINISHED_JOB_LIFETIME_S = 3600
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """A background computation with its progress, result and status."""
+
+    def __init__(self, session_id, name):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.name = name
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def report(self, progress, message=None):
+        """Progress callback for the job function. Raises JobCancelled once the job has been cancelled."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self._cancel_event.set()
+        if self.status == "queued":
+            self.status = "cancelled"
+            self.finished = time.time()
+
+
+class JobManager:
+    """
+    A worker pool plus a registry of jobs per session.
+
+    Job functions receive a `progress` keyword argument: a callback taking the fraction done and an optional
+    message, which also stops the function by raising JobCancelled when the job is cancelled. The workers are
+    threads, so jobs share the loaded data and NumPy releases the interpreter lock during array operations.
+    """
+
+    def __init__(self, max_workers=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(2, (os.cpu_count() or 2) - 1),
+                                            thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, name, function, *args, **kwargs):
+        """Queue `function(*args, progress=..., **kwargs)` and return its job."""
+        job = Job(session_id, name)
+        with self._lock:
+            self._prune()
+            self._jobs.setdefault(session_id, {})[job.id] = job
+        self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def _run(self, job, function, args, kwargs):
+        if job.status == "cancelled":
+            return
+        job.status = "running"
+        try:
+            job.result = function(*args, progress=job.report, **kwargs)
+            job.progress = 1.0
+            status = "done"
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as error:
+            job.error = error
+            status = "failed"
+        # The finish time is set first, so that a job that is done always has one when it is pruned
+        job.finished = time.time()
+        job.status = status
+
+    def jobs(self, session_id):
+        """All jobs of a session, oldest first."""
+        with self._lock:
+            return sorted(self._jobs.get(session_id, {}).values(), key=lambda job: job.created)
+
+    def latest(self, session_id, name):
+        """The most recently submitted job of a session with the given name, or None."""
+        jobs = [job for job in self.jobs(session_id) if job.name == name]
+        return jobs[-1] if jobs else None
+
+    def cancel(self, session_id, job_id):
+        with self._lock:
+            job = self._jobs.get(session_id, {}).get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def _prune(self):
+        now = time.time()
+        for session_id in list(self._jobs):
+            session_jobs = self._jobs[session_id]
+            for job_id in [job_id for job_id, job in session_jobs.items()
+                           if job.done and now - job.finished > FINISHED_JOB_LIFETIME_S]:
+                del session_jobs[job_id]
+            if not session_jobs:
+                del self._jobs[session_id]
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """The job manager shared by all sessions of this process."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
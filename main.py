@@ -1,38 +1,18 @@
 import streamlit as st
-from content.about import about
-from content.scenarios import scenarios
-from content.drive_train import drive_train
-from content.drive_profile import drive_profile
-from content.battery import battery
-from content.logistics import logistics
-from content.financials import financials
-from interface import sidebar_calculations
+from navigation import PAGES, page_runner
+from interface import sidebar_calculations, background_jobs_sidebar, init_session_state, startup_report_sidebar
 
 # Title and Description
 st.title("Electric Vehicle System Design Tool")
 
+init_session_state()
 sidebar_calculations()
-# "Vehicle Dynamics",
-tabs = st.tabs(["About", "Scenarios", "Drive Train", "Drive Profile", "Battery", "Logistics", "Financials"])
-
-with tabs[0]:
-    about()
-    # vehicle_dynamics()
-
-with tabs[1]:
-    scenarios()
-
-with tabs[2]:
-    drive_train()
+background_jobs_sidebar()
 
-with tabs[3]:
-    drive_profile()
-
-with tabs[4]:
-    battery()
-
-with tabs[5]:
-    logistics()
+# Only the selected page is imported and run. Pages keep their inputs in the session state and the results they
+# share are recomputed from those inputs when read, see `shared_results`
+# "Vehicle Dynamics",
+page = st.navigation([st.Page(page_runner(label), title=label, url_path=PAGES[label][1]) for label in PAGES])
+page.run()
 
-with tabs[6]:
-    financials()
+startup_report_sidebar()
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+MOTOR_MAPS_DIR = "motor_maps"
+
+
+def load_motor_map(file_path):
+    """
+    Load a motor efficiency map CSV file.
+
+    The first row holds the motor speeds (rpm), the first column the motor torques (Nm) and the cells the
+    efficiency in percent, in the same format as the drive profiles (semicolon separated, decimal comma).
+    """
+    df = pd.read_csv(file_path, sep=';', index_col=0, decimal=',')
+    speed_rpm = pd.to_numeric(df.columns).to_numpy(dtype=float)
+    torque_nm = pd.to_numeric(df.index).to_numpy(dtype=float)
+    efficiency = df.to_numpy(dtype=float) / 100
+
+    if np.any(np.diff(speed_rpm) <= 0) or np.any(np.diff(torque_nm) <= 0):
+        raise ValueError(f"The speeds and torques of motor map '{file_path}' must be increasing.")
+    if np.any(efficiency <= 0) or np.any(efficiency > 1):
+        raise ValueError(f"The efficiencies of motor map '{file_path}' must be between 0 and 100 %.")
+
+    return {"speed_rpm": speed_rpm, "torque_nm": torque_nm, "efficiency": efficiency}
+
+
+def interpolate_efficiency(motor_map, speed_rpm, torque_nm):
+    """
+    Bilinear interpolation of the efficiency map at arrays of operating points.
+
+    The map covers positive torques and speeds: braking points use the efficiency at their absolute torque and
+    speed, and points outside the map use the efficiency at its edge.
+    """
+    speeds = motor_map["speed_rpm"]
+    torques = motor_map["torque_nm"]
+    speed = np.clip(np.abs(speed_rpm), speeds[0], speeds[-1])
+    torque = np.clip(np.abs(torque_nm), torques[0], torques[-1])
+
+    # Lower corner of the cell around every point, and the position within that cell
+    i = np.clip(np.searchsorted(speeds, speed, side='right') - 1, 0, len(speeds) - 2)
+    j = np.clip(np.searchsorted(torques, torque, side='right') - 1, 0, len(torques) - 2)
+    s = (speed - speeds[i]) / (speeds[i + 1] - speeds[i])
+    t = (torque - torques[j]) / (torques[j + 1] - torques[j])
+
+    efficiency = motor_map["efficiency"]
+    return ((1 - s) * (1 - t) * efficiency[j, i] + s * (1 - t) * efficiency[j, i + 1] +
+            (1 - s) * t * efficiency[j + 1, i] + s * t * efficiency[j + 1, i + 1])
+
+
+def motor_operating_points(speed_mps, tractive_force_n, wheel_radius, gear_ratio):
+    """Motor speed (rpm) and torque (Nm) of wheel speeds and tractive forces through the gear ratio."""
+    motor_speed_rpm = np.asarray(speed_mps) / wheel_radius * gear_ratio * 60 / (2 * np.pi)
+    motor_torque_nm = np.asarray(tractive_force_n) * wheel_radius / gear_ratio
+    return motor_speed_rpm, motor_torque_nm
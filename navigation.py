@@ -0,0 +1,74 @@
+"""
+Lazy page loading and startup timing of the Streamlit app.
+
+Only the selected page module is imported and run, so pandas, plotly and the calculation modules are loaded on
+first use. The import and first render of every page are timed in the running server. The server has already
+imported streamlit before any page, so run `python navigation.py` to measure the cold import time of every page in
+a fresh interpreter.
+"""
+import importlib
+import subprocess
+import sys
+import time
+
+# Page label -> (module, function)
+PAGES = {
+    "About": ("content.about", "about"),
+    "Scenarios": ("content.scenarios", "scenarios"),
+    "Drive Train": ("content.drive_train", "drive_train"),
+    "Drive Profile": ("content.drive_profile", "drive_profile"),
+    "Battery": ("content.battery", "battery"),
+    "Logistics": ("content.logistics", "logistics"),
+    "Financials": ("content.financials", "financials"),
+    "Sensitivity": ("content.sensitivity", "sensitivity"),
+    "Design Limits": ("content.design_limits", "design_limits"),
+}
+
+# Seconds per timed step of this process: page imports and first renders
+startup_times = {}
+
+
+def record_time(name, seconds):
+    """Keep the first measurement of a step, later ones are warm."""
+    startup_times.setdefault(name, seconds)
+
+
+def load_page(label):
+    """The render function of a page, importing its module on first use."""
+    module_name, function_name = PAGES[label]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record_time(f"Import {label}", time.perf_counter() - start)
+    return getattr(module, function_name)
+
+
+def render_page(label):
+    """Import and render a page, timing its first render in this process."""
+    page = load_page(label)
+    start = time.perf_counter()
+    page()
+    record_time(f"Render {label}", time.perf_counter() - start)
+
+
+def page_runner(label):
+    """A function that imports and renders a page when it is selected, for `st.Page`."""
+    def run():
+        render_page(label)
+    run.__name__ = PAGES[label][1]
+    return run
+
+
+def cold_import_times(modules=None):
+    """Import time of every page module in a fresh interpreter each, in seconds."""
+    times = {}
+    for label, (module_name, _) in (modules or PAGES).items():
+        code = f"import time; start = time.perf_counter(); import {module_name}; print(time.perf_counter() - start)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        times[label] = float(result.stdout.strip()) if result.returncode == 0 else None
+    return times
+
+
+if __name__ == "__main__":
+    print("Cold import time per page:")
+    for label, seconds in cold_import_times().items():
+        print(f"  {label:<15} {'failed' if seconds is None else f'{seconds:.3f} s'}")
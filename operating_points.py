@@ -0,0 +1,77 @@
+import numpy as np
+from config import AIR_DENSITY, GRAVITY, C_DRAG
+from energy_model import CHUNK_ELEMENTS
+from motor_map import motor_operating_points
+
+
+def calculate_operating_point_density(drive_cycles, mass, frontal_area, C0, C1, wheel_radius, gear_ratio,
+                                      speed_edges_rpm, torque_edges_nm, km=1.0, weight="time",
+                                      drivetrain_efficiency=1.0):
+    """
+    Time (s) or mechanical energy (kWh) the motor of every design spends in the cells of a motor speed x torque
+    grid, over one or more drive cycles from `load_drive_cycle`.
+
+    Every timestep is converted to motor speed and torque through the wheel radius and gear ratio of each design,
+    with the drivetrain losses on top of the wheel torque when motoring and taken from it when braking, and all
+    designs and timesteps are binned together with one weighted `bincount` per block of designs. Points
+    outside the grid count towards its edge cells. The edges can also be given as numbers of bins: the grid then
+    spans from zero to the highest motor speed and symmetrically up to a bound of the highest motor torque of all
+    designs and cycles. Returns the designs x torque bins x speed bins array, the speed edges and the torque edges.
+    """
+    if weight not in ("time", "energy"):
+        raise ValueError(f"Unknown weight '{weight}', use 'time' or 'energy'.")
+    parameters = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                       for value in (mass, frontal_area, C0, C1, km, wheel_radius, gear_ratio)))
+    mass, frontal_area, C0, C1, km, wheel_radius, gear_ratio = parameters
+
+    # Tractive force m g C0 + (0.5 rho Cd A + m g C1) v^2 + km m a, as coefficients times profile rows
+    coefficients = np.stack([mass * GRAVITY * C0, 0.5 * AIR_DENSITY * C_DRAG * frontal_area + mass * GRAVITY * C1,
+                             km * mass], axis=1)
+
+    if np.ndim(speed_edges_rpm) == 0:
+        max_speed_mps = max(float(np.max(cycle["speed_mps"], initial=0)) for cycle in drive_cycles)
+        max_speed_rpm = float(np.max(motor_operating_points(max_speed_mps, 0, wheel_radius, gear_ratio)[0]))
+        speed_edges_rpm = np.linspace(0, max(max_speed_rpm, 1), int(speed_edges_rpm) + 1)
+    if np.ndim(torque_edges_nm) == 0:
+        # |F| <= |c0| + |c1| max v^2 + |c2| max |a| bounds the force without evaluating it
+        maxima = np.array([[1, float(np.max(np.square(cycle["speed_mps"]), initial=0)),
+                            float(np.max(np.abs(cycle["acceleration"]), initial=0))] for cycle in drive_cycles])
+        max_force_n = np.abs(coefficients) @ maxima.max(axis=0)
+        max_torque_nm = float(np.max(motor_operating_points(0, max_force_n, wheel_radius, gear_ratio)[1] /
+                                     drivetrain_efficiency))
+        torque_edges_nm = np.linspace(-max(max_torque_nm, 1), max(max_torque_nm, 1), int(torque_edges_nm) + 1)
+    speed_edges_rpm = np.asarray(speed_edges_rpm, dtype=float)
+    torque_edges_nm = np.asarray(torque_edges_nm, dtype=float)
+    speed_bins = len(speed_edges_rpm) - 1
+    torque_bins = len(torque_edges_nm) - 1
+    cells = speed_bins * torque_bins
+
+    density = np.zeros(len(mass) * cells)
+    for cycle in drive_cycles:
+        speed_mps = np.asarray(cycle["speed_mps"], dtype=float)
+        time_interval_s = np.asarray(cycle["time_interval_s"], dtype=float)
+        profile = np.stack([np.ones_like(speed_mps), speed_mps ** 2, np.asarray(cycle["acceleration"], dtype=float)])
+
+        chunk = max(1, CHUNK_ELEMENTS // max(len(speed_mps), 1))
+        for start in range(0, len(mass), chunk):
+            designs = slice(start, start + chunk)
+            tractive_force = coefficients[designs] @ profile
+            # Force at the motor side of the drivetrain
+            tractive_force *= np.where(tractive_force > 0, 1 / drivetrain_efficiency, drivetrain_efficiency)
+            motor_speed_rpm, motor_torque_nm = motor_operating_points(
+                speed_mps, tractive_force, wheel_radius[designs, np.newaxis], gear_ratio[designs, np.newaxis])
+
+            speed_bin = np.clip(np.searchsorted(speed_edges_rpm, motor_speed_rpm, side='right') - 1, 0,
+                                speed_bins - 1)
+            torque_bin = np.clip(np.searchsorted(torque_edges_nm, motor_torque_nm, side='right') - 1, 0,
+                                 torque_bins - 1)
+            # Cell index of every point within this block of designs
+            cell = (np.arange(len(tractive_force))[:, np.newaxis] * torque_bins + torque_bin) * speed_bins + speed_bin
+            if weight == "time":
+                weights = np.broadcast_to(time_interval_s, cell.shape)
+            else:
+                weights = np.abs(tractive_force * speed_mps) * time_interval_s / 3.6e6
+            block = density[start * cells:(start + len(tractive_force)) * cells]
+            block += np.bincount(cell.ravel(), weights=weights.ravel(), minlength=len(block))
+
+    return density.reshape(len(mass), torque_bins, speed_bins), speed_edges_rpm, torque_edges_nm
@@ -0,0 +1,99 @@
+import numpy as np
+
+# Normalised open-circuit voltage curve of a lithium iron phosphate cell.
+# -1 maps to the fully discharged voltage, 0 to the nominal voltage and 1 to the fully charged voltage.
+OCV_SOC_POINTS = np.array([0.0, 0.02, 0.05, 0.1, 0.2, 0.35, 0.5, 0.65, 0.8, 0.9, 0.95, 0.98, 1.0])
+OCV_SHAPE_POINTS = np.array([-1.0, -0.65, -0.4, -0.22, -0.1, -0.04, 0.0, 0.04, 0.1, 0.18, 0.32, 0.55, 1.0])
+
+# Layout-timesteps per block of simulate_pack, about 8 MB per float64 array
+PACK_BLOCK_ELEMENTS = 2 ** 20
+
+
+def calculate_open_circuit_voltage(soc, nominal_cell_voltage, charged_cell_voltage, discharged_cell_voltage):
+    """Open-circuit voltage per cell for a state of charge between 0 and 1."""
+    shape = np.interp(np.clip(soc, 0, 1), OCV_SOC_POINTS, OCV_SHAPE_POINTS)
+    upper = nominal_cell_voltage + shape * (charged_cell_voltage - nominal_cell_voltage)
+    lower = nominal_cell_voltage + shape * (nominal_cell_voltage - discharged_cell_voltage)
+    return np.where(shape >= 0, upper, lower)
+
+
+def pack_layout_grid(cells_in_series, parallel_strings):
+    """All combinations of the given series and parallel counts as two flat arrays."""
+    series_grid, parallel_grid = np.meshgrid(cells_in_series, parallel_strings, indexing='ij')
+    return series_grid.ravel(), parallel_grid.ravel()
+
+
+def simulate_pack(power_w, time_interval_s, cells_in_series, parallel_strings, cell_capacity_ah,
+                  nominal_cell_voltage, charged_cell_voltage, discharged_cell_voltage, cell_resistance_ohm,
+                  initial_soc=1.0, iterations=3, traces=False):
+    """
+    Simulate the state of charge and terminal voltage of one or more pack layouts over a power series.
+
+    Positive power discharges the pack, negative power (regenerative braking) charges it. Every layout is
+    evaluated over the whole cycle at once: the state of charge is solved by fixed-point iteration, where each
+    pass computes the current from the open-circuit voltage of the previous pass and integrates it with a
+    cumulative sum. The layouts are processed in blocks of about PACK_BLOCK_ELEMENTS layout-timesteps, so memory
+    does not grow with the number of layouts. Results are summaries with one value per layout; with `traces` the
+    state of charge, current and terminal voltage are added as arrays with one row per layout and one column per
+    timestep.
+    """
+    power_w = np.asarray(power_w, dtype=float)[np.newaxis, :]
+    time_interval_s = np.asarray(time_interval_s, dtype=float)[np.newaxis, :]
+    cells_in_series = np.atleast_1d(np.asarray(cells_in_series, dtype=float))
+    parallel_strings = np.atleast_1d(np.asarray(parallel_strings, dtype=float))
+    cells_in_series, parallel_strings = np.broadcast_arrays(cells_in_series, parallel_strings)
+
+    summaries = {name: np.empty(len(cells_in_series)) for name in (
+        "final_soc", "minimum_soc", "minimum_cell_voltage", "maximum_cell_voltage", "peak_current_a",
+        "resistive_loss_kwh", "energy_drawn_kwh", "power_limited")}
+    if traces:
+        for name in ("soc", "current_a", "terminal_voltage"):
+            summaries[name] = np.empty((len(cells_in_series), power_w.shape[1]))
+
+    chunk = max(1, PACK_BLOCK_ELEMENTS // max(power_w.shape[1], 1))
+    for start in range(0, len(cells_in_series), chunk):
+        rows = slice(start, start + chunk)
+        series = cells_in_series[rows, np.newaxis]
+        pack_capacity_ah = parallel_strings[rows, np.newaxis] * cell_capacity_ah
+        pack_resistance_ohm = series * cell_resistance_ohm / parallel_strings[rows, np.newaxis]
+
+        soc_start = np.full((len(series), power_w.shape[1]), float(initial_soc))
+        for _ in range(iterations):
+            open_circuit_voltage = series * calculate_open_circuit_voltage(
+                soc_start, nominal_cell_voltage, charged_cell_voltage, discharged_cell_voltage)
+
+            # P = I * (V_oc - I * R), solved for the current. A negative discriminant means the pack cannot
+            # deliver the requested power, in which case the current at maximum power transfer is used.
+            discriminant = open_circuit_voltage ** 2 - 4 * pack_resistance_ohm * power_w
+            power_limited = discriminant < 0
+            current_a = (open_circuit_voltage - np.sqrt(np.maximum(discriminant, 0))) / (2 * pack_resistance_ohm)
+
+            charge_ah = np.cumsum(current_a * time_interval_s, axis=1) / 3600
+            soc_end = initial_soc - charge_ah / pack_capacity_ah
+            soc_start[:, 0] = initial_soc
+            soc_start[:, 1:] = soc_end[:, :-1]
+
+        terminal_voltage = open_circuit_voltage - current_a * pack_resistance_ohm
+        summaries["final_soc"][rows] = soc_end[:, -1]
+        summaries["minimum_soc"][rows] = soc_end.min(axis=1)
+        summaries["minimum_cell_voltage"][rows] = terminal_voltage.min(axis=1) / series[:, 0]
+        summaries["maximum_cell_voltage"][rows] = terminal_voltage.max(axis=1) / series[:, 0]
+        summaries["peak_current_a"][rows] = np.abs(current_a).max(axis=1)
+        summaries["resistive_loss_kwh"][rows] = np.sum(current_a ** 2 * pack_resistance_ohm * time_interval_s,
+                                                       axis=1) / 3.6e6
+        summaries["energy_drawn_kwh"][rows] = np.sum(open_circuit_voltage * current_a * time_interval_s,
+                                                     axis=1) / 3.6e6
+        summaries["power_limited"][rows] = power_limited.any(axis=1)
+        if traces:
+            summaries["soc"][rows] = soc_end
+            summaries["current_a"][rows] = current_a
+            summaries["terminal_voltage"][rows] = terminal_voltage
+
+    summaries["power_limited"] = summaries["power_limited"].astype(bool)
+    return {
+        "cells_in_series": cells_in_series.astype(int),
+        "parallel_strings": parallel_strings.astype(int),
+        **summaries,
+        "below_discharged_voltage": summaries["minimum_cell_voltage"] < discharged_cell_voltage,
+        "above_charged_voltage": summaries["maximum_cell_voltage"] > charged_cell_voltage,
+    }
@@ -0,0 +1,79 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from energy_model import load_profile_arrays, calculate_kinematics, calculate_traction
+from results_store import get_results_store
+
+
+def motor_map_parameters(motor_map, wheel_radius, gear_ratio):
+    """JSON-serializable identity of a motor map and its gearing, for the keys of the results store."""
+    if motor_map is None:
+        return {}
+    digest = hashlib.sha256()
+    for name in ("speed_rpm", "torque_nm", "efficiency"):
+        digest.update(np.ascontiguousarray(motor_map[name], dtype=float).tobytes())
+    return {"motor_map": digest.hexdigest(), "wheel_radius": float(wheel_radius), "gear_ratio": float(gear_ratio)}
+
+
+def evaluate_drive_profile(file_path, mass, frontal_area, C0, C1, regen_efficiency, dtype=np.float64,
+                           motor_map=None, wheel_radius=None, gear_ratio=None):
+    """
+    Summary statistics and cumulative energy curve of one vehicle over one drive profile file, with an optional
+    motor efficiency map as in `calculate_traction`.
+
+    Results are served from the persistent results store when the same vehicle was evaluated on the same profile
+    contents before, by this or another process.
+    """
+    def evaluate():
+        return _evaluate_drive_profile(file_path, mass, frontal_area, C0, C1, regen_efficiency, dtype, motor_map,
+                                       wheel_radius, gear_ratio)
+
+    store = get_results_store()
+    if store is None:
+        return evaluate()
+    parameters = {"mass": mass, "frontal_area": frontal_area, "C0": C0, "C1": C1,
+                  "regen_efficiency": regen_efficiency, "dtype": np.dtype(dtype).name,
+                  **motor_map_parameters(motor_map, wheel_radius, gear_ratio)}
+    return store.get_or_compute("drive_profile", parameters, evaluate, files=[file_path])
+
+
+def _evaluate_drive_profile(file_path, mass, frontal_area, C0, C1, regen_efficiency, dtype, motor_map=None,
+                            wheel_radius=None, gear_ratio=None):
+    arrays = load_profile_arrays(file_path)
+    profile = calculate_kinematics(arrays['Time'], arrays['Speed'], dtype)
+    calculate_traction(profile, arrays['Acceleration'], mass, frontal_area, C0, C1, regen_efficiency,
+                       motor_map=motor_map, wheel_radius=wheel_radius, gear_ratio=gear_ratio)
+
+    total_energy_kwh = float(profile["total_energy_kwh"][-1])
+    total_distance_km = float(profile["total_distance_m"][-1]) / 1000
+    wh_per_km = total_energy_kwh / total_distance_km * 1000 if total_distance_km > 0 else float('inf')
+    return {
+        "total_time_s": float(arrays['Time'].max()),
+        "total_distance_km": total_distance_km,
+        "max_speed_kph": float(arrays['Speed'].max()),
+        "average_speed_kph": float(arrays['Speed'].mean()),
+        "total_energy_kwh": total_energy_kwh,
+        "wh_per_km": wh_per_km,
+        "km_per_kwh": 1000 / wh_per_km if 0 < wh_per_km < float('inf') else None,
+        "time": arrays['Time'],
+        "total_energy_kwh_curve": profile["total_energy_kwh"],
+    }
+
+
+def compare_drive_profiles(file_paths, mass, frontal_area, C0, C1, regen_efficiency, dtype=np.float64,
+                           max_workers=None, motor_map=None, wheel_radius=None, gear_ratio=None):
+    """
+    Evaluate one vehicle over several drive profile files concurrently, with an optional motor efficiency map.
+
+    Profiles are parsed once and kept in memory, and the per-profile pipelines run on a thread pool: the CSV
+    parser and the NumPy operations release the interpreter lock. Returns the results in the order of `file_paths`.
+    """
+    if not file_paths:
+        return []
+    workers = max_workers or min(len(file_paths), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda file_path: evaluate_drive_profile(file_path, mass, frontal_area, C0, C1, regen_efficiency, dtype,
+                                                     motor_map, wheel_radius, gear_ratio),
+            file_paths))
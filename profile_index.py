@@ -0,0 +1,154 @@
+"""
+Index of the drive profile library with precomputed metadata.
+
+The metadata of every drive profile is stored in a JSON file next to the profiles. On every refresh the directory
+is listed once with the file sizes and modification times, and only new or changed files are parsed, so the
+library can be filtered and sorted without opening the profiles.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from energy_model import DRIVE_PROFILES_DIR, phase_segments
+
+INDEX_FILE_NAME = ".profile_index.json"
+
+# Bumped when the metadata fields change, so that older index files are rebuilt
+INDEX_VERSION = 1
+
+# Metadata fields the library can be sorted by, with their labels
+SORT_FIELDS = {
+    "name": "Name",
+    "distance_km": "Distance (km)",
+    "duration_s": "Duration (s)",
+    "max_speed_kph": "Max Speed (km/h)",
+    "average_speed_kph": "Avg Speed (km/h)",
+    "samples": "Samples",
+}
+
+# Index entries per directory, kept in memory between refreshes
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def profile_metadata(file_path):
+    """Sample count, duration, distance, speeds, phases, gradient and height availability and hash of a profile."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    # Same column positions as load_drive_profile: phase, time, speed, and gradient and height when present
+    df = pd.read_csv(io.BytesIO(data), sep=';', decimal=',', encoding='utf-8-sig')
+    time = pd.to_numeric(df.iloc[:, 1], errors='coerce').to_numpy(dtype=float)
+    speed_kph = pd.to_numeric(df.iloc[:, 3], errors='coerce').to_numpy(dtype=float)
+
+    def has_data(position):
+        if df.shape[1] <= position:
+            return False
+        values = pd.to_numeric(df.iloc[:, position], errors='coerce').to_numpy(dtype=float)
+        return bool(np.any(np.nan_to_num(values) != 0))
+
+    # Distance as in calculate_kinematics: every speed sample times the interval up to its timestep
+    duration_s = float(time[-1] - time[0]) if len(time) else 0.0
+    distance_km = float(np.nansum(speed_kph[1:] * np.diff(time))) / 3600
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "samples": len(df),
+        "duration_s": duration_s,
+        "distance_km": distance_km,
+        "max_speed_kph": float(np.nanmax(speed_kph, initial=0)),
+        "average_speed_kph": distance_km / duration_s * 3600 if duration_s > 0 else 0.0,
+        "phases": [str(phase) for phase in dict.fromkeys(phase_segments(df.iloc[:, 0].astype(str).to_numpy())[1])],
+        "has_gradient": has_data(6),
+        "has_height": has_data(7),
+    }
+
+
+def indexed_metadata(file_path):
+    """Metadata of a profile, or the error that made it unreadable; such profiles are left out of the library."""
+    try:
+        return profile_metadata(file_path)
+    except (OSError, ValueError, IndexError, KeyError) as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+
+
+def load_index(directory):
+    """Index entries stored in a directory, or none when the index is missing, unreadable or outdated."""
+    try:
+        with open(os.path.join(directory, INDEX_FILE_NAME), "r") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return stored.get("profiles", {}) if stored.get("version") == INDEX_VERSION else {}
+
+
+def save_index(directory, entries):
+    """Write the index atomically; a read-only library keeps its index in memory only."""
+    index_path = os.path.join(directory, INDEX_FILE_NAME)
+    temporary_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "profiles": entries}, f)
+        os.replace(temporary_path, index_path)
+    except OSError:
+        pass
+
+
+def refresh_profile_index(directory=DRIVE_PROFILES_DIR, max_workers=None):
+    """
+    Metadata of every drive profile in a directory, by file name.
+
+    Only profiles whose size or modification time differs from the index are parsed, concurrently, and the index
+    file is rewritten only when something changed. Unreadable profiles are kept in the index with their error, so
+    they are not parsed again until they change, but are not returned; see `invalid_profiles`.
+    """
+    with _indexes_lock:
+        entries = _indexes.get(directory)
+        if entries is None:
+            entries = load_index(directory)
+
+        with os.scandir(directory) as scan:
+            files = {entry.name: entry.stat() for entry in scan if entry.is_file() and entry.name.endswith(".csv")}
+        changed = [name for name, stat in files.items()
+                   if name not in entries or
+                   (entries[name]["mtime_ns"], entries[name]["size"]) != (stat.st_mtime_ns, stat.st_size)]
+
+        if changed or len(entries) != len(files) or any(name not in files for name in entries):
+            entries = {name: entry for name, entry in entries.items() if name in files}
+            workers = max_workers or min(max(len(changed), 1), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                metadata = executor.map(lambda name: indexed_metadata(os.path.join(directory, name)), changed)
+                for name, values in zip(changed, metadata):
+                    entries[name] = {"mtime_ns": files[name].st_mtime_ns, "size": files[name].st_size, **values}
+            save_index(directory, entries)
+        _indexes[directory] = entries
+    return {name: entry for name, entry in entries.items() if "error" not in entry}
+
+
+def invalid_profiles(directory=DRIVE_PROFILES_DIR):
+    """Errors of the profiles that could not be read at the last refresh of a directory, by file name."""
+    with _indexes_lock:
+        entries = _indexes.get(directory, {})
+        return {name: entry["error"] for name, entry in entries.items() if "error" in entry}
+
+
+def filter_profiles(entries, name_contains="", distance_range_km=None, max_speed_range_kph=None,
+                    requires_gradient=False, requires_height=False, sort_by="name", descending=False):
+    """Names of the indexed profiles that match the filters, sorted by a field of `SORT_FIELDS`."""
+    name_contains = name_contains.strip().lower()
+
+    def matches(name, entry):
+        return (name_contains in name.lower() and
+                (distance_range_km is None or
+                 distance_range_km[0] <= entry["distance_km"] <= distance_range_km[1]) and
+                (max_speed_range_kph is None or
+                 max_speed_range_kph[0] <= entry["max_speed_kph"] <= max_speed_range_kph[1]) and
+                (entry["has_gradient"] or not requires_gradient) and
+                (entry["has_height"] or not requires_height))
+
+    names = [name for name, entry in entries.items() if matches(name, entry)]
+    if sort_by == "name":
+        return sorted(names, key=str.lower, reverse=descending)
+    return sorted(names, key=lambda name: (entries[name][sort_by], name.lower()), reverse=descending)
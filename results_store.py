@@ -0,0 +1,241 @@
+"""
+Persistent, content-addressed store of calculation results.
+
+Results are kept in a SQLite file that the app and API worker processes can share, also across machines through a
+shared volume. On a local disk the file uses a write-ahead log, so readers continue while one process writes. The
+write-ahead log needs shared-memory locking, which network filesystems do not provide, so a file on a network
+filesystem uses a rollback journal instead: writers then lock the whole file and the other processes wait for it
+up to the busy timeout. A result is keyed by a hash of its kind, its parameters and the contents of the files it was
+computed from, so a changed drive profile never returns a stale result. The file is capped in size: the least
+recently used results are evicted first.
+
+The store is disabled by default. Set EV_RESULTS_STORE to the path of the SQLite file to enable it and
+EV_RESULTS_STORE_MAX_MB to its maximum size (default 512). EV_RESULTS_STORE_JOURNAL overrides the journal mode:
+"wal", "delete" or "truncate" (default "auto", by the filesystem of the file). Storage errors never fail a
+calculation: the result is computed instead.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+DEFAULT_MAX_MB = 512
+
+# How long a connection waits for the lock of another writer before the operation fails
+BUSY_TIMEOUT_S = 30
+
+JOURNAL_MODES = ("WAL", "DELETE", "TRUNCATE")
+
+# Filesystem types of /proc/mounts without the shared-memory locking of the write-ahead log
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "fuse.sshfs", "fuse.glusterfs",
+                       "glusterfs", "lustre", "gpfs"}
+
+# Last-used times are only written when they are older than this, so that reads rarely write
+ACCESS_UPDATE_INTERVAL_S = 60
+
+# Content hashes of files, per path and version
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+def file_hash(file_path):
+    """SHA-256 of the contents of a file, computed once per file version."""
+    stat = os.stat(file_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(file_path)
+    if cached is None or cached[0] != version:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        cached = (version, digest.hexdigest())
+        with _file_hashes_lock:
+            _file_hashes[file_path] = cached
+    return cached[1]
+
+
+def filesystem_type(path):
+    """Type of the filesystem the path is on, from the mount table; None where there is none (outside Linux)."""
+    directory = os.path.dirname(os.path.realpath(path))
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    best, best_type = "", None
+    for mount_point, fs_type in mounts:
+        # Spaces and other special characters of mount points are octal escapes
+        mount_point = re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), mount_point)
+        inside = directory == mount_point or directory.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) >= len(best):
+            best, best_type = mount_point, fs_type
+    return best_type
+
+
+def journal_mode(path):
+    """Journal mode of the file at the path: EV_RESULTS_STORE_JOURNAL, or WAL unless it is on a network filesystem."""
+    mode = os.environ.get("EV_RESULTS_STORE_JOURNAL", "auto").upper()
+    if mode == "AUTO":
+        return "DELETE" if filesystem_type(path) in NETWORK_FILESYSTEMS else "WAL"
+    if mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown results store journal mode {mode!r}, expected auto or one of {JOURNAL_MODES}")
+    return mode
+
+
+def result_key(kind, parameters, files=()):
+    """Content address of a result: its kind, its JSON-serializable parameters and the contents of its files."""
+    payload = json.dumps({
+        "kind": kind,
+        "parameters": parameters,
+        "files": [file_hash(file_path) for file_path in files],
+    }, sort_keys=True, default=float)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def serialize(result):
+    """A dict of arrays and numbers as bytes, without pickling."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **{name: np.asarray(value) for name, value in result.items()})
+    return buffer.getvalue()
+
+
+def deserialize(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return {name: arrays[name].item() if arrays[name].ndim == 0 else arrays[name] for name in arrays.files}
+
+
+class ResultsStore:
+    """A size-capped SQLite store of results, safe for concurrent use from several threads and processes."""
+
+    def __init__(self, path, max_bytes, journal_mode="WAL"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.journal_mode = journal_mode
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connection(self):
+        """
+        One connection per thread. WAL lets readers of other processes continue while one process writes; with a
+        rollback journal they wait for the writer up to the busy timeout, and every commit is synced to the file.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_S * 1000}")
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            connection.execute(f"PRAGMA synchronous={'NORMAL' if self.journal_mode == 'WAL' else 'FULL'}")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys):
+        """Stored results of the keys, as a dict of the keys that were found."""
+        if not keys:
+            return {}
+        connection = self._connection()
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # SQLite limits the number of parameters per statement
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            rows = connection.execute(
+                f"SELECT key, value, accessed FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update({key: (value, accessed) for key, value, accessed in rows})
+
+        now = time.time()
+        stale = [key for key, (_, accessed) in found.items() if now - accessed > ACCESS_UPDATE_INTERVAL_S]
+        if stale:
+            connection.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(now, key) for key in stale])
+        return {key: deserialize(value) for key, (value, _) in found.items()}
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, kind, results):
+        """Store a dict of key -> result and evict the least recently used results beyond the size cap."""
+        if not results:
+            return
+        now = time.time()
+        rows = [(key, kind, sqlite3.Binary(data), len(data), now)
+                for key, data in ((key, serialize(result)) for key, result in results.items())]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("INSERT OR REPLACE INTO results (key, kind, value, size, accessed) "
+                                   "VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def put(self, kind, key, result):
+        self.put_many(kind, {key: result})
+
+    def _evict(self, connection):
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Free down to 90 % of the cap, so that eviction does not run on every write
+        excess = total - int(self.max_bytes * 0.9)
+        keys = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY accessed"):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM results WHERE key = ?", keys)
+
+    def get_or_compute(self, kind, parameters, compute, files=()):
+        """
+        The stored result of `compute()` for these parameters and files, computing and storing it if missing. When
+        the store cannot be read or written, the result is computed and returned all the same.
+        """
+        key = result_key(kind, parameters, files)
+        try:
+            result = self.get(key)
+        except sqlite3.Error:
+            result = None
+        if result is None:
+            result = compute()
+            try:
+                self.put(kind, key, result)
+            except sqlite3.Error:
+                pass
+        return result
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_results_store():
+    """The results store configured by the environment, or None when it is disabled or cannot be opened."""
+    global _store
+    path = os.environ.get("EV_RESULTS_STORE", "")
+    if not path:
+        return None
+    with _store_lock:
+        try:
+            mode = journal_mode(path)
+            if _store is None or _store.path != path or _store.journal_mode != mode:
+                max_bytes = int(float(os.environ.get("EV_RESULTS_STORE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+                _store = ResultsStore(path, max_bytes, mode)
+        except (sqlite3.Error, ValueError):
+            return None
+        return _store
@@ -0,0 +1,198 @@
+"""
+Results that several pages share, recomputed from the current inputs whenever a page reads them.
+
+Only the selected page runs, so a page cannot rely on a result another page stored on its last visit: the sidebar
+or another page may have changed since. The pages store their inputs in the session state instead, and the shared
+results are calculated here from those inputs, the defaults of the pages that have not been opened yet and the
+current sidebar.
+"""
+import math
+import numpy as np
+import streamlit as st
+import config
+from calculations import calculate_scenario_power_and_torque
+from design_chain import DESIGN_INPUT_DEFAULTS, size_battery_pack
+from energy_model import (calculate_kinematics, calculate_traction, calculate_phase_breakdown, reweight_phases,
+                          payload_fraction_profile)
+
+# Inputs of the pages outside the design chain that shared results depend on, with the defaults of their widgets
+PAGE_INPUT_DEFAULTS = {
+    # Scenarios: the current situation
+    "scenario_speed_kph": 60,
+    "scenario_grade_percent": 5.0,
+    "scenario_acceleration": 1.0,
+    "scenario_headwind_kph": 0,
+    # Drive Train
+    "motor_max_rpm": 7000,
+    # Drive Profile: the selected profile, motor efficiency map and payload, and the phase mix used for the battery
+    "drive_profile_name": None,
+    "motor_map_name": None,
+    "payload_name": None,
+    "phase_mix": None,
+    # Battery
+    "specific_energy_wh_per_kg": 120,
+}
+
+
+def design_inputs():
+    """Design chain inputs of the pages, with the defaults of the pages that have not been opened yet."""
+    return {**DESIGN_INPUT_DEFAULTS, **st.session_state.get("design_inputs", {})}
+
+
+def page_inputs():
+    """Inputs of `PAGE_INPUT_DEFAULTS` of the pages, with the defaults of the pages that have not been opened yet."""
+    return {**PAGE_INPUT_DEFAULTS, **st.session_state.get("page_inputs", {})}
+
+
+def store_page_inputs(**inputs):
+    st.session_state.setdefault("page_inputs", {}).update(inputs)
+
+
+# --- Scenarios ---
+def predefined_scenarios(inputs=None):
+    """The scenarios of the Scenarios tab, the current situation first."""
+    inputs = inputs or page_inputs()
+    top_speed_or_100 = config.top_speed if config.top_speed < 100 else 100
+    return [
+        {
+            "name": "Current Situation",
+            "speed_kph": inputs["scenario_speed_kph"],
+            "grade_percent": inputs["scenario_grade_percent"],
+            "acceleration": inputs["scenario_acceleration"],
+            "headwind_kph": inputs["scenario_headwind_kph"],
+        },
+        {
+            "name": "Static Top Speed Requirement",
+            "speed_kph": config.top_speed,
+            "grade_percent": 0,
+            "acceleration": 0,
+            "headwind_kph": inputs["scenario_headwind_kph"],
+        },
+        {
+            "name": f"Time to {top_speed_or_100} km/h in {round(config.time_to_100, 2)} seconds",
+            "speed_kph": top_speed_or_100,
+            "grade_percent": 0,
+            "acceleration": round(config.time_to_100_acceleration, 2),
+            "headwind_kph": 0,
+        },
+        {
+            "name": "Flat Roads",
+            "speed_kph": top_speed_or_100,
+            "grade_percent": 0,
+            "acceleration": 0,
+            "headwind_kph": inputs["scenario_headwind_kph"],
+        },
+        {
+            "name": "Inclines",
+            "speed_kph": 5,
+            "grade_percent": 20,
+            "acceleration": 0,
+            "headwind_kph": inputs["scenario_headwind_kph"],
+        },
+        {
+            "name": "Acceleration",
+            "speed_kph": 50,
+            "grade_percent": 0,
+            "acceleration": 1.5,
+            "headwind_kph": inputs["scenario_headwind_kph"],
+        },
+    ]
+
+
+def highest_power_and_torque():
+    """Highest required power (W) and torque (Nm) of the scenarios of the Scenarios tab, at least zero."""
+    scenarios = predefined_scenarios()
+    power, torque = calculate_scenario_power_and_torque(
+        config.mass, config.frontal_area, config.wheel_radius, config.C0, config.C1, config.km,
+        *(np.array([scenario[name] for scenario in scenarios], dtype=float)
+          for name in ("speed_kph", "grade_percent", "acceleration", "headwind_kph")))
+    return max(float(power.max()), 0.0), max(float(torque.max()), 0.0)
+
+
+# --- Drive Train ---
+def gear_ratio():
+    """Gear ratio of the Drive Train tab for the top speed and wheel radius of the sidebar."""
+    return (page_inputs()["motor_max_rpm"] * config.wheel_radius * 2 * math.pi) / (config.top_speed_mps * 60)
+
+
+# --- Drive Profile ---
+def van_payloads_kg():
+    """Payload of a full package and restaurant van from the Logistics tab, None before it has been opened."""
+    return {
+        "Package van": st.session_state.get("package_van_payload_kg"),
+        "Restaurant van": st.session_state.get("restaurant_van_payload_kg"),
+    }
+
+
+def drive_energy():
+    """
+    Energy consumption (Wh/km), tractive power and distance of the current vehicle over the drive profile of the
+    Drive Profile tab, with its regenerative braking, motor map, payload and phase mix; None before that tab has
+    been opened.
+
+    The result is kept until one of its inputs changes, so reading it on every rerun costs one comparison.
+    """
+    drive = st.session_state.get("drive_profile")
+    if drive is None:
+        return None
+    inputs = page_inputs()
+    regen_efficiency = design_inputs()["regen_efficiency"]
+    motor_map = st.session_state.get("motor_map")
+    ratio = gear_ratio() if motor_map is not None else None
+    payload_kg = van_payloads_kg().get(inputs["payload_name"]) or 0
+    shares = inputs["phase_mix"]
+    key = (drive["version"], config.mass, config.frontal_area, config.C0, config.C1, regen_efficiency,
+           inputs["motor_map_name"] if motor_map is not None else None, config.wheel_radius, ratio, payload_kg,
+           tuple(sorted(shares.items())) if shares else None)
+    cached = st.session_state.get("drive_energy")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    profile = calculate_kinematics(drive["time"], drive["speed_kph"])
+    mass = config.mass
+    if payload_kg:
+        mass = config.mass + payload_kg * payload_fraction_profile(profile["speed_mps"])
+    calculate_traction(profile, drive["acceleration"], mass, config.frontal_area, config.C0, config.C1,
+                       regen_efficiency, motor_map=motor_map, wheel_radius=config.wheel_radius, gear_ratio=ratio)
+
+    cycle_distance_km = float(profile["total_distance_m"][-1]) / 1000
+    if shares:
+        wh_per_km = reweight_phases(calculate_phase_breakdown(drive["phase"], profile), shares)
+    elif cycle_distance_km > 0:
+        wh_per_km = float(profile["total_energy_kwh"][-1]) / cycle_distance_km * 1000
+    else:
+        wh_per_km = float('inf')
+    result = {
+        "wh_per_km": wh_per_km,
+        # km/kWh, zero when the profile uses no energy per km
+        "average_energy_efficiency": 1000 / wh_per_km if wh_per_km > 0 else 0,
+        "tractive_power_w": profile["tractive_power_w"],
+        "time_interval_s": profile["time_interval_s"],
+        "cycle_distance_km": cycle_distance_km,
+    }
+    st.session_state["drive_energy"] = (key, result)
+    return result
+
+
+def wh_per_km():
+    """Energy consumption of the Drive Profile tab for the current inputs, None before it has been opened."""
+    energy = drive_energy()
+    return None if energy is None else energy["wh_per_km"]
+
+
+# --- Battery ---
+def battery_pack():
+    """
+    The pack of the Battery tab for the current consumption and battery inputs, with its weight; None before the
+    Drive Profile tab has been opened.
+    """
+    consumption = wh_per_km()
+    if consumption is None:
+        return None
+    inputs = design_inputs()
+    pack = size_battery_pack(consumption, inputs["total_distance_km"], inputs["battery_efficiency"],
+                             inputs["auxiliary_load_factor"], inputs["motor_voltage"], inputs["nominal_cell_voltage"],
+                             inputs["cell_capacity_ah"])
+    pack = {name: float(value) for name, value in pack.items()}
+    pack["weight_kg"] = pack["final_capacity_kwh"] * 1000 / page_inputs()["specific_energy_wh_per_kg"]
+    return pack
@@ -0,0 +1,24 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The modules of the app live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def drive_cycle():
+    """A synthetic urban drive cycle of stops and accelerations, as `load_drive_cycle` returns it."""
+    rng = np.random.default_rng(0)
+    time = np.arange(0, 1800.0)
+    speed_kph = np.clip(45 * np.sin(time / 60) ** 2 + rng.normal(0, 2, len(time)), 0, None)
+    speed_kph[(time % 300) < 20] = 0
+    speed_mps = speed_kph / 3.6
+    return {
+        "time": time,
+        "speed_kph": speed_kph,
+        "speed_mps": speed_mps,
+        "acceleration": np.gradient(speed_mps, time),
+        "time_interval_s": np.concatenate(([0.0], np.diff(time))),
+    }
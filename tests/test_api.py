@@ -0,0 +1,70 @@
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import api
+from api import Batcher, evaluate_pack_sizing, evaluate_scenarios
+
+
+def scenario_requests(count):
+    return [[{"speed_kph": 10.0 + index, "grade_percent": index % 7, "mass": 2000.0 + 10 * index}]
+            for index in range(count)]
+
+
+def test_batched_results_equal_single_requests():
+    batcher = Batcher(evaluate_scenarios, max_wait_s=0.02)
+    requests = scenario_requests(40)
+    with ThreadPoolExecutor(16) as executor:
+        batched = list(executor.map(batcher.submit, requests))
+    assert batched == [evaluate_scenarios(items) for items in requests]
+
+
+def test_a_failing_request_does_not_fail_its_batch():
+    def evaluate(items):
+        if any(item.get("fail") for item in items):
+            raise ValueError("failing item")
+        return evaluate_pack_sizing(items)
+
+    batcher = Batcher(evaluate, max_wait_s=0.05)
+    requests = [[{"wh_per_km": 150.0}], [{"fail": 1}], [{"wh_per_km": 250.0}, {"wh_per_km": 300.0}]]
+
+    def submit(items):
+        try:
+            return batcher.submit(items)
+        except ValueError as error:
+            return str(error)
+
+    with ThreadPoolExecutor(3) as executor:
+        results = list(executor.map(submit, requests))
+    assert results == [evaluate_pack_sizing(requests[0]), "failing item", evaluate_pack_sizing(requests[2])]
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    listening_socket = socket.create_server(("127.0.0.1", 0))
+    threading.Thread(target=api.serve, args=(listening_socket,), daemon=True).start()
+    return f"http://127.0.0.1:{listening_socket.getsockname()[1]}"
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_http_batch_and_non_finite_numbers(server_url):
+    items = [item for request in scenario_requests(3) for item in request]
+    status, results = post(server_url + "/scenario", json.dumps(items).encode())
+    assert status == 200 and results == evaluate_scenarios(items)
+
+    # NaN and Infinity are rejected on the way in and never written on the way out
+    status, result = post(server_url + "/scenario", b'{"mass": NaN}')
+    assert status == 400 and "finite" in result["error"]
+    status, result = post(server_url + "/scenario", b'{"mass": 1e308, "speed_kph": 1e308}')
+    assert status == 500 and "finite" in result["error"]
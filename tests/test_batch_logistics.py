@@ -0,0 +1,56 @@
+import math
+import pandas as pd
+import pytest
+from batch_logistics import aggregate_logistics, calculate_area_table, calculate_logistics
+
+DEFAULTS = {"packages_per_person_per_day": 0.06, "restaurant_crates_per_person_per_day": 0.008,
+            "packages_per_hour": 12.0, "shift_length": 8.0, "amount_of_shifts": 2}
+
+
+def single_area(population, packages_per_person_per_day, restaurant_crates_per_person_per_day, packages_per_hour,
+                shift_length, amount_of_shifts):
+    """The van counts of the Logistics tab for one area, with the default van and crate inputs."""
+    packages_per_day = population * packages_per_person_per_day
+    minimum_vans_needed = math.ceil(packages_per_day / (packages_per_hour * shift_length * amount_of_shifts))
+    amount_of_crates = math.ceil(80 * 0.027 * 1.2 / 0.045)
+    crates_vertically = math.floor(1.5 / 0.3)
+    actual_amount_of_crates = math.ceil(amount_of_crates / crates_vertically / 2) * crates_vertically * 2
+    restaurant_vans = math.ceil(population * restaurant_crates_per_person_per_day /
+                                (actual_amount_of_crates * amount_of_shifts))
+    return minimum_vans_needed, restaurant_vans
+
+
+def test_area_table_matches_the_single_area_calculation():
+    areas = pd.DataFrame({"area": ["A", "B", "C"], "population": [159640, 20000, 5000],
+                          "shift_length": [8, 10, 6], "amount_of_shifts": [2, 1, 3]})
+    table = calculate_area_table(areas, **DEFAULTS)
+    for row in table.itertuples():
+        inputs = {**DEFAULTS, "shift_length": row.shift_length, "amount_of_shifts": row.amount_of_shifts}
+        package_vans, restaurant_vans = single_area(row.population, **{
+            name: inputs[name] for name in ("packages_per_person_per_day", "restaurant_crates_per_person_per_day",
+                                            "packages_per_hour", "shift_length", "amount_of_shifts")})
+        assert row.minimum_vans_needed == package_vans
+        assert row.minimum_vans_needed_restaurant == restaurant_vans
+        assert row.total_vans_needed == package_vans + restaurant_vans
+
+
+def test_areas_without_throughput_need_no_vans():
+    # Zero working hours stop the package deliveries, zero shifts all deliveries
+    result = calculate_logistics([1000, 1000, 1000], 0.06, 0.008, 12.0, [8, 0, 8], [2, 2, 0])
+    assert result["minimum_vans_needed"].tolist()[1:] == [0, 0]
+    assert result["total_vans_needed"][2] == 0
+    assert result["total_vans_needed"][0] > 0
+
+
+def test_totals_keep_the_driver_hours():
+    areas = pd.DataFrame({"population": [100000, 30000], "shift_length": [8, 12], "amount_of_shifts": [2, 1]})
+    table = calculate_area_table(areas, **DEFAULTS)
+    totals = aggregate_logistics(table)
+    assert totals["total_vans_needed"] == table["total_vans_needed"].sum()
+    driver_hours = (table["total_vans_needed"] * table["total_working_hours_per_day"]).sum()
+    assert totals["total_vans_needed"] * totals["total_working_hours_per_day"] == pytest.approx(driver_hours)
+
+
+def test_area_table_needs_a_population():
+    with pytest.raises(ValueError):
+        calculate_area_table(pd.DataFrame({"shift_length": [8]}), **DEFAULTS)
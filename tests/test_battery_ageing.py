@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import battery_ageing
+from battery_ageing import DAYS_PER_YEAR, RATED_FADE, simulate_battery_ageing
+
+FLEET = {"capacity_kwh": 60.0, "energy_per_shift_kwh": 30.0, "amount_of_shifts": 2, "required_range_km": 150.0,
+         "wh_per_km": 250.0}
+
+
+def sequential_ageing(energy_kwh, capacity_kwh, amount_of_shifts, minimum_state_of_health, battery_efficiency,
+                      cycle_life, dod_exponent, calendar_fade_per_year):
+    """One van day by day, solving the depth of discharge of each day to convergence."""
+    state_of_health = np.ones(len(energy_kwh))
+    replacements = []
+    pack_start, cycle_fade = 0, 0.0
+    for day, energy in enumerate(energy_kwh):
+        calendar_fade = calendar_fade_per_year * np.sqrt((day - pack_start + 1) / DAYS_PER_YEAR)
+        health = 1 - calendar_fade - cycle_fade
+        for _ in range(50):
+            depth_of_discharge = min(energy / (battery_efficiency * capacity_kwh * health), 1)
+            fade = amount_of_shifts * RATED_FADE / cycle_life * depth_of_discharge ** dod_exponent
+            health = 1 - calendar_fade - cycle_fade - fade
+        cycle_fade += fade
+        state_of_health[day] = health
+        if health < minimum_state_of_health:
+            replacements.append(day)
+            pack_start, cycle_fade = day + 1, 0.0
+    return state_of_health, replacements
+
+
+def test_calendar_fade_after_a_year():
+    # Without cycling the pack loses exactly the calendar fade per year after DAYS_PER_YEAR days
+    result = simulate_battery_ageing(3, 2 * DAYS_PER_YEAR, **FLEET, cycle_life=1e15, calendar_fade_per_year=0.03,
+                                     dtype=np.float64)
+    assert result["state_of_health"][:, DAYS_PER_YEAR - 1] == pytest.approx(1 - 0.03, abs=1e-9)
+    assert result["state_of_health"][:, 2 * DAYS_PER_YEAR - 1] == pytest.approx(1 - 0.03 * np.sqrt(2), abs=1e-9)
+    assert result["replacements_per_van"].sum() == 0 and (result["first_replacement_day"] == -1).all()
+
+
+def sequential_fleet(result, days, parameters):
+    """The sequential simulation of every van, with the same lognormal energy per van and day as `result`."""
+    rng = np.random.default_rng(3)
+    sigma = np.sqrt(np.log1p(0.2 ** 2))
+    energy_kwh = FLEET["energy_per_shift_kwh"] * rng.lognormal(-0.5 * sigma ** 2, sigma, size=(4, days))
+    return [sequential_ageing(energy, FLEET["capacity_kwh"], FLEET["amount_of_shifts"],
+                              result["minimum_state_of_health"], **parameters) for energy in energy_kwh]
+
+
+def test_ageing_matches_a_sequential_simulation(monkeypatch):
+    days = 3 * DAYS_PER_YEAR
+    parameters = {"battery_efficiency": 0.95, "cycle_life": 400, "dod_exponent": 1.5, "calendar_fade_per_year": 0.02}
+    arguments = {**FLEET, **parameters, "daily_variation": 0.2, "seed": 3, "dtype": np.float64}
+
+    # Iterated to convergence, the fixed point is the day-by-day solution
+    monkeypatch.setattr(battery_ageing, "FADE_PASSES", 12)
+    result = simulate_battery_ageing(4, days, **arguments)
+    # Every van is in its second pack by the end of the horizon
+    assert (result["replacements_per_van"] == 1).all()
+    for van, (state_of_health, replacements) in enumerate(sequential_fleet(result, days, parameters)):
+        np.testing.assert_allclose(result["state_of_health"][van], state_of_health, rtol=1e-9)
+        assert result["first_replacement_day"][van] == replacements[0]
+    assert result["replacements_per_day"].sum() == result["replacements_per_van"].sum()
+
+    # The default passes keep the first packs within a small fraction of a percent of it, replacements within a day
+    monkeypatch.undo()
+    approximate = simulate_battery_ageing(4, days, **arguments)
+    first_pack = np.arange(days) < result["first_replacement_day"][:, np.newaxis]
+    np.testing.assert_allclose(approximate["state_of_health"][first_pack], result["state_of_health"][first_pack],
+                               atol=5e-4)
+    assert np.abs(approximate["first_replacement_day"] - result["first_replacement_day"]).max() <= 1
+
+
+def test_a_pack_that_does_not_cover_the_range_is_rejected():
+    with pytest.raises(ValueError):
+        simulate_battery_ageing(1, 10, **{**FLEET, "required_range_km": 300.0})
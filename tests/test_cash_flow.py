@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from cash_flow import calculate_cash_flows, cash_flow_metrics, internal_rate_of_return
+
+
+def present_value(flows, annual_rate):
+    return float(np.sum(flows / (1 + annual_rate) ** (np.arange(len(flows)) / 12)))
+
+
+def test_irr_zeroes_the_present_value():
+    flows = np.zeros((3, 121))
+    flows[0, :37] = [-10000.0] + [500.0] * 36
+    flows[1] = [-10000.0] + [150.0] * 120
+    flows[2, :3] = [-5000.0, 3000.0, 3000.0]
+    irr = internal_rate_of_return(flows)
+    for row, rate in zip(flows, irr):
+        assert present_value(row, rate) == pytest.approx(0, abs=1e-6)
+
+
+def test_irr_of_rows_matches_single_rows():
+    rng = np.random.default_rng(1)
+    flows = np.concatenate([-rng.uniform(5000, 20000, (50, 1)), rng.uniform(0, 600, (50, 60))], axis=1)
+    irr = internal_rate_of_return(flows)
+    # The tolerance of the monthly rate, as an annual rate
+    np.testing.assert_allclose(irr, [internal_rate_of_return(row[np.newaxis])[0] for row in flows], atol=1e-8)
+
+
+def test_irr_is_nan_without_a_sign_change():
+    flows = np.array([[-1000.0] + [-10.0] * 12, [1000.0] + [10.0] * 12])
+    assert np.isnan(internal_rate_of_return(flows)).all()
+
+
+def test_metrics_at_the_irr():
+    flows = np.array([[-10000.0] + [500.0] * 36])
+    metrics = cash_flow_metrics(flows, internal_rate_of_return(flows))
+    assert metrics["npv"][0] == pytest.approx(0, abs=1e-6)
+    assert metrics["payback_months"][0] == pytest.approx(20)
+
+
+def test_cash_flows_match_a_monthly_loop():
+    scenario = {"total_investment": 200000.0, "revenue_per_month": 9000.0, "monthly_cost": 4000.0,
+                "cost_inflation": 0.03, "revenue_inflation": 0.02, "financed_share": 0.6, "loan_rate": 0.05,
+                "loan_years": 4.0, "number_of_vans": 5.0, "cost_per_van": 30000.0, "vehicle_life_years": 3.0}
+    flows = calculate_cash_flows(120, **{name: [value, value] for name, value in scenario.items()},
+                                 extra_costs=np.full(120, 100.0))
+    assert flows.shape == (2, 121)
+
+    principal = scenario["total_investment"] * scenario["financed_share"]
+    rate = scenario["loan_rate"] / 12
+    payment = principal * rate / (1 - (1 + rate) ** -48)
+    # The loan payments repay the financed share at the loan rate
+    assert sum(payment / (1 + rate) ** month for month in range(1, 49)) == pytest.approx(principal)
+    expected = [-scenario["total_investment"] * (1 - scenario["financed_share"])]
+    for month in range(1, 121):
+        cost_level = (1 + scenario["cost_inflation"]) ** ((month - 1) / 12)
+        flow = (scenario["revenue_per_month"] * (1 + scenario["revenue_inflation"]) ** ((month - 1) / 12) -
+                scenario["monthly_cost"] * cost_level - 100.0)
+        if month <= 48:
+            flow -= payment
+        if month % 36 == 0:
+            flow -= scenario["number_of_vans"] * scenario["cost_per_van"] * cost_level
+        expected.append(flow)
+    np.testing.assert_allclose(flows, [expected, expected], rtol=1e-12)
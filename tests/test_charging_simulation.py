@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from charging_simulation import simulate_depot_charging, time_of_use_prices
+
+# Vans return exactly at the end of their shift and charge at the charger power
+EXACT = {"charger_power_kw": 11.0, "battery_capacity_kwh": 60.0, "first_shift_start_h": 6.0, "days": 1,
+         "charging_efficiency": 1.0, "arrival_spread_h": 0.0}
+
+
+def test_charging_queue_of_a_hand_worked_schedule():
+    # One 8 h shift: both vans are back at 14:00 with 22 kWh to charge, 2 h each on the one charger.
+    # Van 0 charges 14:00-16:00, van 1 waits and charges 16:00-18:00.
+    prices = time_of_use_prices(0.40, 0.20, 15, 17)
+    result = simulate_depot_charging(2, 1, energy_per_shift_kwh=22.0, shift_length_h=8.0, amount_of_shifts=1,
+                                     shift_gap_h=0.0, hourly_prices=prices, **EXACT)
+    assert result["charging_sessions"] == 2
+    assert result["average_waiting_time_h"] == pytest.approx(1.0)
+    assert result["grid_energy_kwh"] == pytest.approx(44.0)
+    assert result["peak_grid_load_kw"] == pytest.approx(11.0)
+    assert result["charger_utilisation"] == pytest.approx(4 / 24)
+    # 14-15 and 17-18 at the peak price, 15-17 off-peak
+    assert result["energy_cost"] == pytest.approx(11.0 * (0.40 + 0.20 + 0.20 + 0.40))
+    assert result["undercharged_departures"] == 0
+    assert np.flatnonzero(result["grid_load_kw"])[[0, -1]].tolist() == [14 * 60, 18 * 60 - 1]
+
+
+def test_a_van_back_at_the_next_shift_start_misses_its_charge():
+    # Shifts 06:00-10:00 and 10:00-14:00 without a gap: the van leaves again at 10:00 with the first deficit and
+    # charges both shifts from 14:00 to 16:00
+    result = simulate_depot_charging(1, 1, energy_per_shift_kwh=11.0, shift_length_h=4.0, amount_of_shifts=2,
+                                     shift_gap_h=0.0, **EXACT)
+    assert result["undercharged_departures"] == 1
+    assert result["charging_sessions"] == 1
+    assert result["grid_energy_kwh"] == pytest.approx(22.0)
+
+
+def test_departure_interrupts_a_charge():
+    # Two vans with 22 kWh after a 06:00-10:00 shift and one charger until the next shift at 11:00: van 0 gets
+    # one hour, van 1 none
+    result = simulate_depot_charging(2, 1, energy_per_shift_kwh=22.0, shift_length_h=4.0, amount_of_shifts=2,
+                                     shift_gap_h=1.0, **EXACT)
+    # Both leave undercharged at 11:00; after the second shift van 0 needs 33 kWh and van 1 44 kWh
+    assert result["undercharged_departures"] == 2
+    assert result["grid_energy_kwh"] == pytest.approx(11.0 + 33.0 + 44.0)
+
+
+def test_shifts_longer_than_a_day_are_rejected():
+    with pytest.raises(ValueError):
+        simulate_depot_charging(1, 1, energy_per_shift_kwh=10.0, shift_length_h=10.0, amount_of_shifts=2,
+                                shift_gap_h=2.5, **EXACT)
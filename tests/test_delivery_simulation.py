@@ -0,0 +1,34 @@
+import pytest
+from delivery_simulation import required_fleet_size, simulate_delivery_fleet
+
+SHIFTS = {"shift_length_h": 8.0, "amount_of_shifts": 2, "mean_stop_time_h": 0.05}
+
+
+def test_required_fleet_is_the_smallest_that_meets_the_service_level():
+    result = required_fleet_size(2000, 120, **SHIFTS, service_level=0.95)
+    assert result["service_level_met"]
+    assert result["on_time_rate"] >= 0.95
+    smaller = simulate_delivery_fleet(2000, result["number_of_vans"] - 1, 120, **SHIFTS)
+    assert smaller["on_time_rate"] < 0.95
+
+
+def test_unreachable_service_level_is_flagged():
+    # The depot round trip takes longer than the shift, so nothing is ever delivered
+    result = required_fleet_size(500, 120, shift_length_h=1.0, amount_of_shifts=1, mean_stop_time_h=0.05,
+                                 reload_time_h=2.0)
+    assert not result["service_level_met"]
+    assert result["on_time_rate"] == 0
+
+
+def test_single_van_with_ample_time_delivers_everything():
+    # About 40 items at 3 minutes a stop take 2 h of an 8 h shift, in a single load
+    result = simulate_delivery_fleet(40, 1, 200, 8.0, 1, 0.05, stop_time_cv=0.05, days=10)
+    assert result["on_time_rate"] == 1.0
+    assert result["fully_served_shifts"] == 1.0
+    assert result["loads_per_van_per_shift"] == 1.0
+
+
+def test_no_demand_and_no_load_capacity():
+    assert required_fleet_size(0, 120, **SHIFTS)["number_of_vans"] == 0
+    with pytest.raises(ValueError):
+        required_fleet_size(100, 0, **SHIFTS)
@@ -0,0 +1,40 @@
+import numpy as np
+from demand_model import (PACKAGE_HOURLY_PROFILE, PACKAGE_MONTHLY_FACTORS, PACKAGE_WEEKDAY_FACTORS, REFERENCE_YEAR,
+                          calendar_days, hourly_demand, peak_demand_fleet, peak_fleet_size)
+
+
+def test_peak_fleet_size_matches_the_higher_percentile():
+    rng = np.random.default_rng(2)
+    hourly_demand = rng.gamma(2.0, 40.0, (4, 8760)) * (rng.random((4, 8760)) < 0.6)
+    throughput = np.array([12.0, 20.0, 7.5, 30.0])
+
+    for percentile in (50.0, 90.0, 95.0, 99.5, 100.0):
+        vans = peak_fleet_size(hourly_demand, throughput, percentile)
+        for area in range(len(hourly_demand)):
+            demand = hourly_demand[area][hourly_demand[area] > 0]
+            expected = np.percentile(np.ceil(demand / throughput[area] - 1e-9), percentile, method="higher")
+            assert vans[area] == expected
+
+
+def test_peak_fleet_size_without_demand():
+    assert peak_fleet_size(np.zeros((2, 24)), [10.0, 0.0]).tolist() == [0, 0]
+
+
+def test_demand_of_a_year_averages_the_daily_demand():
+    demand = hourly_demand([1000.0, 250.0], PACKAGE_HOURLY_PROFILE, PACKAGE_WEEKDAY_FACTORS, PACKAGE_MONTHLY_FACTORS)
+    assert demand.shape == (2, 365 * 24)
+    np.testing.assert_allclose(demand.sum(axis=1) / 365, [1000.0, 250.0])
+    # 2025 starts on a Wednesday; a leap year has one more day
+    assert calendar_days(REFERENCE_YEAR)[0][0] == 2
+    assert hourly_demand(10.0, PACKAGE_HOURLY_PROFILE, PACKAGE_WEEKDAY_FACTORS, PACKAGE_MONTHLY_FACTORS,
+                         year=2028).shape == (1, 366 * 24)
+
+
+def test_peak_demand_fleet_does_not_depend_on_the_date():
+    arguments = (5000.0, 300.0, 15.0, 40.0, 4.0, 3.0)
+    fleet = peak_demand_fleet(*arguments)
+    assert fleet["package_vans"].tolist() == peak_demand_fleet(*arguments, year=REFERENCE_YEAR)["package_vans"].tolist()
+    assert fleet["package_vans"][0] > 0 and fleet["restaurant_vans"][0] > 0
+    # Deliveries happen within the 12 hours of the shifts from 6:00 only
+    hours = fleet["package_demand"][0].reshape(-1, 24)
+    assert hours[:, :6].sum() == 0 and hours[:, 18:].sum() == 0
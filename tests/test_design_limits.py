@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from design_chain import DESIGN_INPUT_DEFAULTS, size_battery_pack
+from design_limits import min_pack_for_range
+from energy_model import calculate_wh_per_km
+
+PACK_INPUTS = ["battery_efficiency", "auxiliary_load_factor", "motor_voltage", "nominal_cell_voltage",
+               "cell_capacity_ah"]
+
+
+def sequential_min_pack(target_range_km, payload_kg, vehicle_mass_without_pack, specific_energy_wh_per_kg,
+                        drive_cycle, frontal_area, C0, C1, regen_efficiency):
+    """The fixed point of the pack mass and the consumption of one target, one step at a time."""
+    pack_mass = 0.0
+    parallel_strings = None
+    for _ in range(50):
+        wh_per_km = calculate_wh_per_km(drive_cycle["speed_mps"], drive_cycle["acceleration"],
+                                        drive_cycle["time_interval_s"],
+                                        vehicle_mass_without_pack + payload_kg + pack_mass, frontal_area, C0, C1,
+                                        regen_efficiency)[0]
+        pack = size_battery_pack(wh_per_km, target_range_km, *(DESIGN_INPUT_DEFAULTS[name] for name in PACK_INPUTS))
+        if pack["parallel_strings"] == parallel_strings:
+            return pack, vehicle_mass_without_pack + payload_kg + pack_mass
+        parallel_strings = pack["parallel_strings"]
+        pack_mass = pack["final_capacity_kwh"] * 1000 / specific_energy_wh_per_kg
+    return None, None
+
+
+def test_min_pack_matches_a_sequential_loop(drive_cycle):
+    payloads_kg = np.linspace(0, 2000, 21)
+    vehicle = {"frontal_area": 7.5, "C0": 0.012, "C1": 3e-6, "regen_efficiency": 0.6}
+    pack = min_pack_for_range(
+        150.0, payloads_kg, 1800.0, 120.0, drive_cycle["speed_mps"], drive_cycle["acceleration"],
+        drive_cycle["time_interval_s"], vehicle["frontal_area"], vehicle["C0"], vehicle["C1"],
+        vehicle["regen_efficiency"], *(DESIGN_INPUT_DEFAULTS[name] for name in PACK_INPUTS))
+
+    for index, payload_kg in enumerate(payloads_kg):
+        expected, vehicle_mass = sequential_min_pack(150.0, payload_kg, 1800.0, 120.0, drive_cycle, **vehicle)
+        assert expected is not None
+        assert pack["parallel_strings"][index] == expected["parallel_strings"]
+        assert pack["final_capacity_kwh"][index] == pytest.approx(expected["final_capacity_kwh"])
+        assert pack["vehicle_mass"][index] == pytest.approx(vehicle_mass)
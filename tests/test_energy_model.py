@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import pytest
+import energy_model
+from config import AIR_DENSITY, C_DRAG, GRAVITY
+from energy_basis import EnergyBasis
+from energy_model import (calculate_kinematics, calculate_traction, calculate_wh_per_km, calculate_phase_breakdown,
+                          reweight_phases, calculate_vehicle_energy, payload_fraction_profile)
+
+VEHICLE = {"mass": 2570.0, "frontal_area": 7.5, "C0": 0.012, "C1": 3e-6, "regen_efficiency": 0.6}
+
+
+def dataframe_pipeline(time, speed_kph, acceleration):
+    """The per-timestep DataFrame columns the compact pipeline replaces."""
+    df = pd.DataFrame({"Time": time, "Speed": speed_kph, "Acceleration": acceleration})
+    df["Speed (m/s)"] = df["Speed"] * 1000 / 3600
+    df["Time Interval (s)"] = df["Time"].diff().fillna(0)
+    df["Total Distance (m)"] = (df["Speed (m/s)"] * df["Time Interval (s)"]).cumsum()
+    force = ((0.5 * AIR_DENSITY * C_DRAG * VEHICLE["frontal_area"] + VEHICLE["mass"] * GRAVITY * VEHICLE["C1"]) *
+             df["Speed (m/s)"] ** 2 + VEHICLE["mass"] * GRAVITY * VEHICLE["C0"] + VEHICLE["mass"] * df["Acceleration"])
+    power = force * df["Speed (m/s)"]
+    power = power.where(power >= 0, power * VEHICLE["regen_efficiency"])
+    df["Total Energy (kWh)"] = (power * df["Time Interval (s)"]).cumsum() / 3.6e6
+    return df
+
+
+def compact_pipeline(time, speed_kph, acceleration, dtype=np.float64):
+    profile = calculate_kinematics(time, speed_kph, dtype)
+    return calculate_traction(profile, acceleration, **VEHICLE)
+
+
+def test_compact_pipeline_matches_the_dataframe_columns(drive_cycle):
+    expected = dataframe_pipeline(drive_cycle["time"], drive_cycle["speed_kph"], drive_cycle["acceleration"])
+    profile = compact_pipeline(drive_cycle["time"], drive_cycle["speed_kph"], drive_cycle["acceleration"])
+    np.testing.assert_allclose(profile["total_distance_m"], expected["Total Distance (m)"], rtol=1e-12)
+    np.testing.assert_allclose(profile["total_energy_kwh"], expected["Total Energy (kWh)"], rtol=1e-9, atol=1e-12)
+
+    # All rows are views into one block of the requested precision
+    compact = compact_pipeline(drive_cycle["time"], drive_cycle["speed_kph"], drive_cycle["acceleration"],
+                               np.float32)
+    assert all(row.dtype == np.float32 for row in compact.values())
+    assert compact["total_energy_kwh"][-1] == pytest.approx(profile["total_energy_kwh"][-1], rel=1e-4)
+
+
+def test_missing_speeds_do_not_end_the_cumulative_sums(drive_cycle):
+    speed_kph = drive_cycle["speed_kph"].copy()
+    speed_kph[[100, 900]] = np.nan
+    expected = dataframe_pipeline(drive_cycle["time"], speed_kph, drive_cycle["acceleration"])
+    profile = compact_pipeline(drive_cycle["time"], speed_kph, drive_cycle["acceleration"])
+    # pandas leaves the missing timesteps themselves NaN, the compact rows carry the sum over them
+    assert np.isfinite(profile["total_energy_kwh"]).all()
+    known = ~np.isnan(speed_kph)
+    np.testing.assert_allclose(profile["total_distance_m"][known], expected["Total Distance (m)"][known],
+                               rtol=1e-12)
+    np.testing.assert_allclose(profile["total_energy_kwh"][known], expected["Total Energy (kWh)"][known], rtol=1e-9,
+                               atol=1e-12)
+
+
+def test_energy_basis_matches_calculate_wh_per_km(drive_cycle):
+    basis = EnergyBasis(drive_cycle["speed_mps"], drive_cycle["acceleration"], drive_cycle["time_interval_s"])
+    for mass in (1500.0, 2570.0, 2600.0, 4000.0):
+        for regen_efficiency in (0.0, 0.6, 1.0):
+            expected = calculate_wh_per_km(
+                drive_cycle["speed_mps"], drive_cycle["acceleration"], drive_cycle["time_interval_s"], mass,
+                VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"], regen_efficiency)[0]
+            actual = basis.wh_per_km(mass, VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"], regen_efficiency)
+            assert actual == pytest.approx(expected, rel=1e-9)
+
+
+def test_energy_basis_stays_finite_on_a_zero_power_margin():
+    # Constant speed with the deceleration that exactly cancels the road load: zero power at every timestep
+    speed_mps = np.array([0.0, 10.0, 10.0, 10.0])
+    basis = EnergyBasis(speed_mps, np.zeros(4), np.ones(4))
+    alpha, beta = basis.coefficients(VEHICLE["mass"], VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"])
+    basis = EnergyBasis(speed_mps, -(alpha + beta * speed_mps ** 2), np.ones(4))
+    for _ in range(3):
+        assert basis.wh_per_km(VEHICLE["mass"], VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"],
+                               VEHICLE["regen_efficiency"]) == pytest.approx(0, abs=1e-9)
+    assert basis.full_passes == 1
+
+
+def cycle_phases(time):
+    """Urban and rural phases that alternate, so that both occur several times, and a final stop."""
+    phase = np.where((time // 400) % 2 == 0, "Urban", "Rural").astype(object)
+    phase[-50:] = "Stop"
+    return phase
+
+
+def test_phase_breakdown_adds_up_to_the_cycle(drive_cycle):
+    speed_kph = drive_cycle["speed_kph"].copy()
+    speed_kph[-50:] = 0
+    profile = compact_pipeline(drive_cycle["time"], speed_kph, drive_cycle["acceleration"])
+    phase = cycle_phases(drive_cycle["time"])
+    breakdown = calculate_phase_breakdown(phase, profile)
+
+    assert breakdown["phase"] == ["Urban", "Rural", "Stop"]
+    assert breakdown["duration_s"].sum() == pytest.approx(profile["time_interval_s"].sum(), rel=1e-12)
+    assert breakdown["distance_km"].sum() == pytest.approx(profile["total_distance_m"][-1] / 1000, rel=1e-12)
+    assert breakdown["energy_kwh"].sum() == pytest.approx(profile["total_energy_kwh"][-1], rel=1e-9)
+    urban = phase == "Urban"
+    assert breakdown["max_speed_kph"][0] == pytest.approx(profile["speed_mps"][urban].max() * 3.6)
+    assert breakdown["distance_km"][2] == 0 and breakdown["wh_per_km"][2] == np.inf
+
+
+def test_reweighted_phases_skip_phases_without_distance(drive_cycle):
+    speed_kph = drive_cycle["speed_kph"].copy()
+    speed_kph[-50:] = 0
+    profile = compact_pipeline(drive_cycle["time"], speed_kph, drive_cycle["acceleration"])
+    breakdown = calculate_phase_breakdown(cycle_phases(drive_cycle["time"]), profile)
+
+    # The distance shares of the cycle itself give its consumption, with or without the stop
+    shares = dict(zip(breakdown["phase"][:2], breakdown["distance_km"][:2]))
+    cycle_wh_per_km = profile["total_energy_kwh"][-1] / profile["total_distance_m"][-1] * 1e6
+    assert reweight_phases(breakdown, shares) == pytest.approx(cycle_wh_per_km, rel=1e-9)
+    assert reweight_phases(breakdown, {**shares, "Stop": 0}) == pytest.approx(cycle_wh_per_km, rel=1e-9)
+    assert reweight_phases(breakdown, {"Rural": 1}) == pytest.approx(breakdown["wh_per_km"][1])
+    # Weighting the stop itself gives an infinite, never a NaN, consumption
+    assert reweight_phases(breakdown, {"Stop": 1}) == np.inf
+    with pytest.raises(ValueError):
+        reweight_phases(breakdown, {"Motorway": 1})
+
+
+def test_vehicle_energy_of_many_variants_matches_single_profiles(drive_cycle, monkeypatch):
+    mass, regen_efficiency, km = (values.ravel() for values in np.meshgrid([1500.0, 2570.0, 4000.0], [0.0, 0.6, 1.0],
+                                                                             [1.0, 1.08]))
+    arguments = (drive_cycle["speed_mps"], drive_cycle["acceleration"], drive_cycle["time_interval_s"], mass,
+                 VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"], regen_efficiency)
+    energy = calculate_vehicle_energy(*arguments, km=km, cumulative_energy=True)
+
+    profile = calculate_kinematics(drive_cycle["time"], drive_cycle["speed_kph"])
+    for variant in range(len(mass)):
+        # calculate_traction has no rotating mass factor, which is the same as scaling the acceleration by km
+        single = {name: row.copy() for name, row in profile.items()}
+        calculate_traction(single, drive_cycle["acceleration"] * km[variant], mass[variant], VEHICLE["frontal_area"],
+                           VEHICLE["C0"], VEHICLE["C1"], regen_efficiency[variant])
+        np.testing.assert_allclose(energy["total_energy_kwh_curve"][variant], single["total_energy_kwh"],
+                                   rtol=1e-9, atol=1e-12)
+        assert energy["peak_power_w"][variant] == pytest.approx(single["tractive_power_w"].max(), rel=1e-12)
+        assert energy["wh_per_km"][variant] == pytest.approx(
+            single["total_energy_kwh"][-1] / single["total_distance_m"][-1] * 1e6, rel=1e-9)
+
+    # Blocks of a few variants give the same results as one block
+    monkeypatch.setattr(energy_model, "KERNEL_BLOCK_ELEMENTS", 4 * len(drive_cycle["time"]))
+    blocked = calculate_vehicle_energy(*arguments, km=km, cumulative_energy=True, dtype=np.float32)
+    np.testing.assert_allclose(blocked["total_energy_kwh"], energy["total_energy_kwh"], rtol=1e-12)
+    np.testing.assert_array_equal(blocked["peak_power_w"], energy["peak_power_w"])
+    assert blocked["total_energy_kwh_curve"].dtype == np.float32
+    np.testing.assert_allclose(blocked["total_energy_kwh_curve"], energy["total_energy_kwh_curve"], rtol=1e-5,
+                               atol=1e-6)
+    assert "total_energy_kwh_curve" not in calculate_vehicle_energy(*arguments)
+
+
+def test_payload_kernel_matches_calculate_traction(drive_cycle):
+    payload_kg = 600.0
+    payload_fraction = payload_fraction_profile(drive_cycle["speed_mps"])
+    energy = calculate_vehicle_energy(
+        drive_cycle["speed_mps"], drive_cycle["acceleration"], drive_cycle["time_interval_s"], VEHICLE["mass"],
+        VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"], VEHICLE["regen_efficiency"], payload_kg=payload_kg,
+        payload_fraction=payload_fraction, cumulative_energy=True)
+
+    profile = calculate_kinematics(drive_cycle["time"], drive_cycle["speed_kph"])
+    calculate_traction(profile, drive_cycle["acceleration"], VEHICLE["mass"] + payload_kg * payload_fraction,
+                       VEHICLE["frontal_area"], VEHICLE["C0"], VEHICLE["C1"], VEHICLE["regen_efficiency"])
+
+    assert energy["total_energy_kwh"][0] == pytest.approx(profile["total_energy_kwh"][-1], rel=1e-9)
+    np.testing.assert_allclose(energy["total_energy_kwh_curve"][0], profile["total_energy_kwh"], rtol=1e-9,
+                               atol=1e-12)
+    assert energy["peak_power_w"][0] == pytest.approx(profile["tractive_power_w"].max(), rel=1e-9)
+
+
+def test_payload_is_delivered_at_the_stops():
+    # Three stops after moving, a third of the payload each; standing at the start is not a stop
+    speed_mps = np.array([0.0, 5.0, 5.0, 0.0, 0.0, 8.0, 0.0, 3.0, 0.0])
+    np.testing.assert_allclose(payload_fraction_profile(speed_mps), [1, 1, 1, 2 / 3, 2 / 3, 2 / 3, 1 / 3, 1 / 3, 0])
+    # Without a stop the payload stays on board
+    np.testing.assert_array_equal(payload_fraction_profile(np.full(5, 5.0)), np.ones(5))
@@ -0,0 +1,64 @@
+import io
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+from export import export_bytes, result_batches, to_arrow_array, write_results
+
+
+@pytest.fixture
+def results():
+    rng = np.random.default_rng(4)
+    return [({"Profile": profile, "Vehicle": "Van"},
+             {"time": np.arange(length, dtype=float), "power_w": rng.normal(0, 1e4, length).astype(np.float32),
+              "step": np.arange(length, dtype=np.int64)})
+            for profile, length in (("urban.csv", 2500), ("highway.csv", 1200))]
+
+
+def test_contiguous_arrays_are_wrapped_without_copying():
+    values = np.linspace(0, 1, 1000)
+    array = to_arrow_array(values)
+    assert array.buffers()[1].address == values.ctypes.data
+    np.testing.assert_array_equal(array.to_numpy(), values)
+
+    # A strided view cannot be wrapped and is converted instead
+    strided = values[::2]
+    np.testing.assert_array_equal(to_arrow_array(strided).to_numpy(), strided)
+
+
+def assert_round_trip(table, results):
+    start = 0
+    for labels, columns in results:
+        length = len(columns["time"])
+        rows = table.slice(start, length)
+        for name, value in labels.items():
+            assert set(rows.column(name).to_pylist()) == {value}
+        for name, values in columns.items():
+            np.testing.assert_array_equal(rows.column(name).to_numpy(), values)
+            assert rows.schema.field(name).type == pa.from_numpy_dtype(values.dtype)
+        start += length
+    assert table.num_rows == start
+
+
+def test_arrow_ipc_round_trip_is_read_without_copies(results):
+    data = export_bytes(results, "Arrow IPC")
+    source = pa.py_buffer(data)
+    table = ipc.open_file(pa.BufferReader(source)).read_all()
+    assert_round_trip(table, results)
+    # The numeric columns of the file point into the exported bytes
+    column = table.column("time").chunk(0)
+    assert source.address <= column.buffers()[1].address < source.address + source.size
+
+
+def test_parquet_round_trip_in_chunks(results):
+    sink = io.BytesIO()
+    write_results(results, sink, "Parquet", chunk_rows=1000)
+    table = pq.read_table(io.BytesIO(sink.getvalue()))
+    assert_round_trip(table, results)
+    assert [batch.num_rows for batch in result_batches(results, 1000)] == [1000, 1000, 500, 1000, 200]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export_bytes([({"Profile": "a"}, {"x": np.zeros(3)})], "CSV")
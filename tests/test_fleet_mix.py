@@ -0,0 +1,54 @@
+import itertools
+import json
+import math
+import numpy as np
+import pytest
+from fleet_mix import cheapest_cover, load_vehicle_types, optimize_fleet_mix
+
+
+def brute_force_cover(costs, capacities, demand):
+    """Cheapest cover of every combination of up to enough vans of each type to cover the demand alone."""
+    ranges = [range(math.ceil(demand / capacity) + 1) if capacity > 0 else range(1) for capacity in capacities]
+    return min(float(np.dot(counts, costs)) for counts in itertools.product(*ranges)
+               if np.dot(counts, capacities) >= demand)
+
+
+def test_cheapest_cover_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        types = rng.integers(1, 4)
+        costs = rng.integers(10, 100, types).astype(float)
+        capacities = rng.integers(1, 12, types)
+        demand = int(rng.integers(0, 40))
+        counts, cost = cheapest_cover(costs, capacities, demand)
+        assert counts @ capacities >= demand
+        assert cost == pytest.approx(counts @ costs)
+        assert cost == pytest.approx(brute_force_cover(costs, capacities, demand))
+
+
+def test_large_demand_is_covered_by_the_most_cost_efficient_type():
+    # 3 units for 10 beat 5 units for 20, except for a remainder the cheaper mix covers
+    counts, cost = cheapest_cover([10.0, 20.0, 100.0], [3, 5, 0], 10_001)
+    assert counts @ np.array([3, 5, 0]) >= 10_001 and counts[2] == 0
+    # With two types, the cheapest cover fills up every count of the second type with the first
+    assert cost == min(10.0 * math.ceil(max(10_001 - 5 * vans, 0) / 3) + 20.0 * vans for vans in range(2001))
+    with pytest.raises(ValueError):
+        cheapest_cover([10.0], [0], 5)
+
+
+def test_fleet_mix_covers_packages_and_crates_separately():
+    type_costs = {"cost_of_ownership": np.array([50.0, 80.0]), "packages_per_day": np.array([100.0, 180.0]),
+                  "crates_per_load": np.array([4.0, 6.0])}
+    mix = optimize_fleet_mix(type_costs, packages_per_day=950, crates_per_day=31, amount_of_shifts=2)
+    assert mix["package_vans"] @ type_costs["packages_per_day"] >= 950
+    assert mix["restaurant_vans"] @ type_costs["crates_per_load"] * 2 >= 31
+    assert mix["total_vans"] == mix["package_vans"].sum() + mix["restaurant_vans"].sum()
+    assert mix["total_cost_of_ownership"] == pytest.approx(
+        brute_force_cover([50.0, 80.0], [100, 180], 950) + brute_force_cover([50.0, 80.0], [8, 12], 31))
+
+
+def test_vehicle_types_exclude_the_current_configuration(tmp_path):
+    for name in ("current", "large van", "small van"):
+        (tmp_path / f"{name}.json").write_text(json.dumps({"mass": 2000}))
+    (tmp_path / "notes.txt").write_text("")
+    assert list(load_vehicle_types(tmp_path)) == ["large van", "small van"]
@@ -0,0 +1,80 @@
+import threading
+import time
+import pytest
+import jobs
+from jobs import JobManager
+
+
+def wait(job, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not job.done:
+        assert time.monotonic() < deadline, f"{job.name} did not finish"
+        time.sleep(0.005)
+    return job
+
+
+def test_job_result_and_progress():
+    manager = JobManager(max_workers=2)
+
+    def square(value, progress):
+        progress(0.5, "halfway")
+        return value ** 2
+
+    job = wait(manager.submit("session", "square", square, 12))
+    assert (job.status, job.result, job.progress, job.message) == ("done", 144, 1.0, "halfway")
+
+
+def test_running_job_is_cancelled_at_its_next_progress_report():
+    manager = JobManager(max_workers=1)
+    started = threading.Event()
+
+    def loop(progress):
+        started.set()
+        while True:
+            progress(0.1)
+            time.sleep(0.001)
+
+    job = manager.submit("session", "loop", loop)
+    assert started.wait(5)
+    manager.cancel("session", job.id)
+    assert wait(job).status == "cancelled"
+
+
+def test_queued_job_never_runs_once_cancelled():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    ran = []
+    blocking = manager.submit("session", "blocking", lambda progress: release.wait(5))
+    queued = manager.submit("session", "queued", lambda progress: ran.append(True))
+    queued.cancel()
+    release.set()
+    wait(blocking)
+    time.sleep(0.05)
+    assert queued.status == "cancelled" and not ran
+
+
+def test_failures_sessions_and_pruning(monkeypatch):
+    manager = JobManager(max_workers=2)
+
+    def fail(progress):
+        raise ValueError("no solution")
+
+    failed = wait(manager.submit("a", "sweep", fail))
+    assert failed.status == "failed" and isinstance(failed.error, ValueError)
+    newest = wait(manager.submit("a", "sweep", lambda progress: 1))
+    assert manager.latest("a", "sweep") is newest
+    assert manager.latest("b", "sweep") is None
+
+    # Finished jobs are dropped once their lifetime has passed, at the next submission
+    monkeypatch.setattr(jobs, "FINISHED_JOB_LIFETIME_S", -1)
+    wait(manager.submit("b", "other", lambda progress: 2))
+    assert manager.jobs("a") == []
+    assert len(manager.jobs("b")) == 1
+
+
+def test_progress_is_clamped():
+    job = jobs.Job("session", "clamp")
+    job.report(1.5)
+    assert job.progress == pytest.approx(1.0)
+    job.report(-1)
+    assert job.progress == 0.0
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+from energy_model import calculate_kinematics, calculate_traction, calculate_vehicle_energy
+from motor_map import MOTOR_MAPS_DIR, interpolate_efficiency, load_motor_map
+
+VEHICLE = {"mass": 2570.0, "frontal_area": 7.5, "C0": 0.012, "C1": 3e-6, "regen_efficiency": 0.6}
+GEARING = {"wheel_radius": 0.35, "gear_ratio": 9.0}
+
+
+@pytest.fixture
+def motor_map():
+    return load_motor_map(os.path.join(MOTOR_MAPS_DIR, "example_pmsm_100kw.csv"))
+
+
+def constant_map(efficiency):
+    return {"speed_rpm": np.array([0.0, 20000.0]), "torque_nm": np.array([0.0, 1000.0]),
+            "efficiency": np.full((2, 2), efficiency)}
+
+
+def test_interpolation_hits_the_grid_nodes_exactly(motor_map):
+    speed, torque = np.meshgrid(motor_map["speed_rpm"], motor_map["torque_nm"])
+    np.testing.assert_array_equal(interpolate_efficiency(motor_map, speed, torque), motor_map["efficiency"])
+    # Braking points use their absolute speed and torque, points off the map its edge
+    np.testing.assert_array_equal(interpolate_efficiency(motor_map, -speed, -torque), motor_map["efficiency"])
+    assert interpolate_efficiency(motor_map, 1e9, 1e9) == motor_map["efficiency"][-1, -1]
+
+
+def test_interpolation_is_bilinear_within_a_cell():
+    # A bilinear function of speed and torque is reproduced everywhere
+    speeds = np.array([0.0, 1000.0, 4000.0])
+    torques = np.array([0.0, 50.0, 200.0])
+    efficiency = 0.5 + 1e-5 * speeds + 1e-3 * torques[:, np.newaxis] + 1e-9 * speeds * torques[:, np.newaxis]
+    grid = {"speed_rpm": speeds, "torque_nm": torques, "efficiency": efficiency}
+    speed = np.array([500.0, 2500.0, 3999.0])
+    torque = np.array([25.0, 120.0, 10.0])
+    np.testing.assert_allclose(interpolate_efficiency(grid, speed, torque),
+                               0.5 + 1e-5 * speed + 1e-3 * torque + 1e-9 * speed * torque, rtol=1e-12)
+
+
+def test_motor_map_energy_of_the_kernel_and_the_pipeline(drive_cycle, motor_map):
+    energy = calculate_vehicle_energy(drive_cycle["speed_mps"], drive_cycle["acceleration"],
+                                      drive_cycle["time_interval_s"], **VEHICLE, cumulative_energy=True,
+                                      motor_map=motor_map, **GEARING)
+    profile = calculate_kinematics(drive_cycle["time"], drive_cycle["speed_kph"])
+    calculate_traction(profile, drive_cycle["acceleration"], **VEHICLE, motor_map=motor_map, **GEARING)
+    np.testing.assert_allclose(energy["total_energy_kwh_curve"][0], profile["total_energy_kwh"], rtol=1e-9,
+                               atol=1e-12)
+    assert energy["peak_power_w"][0] == pytest.approx(profile["tractive_power_w"].max(), rel=1e-9)
+
+
+def test_constant_efficiency_scales_motoring_and_braking(drive_cycle):
+    arguments = (drive_cycle["speed_mps"], drive_cycle["acceleration"], drive_cycle["time_interval_s"])
+    lossless = calculate_vehicle_energy(*arguments, **VEHICLE, motor_map=constant_map(1.0), **GEARING)
+    without_map = calculate_vehicle_energy(*arguments, **VEHICLE)
+    assert lossless["total_energy_kwh"][0] == pytest.approx(without_map["total_energy_kwh"][0], rel=1e-12)
+
+    # Motoring draws 1 / 0.8 of the energy, braking recovers 0.8 of it
+    motoring = calculate_vehicle_energy(*arguments, **{**VEHICLE, "regen_efficiency": 0.0})["total_energy_kwh"][0]
+    braking = without_map["total_energy_kwh"][0] - motoring
+    lossy = calculate_vehicle_energy(*arguments, **VEHICLE, motor_map=constant_map(0.8), **GEARING)
+    assert lossy["total_energy_kwh"][0] == pytest.approx(motoring / 0.8 + braking * 0.8, rel=1e-12)
+
+
+def test_maps_must_be_increasing(tmp_path):
+    file_path = tmp_path / "map.csv"
+    file_path.write_text(";2000;1000\n0;90;90\n100;90;90\n")
+    with pytest.raises(ValueError):
+        load_motor_map(file_path)
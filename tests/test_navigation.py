@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+from navigation import PAGES, page_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pages_are_not_imported_with_the_navigation():
+    code = ("import sys, navigation; "
+            "print(sorted(name for name in sys.modules if name.startswith('content') or name in ('pandas', 'plotly')))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_every_page_gets_its_own_runner():
+    # st.Page needs a distinct function name or url path per page
+    names = [page_runner(label).__name__ for label in PAGES]
+    assert names == [function for _, function in PAGES.values()]
+    assert len(set(names)) == len(PAGES)
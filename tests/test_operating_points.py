@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from config import AIR_DENSITY, C_DRAG, GRAVITY
+from operating_points import calculate_operating_point_density
+
+DESIGNS = {"mass": [1800.0, 2570.0, 3200.0], "frontal_area": 7.5, "C0": 0.012, "C1": 3e-6, "wheel_radius": 0.35,
+           "gear_ratio": [7.0, 9.0, 11.0]}
+
+
+def operating_point(design, speed, acceleration, drivetrain_efficiency):
+    """Force at the motor side of the drivetrain, motor speed and motor torque of one design and timestep."""
+    mass, gear_ratio = DESIGNS["mass"][design], DESIGNS["gear_ratio"][design]
+    force = (mass * GRAVITY * DESIGNS["C0"] + mass * acceleration +
+             (0.5 * AIR_DENSITY * C_DRAG * DESIGNS["frontal_area"] + mass * GRAVITY * DESIGNS["C1"]) * speed ** 2)
+    # Motoring draws more torque than the wheels need, braking recovers less
+    force = force / drivetrain_efficiency if force > 0 else force * drivetrain_efficiency
+    motor_speed = speed / DESIGNS["wheel_radius"] * gear_ratio * 60 / (2 * np.pi)
+    return force, motor_speed, force * DESIGNS["wheel_radius"] / gear_ratio
+
+
+def looped_density(cycles, speed_edges_rpm, torque_edges_nm, weight, drivetrain_efficiency):
+    """The density of every design, timestep by timestep."""
+    density = np.zeros((3, len(torque_edges_nm) - 1, len(speed_edges_rpm) - 1))
+    for design in range(3):
+        for cycle in cycles:
+            for speed, acceleration, interval in zip(cycle["speed_mps"], cycle["acceleration"],
+                                                     cycle["time_interval_s"]):
+                force, motor_speed, motor_torque = operating_point(design, speed, acceleration, drivetrain_efficiency)
+                speed_bin = min(max(np.searchsorted(speed_edges_rpm, motor_speed, side="right") - 1, 0),
+                                len(speed_edges_rpm) - 2)
+                torque_bin = min(max(np.searchsorted(torque_edges_nm, motor_torque, side="right") - 1, 0),
+                                 len(torque_edges_nm) - 2)
+                value = interval if weight == "time" else abs(force * speed) * interval / 3.6e6
+                density[design, torque_bin, speed_bin] += value
+    return density
+
+
+@pytest.fixture
+def cycles(drive_cycle):
+    # A second, shorter and harder cycle
+    hard = {name: values[:600] * (1.5 if name in ("speed_mps", "acceleration") else 1)
+            for name, values in drive_cycle.items()}
+    return [drive_cycle, hard]
+
+
+@pytest.mark.parametrize("weight", ["time", "energy"])
+@pytest.mark.parametrize("drivetrain_efficiency", [1.0, 0.9])
+def test_density_matches_a_loop_over_the_timesteps(cycles, weight, drivetrain_efficiency):
+    # A grid narrower than the points, so that the edge cells collect the points outside it
+    speed_edges_rpm = np.linspace(0, 8000, 9)
+    torque_edges_nm = np.linspace(-150, 250, 11)
+    density, _, _ = calculate_operating_point_density(cycles, **DESIGNS, speed_edges_rpm=speed_edges_rpm,
+                                                      torque_edges_nm=torque_edges_nm, weight=weight,
+                                                      drivetrain_efficiency=drivetrain_efficiency)
+    expected = looped_density(cycles, speed_edges_rpm, torque_edges_nm, weight, drivetrain_efficiency)
+    np.testing.assert_allclose(density, expected, rtol=1e-9, atol=1e-12)
+    if weight == "time":
+        total_time = sum(cycle["time_interval_s"].sum() for cycle in cycles)
+        np.testing.assert_allclose(density.sum(axis=(1, 2)), total_time)
+
+
+def test_drivetrain_losses_shift_the_torque(cycles):
+    lossless, _, torque_edges_nm = calculate_operating_point_density(cycles, **DESIGNS, speed_edges_rpm=1,
+                                                                     torque_edges_nm=400, weight="energy")
+    lossy, _, _ = calculate_operating_point_density(cycles, **DESIGNS, speed_edges_rpm=1,
+                                                    torque_edges_nm=torque_edges_nm, weight="energy",
+                                                    drivetrain_efficiency=0.8)
+    # The motor delivers 1 / 0.8 of the motoring energy and receives 0.8 of the braking energy
+    motoring = torque_edges_nm[1:] > 0
+    assert lossy[:, motoring].sum() == pytest.approx(lossless[:, motoring].sum() / 0.8, rel=1e-9)
+    assert lossy[:, ~motoring].sum() == pytest.approx(lossless[:, ~motoring].sum() * 0.8, rel=1e-9)
+
+
+def test_automatic_edges_span_all_points(cycles):
+    for drivetrain_efficiency in (1.0, 0.85):
+        density, speed_edges_rpm, torque_edges_nm = calculate_operating_point_density(
+            cycles, **DESIGNS, speed_edges_rpm=20, torque_edges_nm=30, drivetrain_efficiency=drivetrain_efficiency)
+        assert density.shape == (3, 30, 20)
+        expected = looped_density(cycles, speed_edges_rpm, torque_edges_nm, "time", drivetrain_efficiency)
+        np.testing.assert_allclose(density, expected, rtol=1e-9, atol=1e-12)
+        # The edges are wide enough that no point is clipped into an edge cell
+        points = np.array([operating_point(design, speed, acceleration, drivetrain_efficiency)[1:]
+                           for design in range(3) for cycle in cycles
+                           for speed, acceleration in zip(cycle["speed_mps"], cycle["acceleration"])])
+        assert speed_edges_rpm[0] == 0 and speed_edges_rpm[-1] == pytest.approx(points[:, 0].max())
+        assert torque_edges_nm[0] == -torque_edges_nm[-1] and np.abs(points[:, 1]).max() <= torque_edges_nm[-1]
+
+    with pytest.raises(ValueError):
+        calculate_operating_point_density(cycles, **DESIGNS, speed_edges_rpm=4, torque_edges_nm=4, weight="power")
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import pack_simulation
+from pack_simulation import calculate_open_circuit_voltage, pack_layout_grid, simulate_pack
+
+CELL = {"cell_capacity_ah": 3.0, "nominal_cell_voltage": 3.2, "charged_cell_voltage": 3.65,
+        "discharged_cell_voltage": 2.5, "cell_resistance_ohm": 0.02}
+
+
+def sequential_pack(power_w, time_interval_s, cells_in_series, parallel_strings, initial_soc=1.0):
+    """One layout one timestep at a time: the current of every timestep from the state of charge at its start."""
+    pack_capacity_ah = parallel_strings * CELL["cell_capacity_ah"]
+    pack_resistance_ohm = cells_in_series * CELL["cell_resistance_ohm"] / parallel_strings
+    soc = initial_soc
+    socs, voltages, limited = [], [], False
+    for power, dt in zip(power_w, time_interval_s):
+        open_circuit_voltage = cells_in_series * calculate_open_circuit_voltage(
+            soc, CELL["nominal_cell_voltage"], CELL["charged_cell_voltage"], CELL["discharged_cell_voltage"])
+        discriminant = open_circuit_voltage ** 2 - 4 * pack_resistance_ohm * power
+        limited |= discriminant < 0
+        current = (open_circuit_voltage - np.sqrt(max(discriminant, 0))) / (2 * pack_resistance_ohm)
+        soc -= current * dt / 3600 / pack_capacity_ah
+        socs.append(soc)
+        voltages.append(open_circuit_voltage - current * pack_resistance_ohm)
+    return np.array(socs), np.array(voltages), limited
+
+
+@pytest.fixture
+def power_series():
+    rng = np.random.default_rng(3)
+    power_w = rng.normal(8000, 6000, 60)
+    return power_w, np.concatenate(([0.0], np.full(59, 10.0)))
+
+
+def test_blocked_results_equal_unblocked_results(power_series, monkeypatch):
+    power_w, time_interval_s = power_series
+    series, parallel = pack_layout_grid([80, 96, 112], [8, 12, 16, 20])
+    unblocked = simulate_pack(power_w, time_interval_s, series, parallel, **CELL, traces=True)
+    # Blocks of three layouts, the last one shorter
+    monkeypatch.setattr(pack_simulation, "PACK_BLOCK_ELEMENTS", 3 * len(power_w))
+    blocked = simulate_pack(power_w, time_interval_s, series, parallel, **CELL, traces=True)
+    for name, value in unblocked.items():
+        np.testing.assert_array_equal(blocked[name], value, err_msg=name)
+
+
+def test_soc_and_voltage_match_a_sequential_loop(power_series):
+    power_w, time_interval_s = power_series
+    # With one pass per timestep the fixed-point iteration reaches the sequential solution exactly
+    result = simulate_pack(power_w, time_interval_s, [96, 112], [10, 14], **CELL, iterations=len(power_w),
+                           traces=True)
+    for row, (series, parallel) in enumerate([(96, 10), (112, 14)]):
+        soc, voltage, limited = sequential_pack(power_w, time_interval_s, series, parallel)
+        np.testing.assert_allclose(result["soc"][row], soc, rtol=1e-12)
+        np.testing.assert_allclose(result["terminal_voltage"][row], voltage, rtol=1e-12)
+        assert result["power_limited"][row] == limited
+
+    # The default three passes stay close to it
+    default = simulate_pack(power_w, time_interval_s, [96], [10], **CELL, traces=True)
+    soc, voltage, _ = sequential_pack(power_w, time_interval_s, 96, 10)
+    np.testing.assert_allclose(default["soc"][0], soc, atol=1e-3)
+    np.testing.assert_allclose(default["terminal_voltage"][0], voltage, rtol=1e-3)
+
+
+def test_feasibility_flags_at_the_cell_voltage_limits():
+    time_interval_s = np.array([0.0, 1.0])
+    # A full pack: any charging current lifts the terminal voltage above the charged voltage
+    charging = simulate_pack([-100.0, -100.0], time_interval_s, 96, 10, **CELL)
+    assert charging["above_charged_voltage"][0] and not charging["below_discharged_voltage"][0]
+    assert charging["maximum_cell_voltage"][0] > CELL["charged_cell_voltage"]
+
+    # An empty pack at rest sits exactly at the discharged voltage, which is not below it
+    resting = simulate_pack([0.0, 0.0], time_interval_s, 96, 10, **CELL, initial_soc=0.0)
+    assert resting["minimum_cell_voltage"][0] == pytest.approx(CELL["discharged_cell_voltage"])
+    assert not resting["below_discharged_voltage"][0] and not resting["power_limited"][0]
+
+    # Just below and above the maximum power transfer V_oc^2 / 4R of a half-charged pack
+    open_circuit_voltage = 96 * calculate_open_circuit_voltage(0.5, CELL["nominal_cell_voltage"],
+                                                               CELL["charged_cell_voltage"],
+                                                               CELL["discharged_cell_voltage"])
+    maximum_power_w = open_circuit_voltage ** 2 / (4 * 96 * CELL["cell_resistance_ohm"] / 10)
+    below = simulate_pack([0.0, 0.999 * maximum_power_w], [0.0, 0.0], 96, 10, **CELL, initial_soc=0.5)
+    above = simulate_pack([0.0, 1.001 * maximum_power_w], [0.0, 0.0], 96, 10, **CELL, initial_soc=0.5)
+    assert not below["power_limited"][0] and above["power_limited"][0]
+    # Both sag to about half the open-circuit voltage, far below the discharged voltage
+    assert below["below_discharged_voltage"][0] and above["below_discharged_voltage"][0]
+    assert above["minimum_cell_voltage"][0] == pytest.approx(open_circuit_voltage / 2 / 96)
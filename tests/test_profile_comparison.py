@@ -0,0 +1,58 @@
+import os
+import numpy as np
+import pytest
+from energy_model import DRIVE_PROFILES_DIR, calculate_kinematics, calculate_traction, load_drive_profile
+from profile_comparison import compare_drive_profiles, evaluate_drive_profile
+
+VEHICLE = {"mass": 2570.0, "frontal_area": 7.5, "C0": 0.012, "C1": 3e-6, "regen_efficiency": 0.6}
+HEADER = "Phase;Total elapsed time (s);Phase elapsed time (s);Vehicle speed (km/h);Acceleration (m/s²)\n"
+
+
+def write_profile(path, speed_kph):
+    speed_kph = np.asarray(speed_kph, dtype=float)
+    acceleration = np.gradient(speed_kph / 3.6)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(HEADER)
+        for time, (speed, accel) in enumerate(zip(speed_kph, acceleration)):
+            file.write(f"Low;{time};{time};{speed:g};{accel:g}".replace(".", ",") + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    return [
+        os.path.join(DRIVE_PROFILES_DIR, "wltc_drive_profile_max_80.csv"),
+        write_profile(tmp_path / "ramp.csv", np.concatenate([np.linspace(0, 50, 60), np.full(120, 50.0)])),
+        # Standing still: no distance, so no consumption per km
+        write_profile(tmp_path / "standstill.csv", np.zeros(30)),
+    ]
+
+
+def test_comparison_matches_single_evaluations(profiles):
+    results = compare_drive_profiles(profiles, **VEHICLE, max_workers=3)
+    for file_path, result in zip(profiles, results):
+        single = evaluate_drive_profile(file_path, **VEHICLE)
+        assert result["total_energy_kwh"] == single["total_energy_kwh"]
+        np.testing.assert_array_equal(result["total_energy_kwh_curve"], single["total_energy_kwh_curve"])
+
+        df = load_drive_profile(file_path)
+        profile = calculate_kinematics(df["Time"].to_numpy(), df["Speed"].to_numpy())
+        calculate_traction(profile, df["Acceleration"].to_numpy(), **VEHICLE)
+        assert result["total_energy_kwh"] == pytest.approx(profile["total_energy_kwh"][-1], rel=1e-12)
+    assert results[2]["wh_per_km"] == float("inf") and results[2]["km_per_kwh"] is None
+    assert compare_drive_profiles([], **VEHICLE) == []
+
+
+def test_no_range_for_a_profile_that_gains_energy(tmp_path):
+    # Braking from speed to standstill with full recovery returns more energy than it uses
+    file_path = write_profile(tmp_path / "braking.csv", np.linspace(60, 0, 40))
+    result = evaluate_drive_profile(file_path, **{**VEHICLE, "regen_efficiency": 1.0})
+    assert result["wh_per_km"] < 0 and result["km_per_kwh"] is None
+
+
+def test_changed_profile_files_are_parsed_again(tmp_path):
+    file_path = write_profile(tmp_path / "profile.csv", np.full(60, 30.0))
+    before = evaluate_drive_profile(file_path, **VEHICLE)["total_distance_km"]
+    write_profile(file_path, np.full(60, 60.0))
+    os.utime(file_path, (os.path.getmtime(file_path) + 10,) * 2)
+    assert evaluate_drive_profile(file_path, **VEHICLE)["total_distance_km"] == pytest.approx(2 * before)
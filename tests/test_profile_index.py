@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+import profile_index
+from energy_model import calculate_kinematics, load_drive_profile
+from profile_index import filter_profiles, invalid_profiles, refresh_profile_index
+
+HEADER = "Phase;Total elapsed time (s);Phase elapsed time (s);Vehicle speed (km/h);Acceleration (m/s²)\n"
+
+
+def write_profile(path, speed_kph):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(HEADER)
+        for time, speed in enumerate(speed_kph):
+            file.write(f"Low;{time};{time};{speed:g};0".replace(".", ",") + "\n")
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_index, "_indexes", {})
+    write_profile(tmp_path / "fast.csv", np.full(100, 80.0))
+    write_profile(tmp_path / "slow.csv", np.linspace(0, 30.5, 300))
+    (tmp_path / "empty.csv").write_text("")
+    (tmp_path / "columns.csv").write_text("Phase;Time\nLow;0\n")
+    (tmp_path / "notes.txt").write_text("not a profile")
+    return str(tmp_path)
+
+
+def test_metadata_of_the_readable_profiles(library):
+    entries = refresh_profile_index(library)
+    assert sorted(entries) == ["fast.csv", "slow.csv"]
+    df = load_drive_profile(os.path.join(library, "slow.csv"))
+    profile = calculate_kinematics(df["Time"].to_numpy(), df["Speed"].to_numpy())
+    slow = entries["slow.csv"]
+    assert slow["samples"] == 300 and slow["duration_s"] == 299
+    assert slow["distance_km"] == pytest.approx(profile["total_distance_m"][-1] / 1000, rel=1e-12)
+    assert slow["max_speed_kph"] == 30.5 and slow["phases"] == ["Low"]
+    assert not slow["has_gradient"] and not slow["has_height"]
+    assert filter_profiles(entries, sort_by="distance_km", descending=True) == ["fast.csv", "slow.csv"]
+    assert filter_profiles(entries, max_speed_range_kph=(0, 50)) == ["slow.csv"]
+
+
+def test_unreadable_profiles_are_listed_but_not_returned(library):
+    refresh_profile_index(library)
+    errors = invalid_profiles(library)
+    assert sorted(errors) == ["columns.csv", "empty.csv"]
+    assert errors["empty.csv"].startswith("EmptyDataError")
+
+    # A repaired profile joins the library at the next refresh
+    write_profile(os.path.join(library, "empty.csv"), np.full(10, 20.0))
+    assert "empty.csv" in refresh_profile_index(library)
+    assert sorted(invalid_profiles(library)) == ["columns.csv"]
+
+
+def test_unchanged_profiles_are_not_parsed_again(library, monkeypatch):
+    entries = refresh_profile_index(library)
+
+    def parse(file_path):
+        raise AssertionError(f"{file_path} parsed again")
+
+    # Neither from memory nor, in a new process, from the index file
+    monkeypatch.setattr(profile_index, "profile_metadata", parse)
+    assert refresh_profile_index(library) == entries
+    monkeypatch.setattr(profile_index, "_indexes", {})
+    assert refresh_profile_index(library) == entries
+    assert sorted(invalid_profiles(library)) == ["columns.csv", "empty.csv"]
+
+    os.remove(os.path.join(library, "fast.csv"))
+    assert list(refresh_profile_index(library)) == ["slow.csv"]
@@ -0,0 +1,86 @@
+import multiprocessing
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import results_store
+from results_store import ResultsStore, get_results_store, journal_mode
+
+WRITERS = 4
+RESULTS_PER_WRITER = 25
+
+
+def write_results(path, mode, writer):
+    store = ResultsStore(path, 1 << 30, mode)
+    for index in range(RESULTS_PER_WRITER):
+        store.put("test", f"{writer}-{index}", {"value": np.full(100, writer * 1000 + index, dtype=float)})
+
+
+@pytest.mark.parametrize("mode", ["WAL", "DELETE", "TRUNCATE"])
+def test_concurrent_writers_lose_no_results(tmp_path, mode):
+    path = str(tmp_path / "store.sqlite")
+    store = ResultsStore(path, 1 << 30, mode)
+    assert store._connection().execute("PRAGMA journal_mode").fetchone()[0].upper() == mode
+
+    # Two writer processes with two threads each
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=write_results, args=(path, mode, writer)) for writer in range(2)]
+    threads = [threading.Thread(target=write_results, args=(path, mode, writer)) for writer in range(2, WRITERS)]
+    for worker in processes + threads:
+        worker.start()
+    for worker in processes + threads:
+        worker.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    keys = [f"{writer}-{index}" for writer in range(WRITERS) for index in range(RESULTS_PER_WRITER)]
+    found = store.get_many(keys)
+    assert len(found) == len(keys)
+    for writer in range(WRITERS):
+        assert found[f"{writer}-3"]["value"][0] == writer * 1000 + 3
+
+
+def test_least_recently_used_results_are_evicted(tmp_path, monkeypatch):
+    # A clock that advances on every read, so that no two writes or reads share their time
+    clock = iter(range(1000))
+    monkeypatch.setattr(results_store, "time", SimpleNamespace(time=lambda: float(next(clock))))
+    monkeypatch.setattr(results_store, "ACCESS_UPDATE_INTERVAL_S", 0)
+    result = {"value": np.zeros(1000)}
+    size = len(results_store.serialize(result))
+    store = ResultsStore(str(tmp_path / "store.sqlite"), int(size * 3.5))
+    for key in ("a", "b", "c"):
+        store.put("test", key, result)
+    # Reading "a" makes "b" the least recently used result
+    assert store.get("a") is not None
+    store.put("test", "d", result)
+    assert sorted(store.get_many(["a", "b", "c", "d"])) == ["a", "c", "d"]
+
+
+def test_journal_mode_follows_the_filesystem(tmp_path, monkeypatch):
+    path = str(tmp_path / "store.sqlite")
+    monkeypatch.delenv("EV_RESULTS_STORE_JOURNAL", raising=False)
+    monkeypatch.setattr(results_store, "filesystem_type", lambda path: "nfs4")
+    assert journal_mode(path) == "DELETE"
+    monkeypatch.setattr(results_store, "filesystem_type", lambda path: "ext4")
+    assert journal_mode(path) == "WAL"
+    monkeypatch.setenv("EV_RESULTS_STORE_JOURNAL", "truncate")
+    assert journal_mode(path) == "TRUNCATE"
+    with pytest.raises(ValueError):
+        monkeypatch.setenv("EV_RESULTS_STORE_JOURNAL", "memory")
+        journal_mode(path)
+
+
+def test_store_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "_store", None)
+    monkeypatch.delenv("EV_RESULTS_STORE", raising=False)
+    assert get_results_store() is None
+
+    monkeypatch.setenv("EV_RESULTS_STORE", str(tmp_path / "store.sqlite"))
+    monkeypatch.setenv("EV_RESULTS_STORE_MAX_MB", "2")
+    monkeypatch.setenv("EV_RESULTS_STORE_JOURNAL", "delete")
+    store = get_results_store()
+    assert store.max_bytes == 2 * 1024 * 1024 and store.journal_mode == "DELETE"
+    assert store.get_or_compute("test", {"speed": 1}, lambda: {"value": 1.0}) == {"value": 1.0}
+    assert store.get_or_compute("test", {"speed": 1}, lambda: {"value": 2.0}) == {"value": 1.0}
+
+    monkeypatch.setenv("EV_RESULTS_STORE_JOURNAL", "memory")
+    assert get_results_store() is None
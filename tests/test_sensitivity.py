@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from sensitivity import perturbation_ranges, sobol_indices, tornado_analysis
+
+
+def ishigami(inputs, a=7.0, b=0.1):
+    x1, x2, x3 = inputs["x1"], inputs["x2"], inputs["x3"]
+    return {"y": np.sin(x1) + a * np.sin(x2) ** 2 + b * x3 ** 4 * np.sin(x1)}
+
+
+def test_sobol_indices_of_the_ishigami_function():
+    # Analytic indices for a = 7, b = 0.1 with every input uniform on [-pi, pi]
+    ranges = {name: (-np.pi, np.pi) for name in ("x1", "x2", "x3")}
+    indices = sobol_indices(ishigami, {"x1": 0.0, "x2": 0.0, "x3": 0.0}, ranges, ["y"], samples=20000,
+                            block_size=7000)["y"]
+    np.testing.assert_allclose(indices["first_order"], [0.3139, 0.4424, 0.0], atol=0.03)
+    np.testing.assert_allclose(indices["total"], [0.5576, 0.4424, 0.2437], atol=0.03)
+
+
+def test_tornado_of_a_linear_function():
+    baseline = {"x": 1.0, "y": 2.0, "z": 3.0}
+    ranges = perturbation_ranges(baseline, ["x", "y", "z"], 0.1)
+    tornado = tornado_analysis(lambda inputs: {"f": 5 * inputs["x"] + inputs["y"] + 0 * inputs["z"]}, baseline,
+                               ranges, ["f"])["f"]
+    assert [row[0] for row in tornado] == ["x", "y", "z"]
+    assert tornado[0][1:] == pytest.approx((4.5 + 2, 5.5 + 2, 1.0))
+    assert tornado[2][3] == 0
+
+
+def test_zero_baselines_get_an_absolute_range():
+    baseline = {"financed_share": 0.0, "cost_inflation": 0.0, "mass": 2000.0}
+    ranges = perturbation_ranges(baseline, list(baseline), 0.1, {"financed_share": (0.0, 0.5)})
+    assert ranges == {"financed_share": (0.0, 0.5), "cost_inflation": (0.0, 0.1),
+                      "mass": pytest.approx((1800.0, 2200.0))}
+    tornado = tornado_analysis(lambda inputs: {"f": inputs["financed_share"] + inputs["cost_inflation"]}, baseline,
+                               ranges, ["f"])["f"]
+    assert all(row[3] > 0 for row in tornado if row[0] != "mass")